@@ -1,6 +1,7 @@
 "use client";
 import { useState } from "react";
 import MatchForm from "@/components/MatchForm";
+import MatchFeed from "@/components/MatchFeed";
 import ResultCard from "@/components/ResultCard";
 
 interface Candidate {
@@ -75,6 +76,7 @@ export default function MatchesPage() {
             <p className="text-blue-700">{autoMatchSummary}</p>
           </div>
         )}
+        <MatchFeed />
         {!result && <MatchForm setResult={setResult} setError={setError} />}
         {error && (
           <div className="my-8 p-4 bg-red-50 border border-red-200 rounded-md">
@@ -0,0 +1,56 @@
+"use client";
+import { useEffect, useState } from "react";
+
+interface MatchEvent {
+  type: "created" | "updated" | "replaced" | "reset";
+  id?: number;
+  candidate_id?: number;
+  job_id?: number;
+  score?: number;
+}
+
+const MAX_EVENTS = 20;
+
+// Live match changes, streamed by the API instead of polling the matches list
+export default function MatchFeed({ jobId }: { jobId?: number }) {
+  const [events, setEvents] = useState<MatchEvent[]>([]);
+  const [connected, setConnected] = useState(false);
+
+  useEffect(() => {
+    const query = jobId ? `?job_id=${jobId}` : "";
+    const source = new EventSource(`http://localhost:8000/api/matches/events/${query}`);
+    const onEvent = (message: MessageEvent) => {
+      const event: MatchEvent = JSON.parse(message.data);
+      setEvents((previous) => (event.type === "reset" ? [] : [event, ...previous].slice(0, MAX_EVENTS)));
+    };
+    ["created", "updated", "replaced", "reset"].forEach((type) => source.addEventListener(type, onEvent));
+    source.onopen = () => setConnected(true);
+    // EventSource reconnects by itself
+    source.onerror = () => setConnected(false);
+    return () => source.close();
+  }, [jobId]);
+
+  return (
+    <div className="my-8 bg-white shadow-md rounded-lg p-6">
+      <h3 className="text-xl font-bold mb-4">
+        Live Match Updates
+        <span className={`ml-2 text-sm ${connected ? "text-green-600" : "text-gray-400"}`}>
+          {connected ? "connected" : "reconnecting..."}
+        </span>
+      </h3>
+      {events.length === 0 ? (
+        <p className="text-gray-500">No changes yet.</p>
+      ) : (
+        <ul className="space-y-1 text-gray-700">
+          {events.map((event, index) => (
+            <li key={`${event.type}-${event.id ?? event.job_id}-${index}`}>
+              {event.type === "replaced"
+                ? `All matches of job ${event.job_id} were recomputed`
+                : `Match ${event.id} ${event.type}: candidate ${event.candidate_id}, job ${event.job_id}, score ${event.score}%`}
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+}
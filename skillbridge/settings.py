@@ -30,6 +30,13 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# Optional integrations. Each one is imported by every worker on startup, so
+# keep unused ones off (see `manage.py startup_profile`).
+SKILLMATCH_OPTIONAL_APPS = {
+    "JWT": True,  # /api/token/ endpoints and JWT authentication (rest_framework_simplejwt)
+    "NINJA": False,  # django-ninja, not used by any endpoint yet
+}
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -38,8 +45,8 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
-    "rest_framework_simplejwt",
-    "ninja",
+    *(["rest_framework_simplejwt"] if SKILLMATCH_OPTIONAL_APPS["JWT"] else []),
+    *(["ninja"] if SKILLMATCH_OPTIONAL_APPS["NINJA"] else []),
     "skillmatch",
     "corsheaders",
 ]
@@ -51,6 +58,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # After authentication: profiling on request is for staff users
+    "skillmatch.core.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -133,6 +142,152 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared between worker processes; holds the per-model cache versions.
+    # Swap for "django.core.cache.backends.db.DatabaseCache" if workers do
+    # not share a filesystem.
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "var" / "cache",
+    },
+}
+
+# Response caching for read-heavy skillmatch endpoints
+SKILLMATCH_CACHE = {
+    "ENABLED": True,
+    "TIMEOUT": 300,  # Seconds
+    "LOCAL_ALIAS": "default",
+    "SHARED_ALIAS": "shared",  # None for a single-process, local-only cache
+}
+
+# Match scoring: weighted mean of the listed scorers (see skillmatch.services.scoring).
+# Other scorers: WeightedSkillScorer, ExperienceFitScorer, RarityScorer.
+SKILLMATCH_SCORING = {
+    "SCORERS": [
+        {"class": "skillmatch.services.scoring.SkillOverlapScorer", "weight": 1.0},
+    ],
+}
+
+# Semantic matching (see skillmatch.services.semantic). When enabled and an index was built with
+# `manage.py build_semantic_index`, match_candidates scores only the TOP_K nearest candidates per
+# job. Add skillmatch.services.semantic.SemanticSkillScorer to SCORERS to count near-synonyms.
+SKILLMATCH_SEMANTIC = {
+    "ENABLED": False,
+    "PATH": BASE_DIR / "var" / "semantic",
+    "THRESHOLD": 0.75,  # Cosine similarity above which two skills are equivalent
+    "TOP_K": 200,
+    "NPROBE": 8,  # IVF lists scanned per query
+}
+
+# Memory-mapped snapshot of the best matches per job, published by match_candidates and read by
+# /api/matches/top/ and /api/matches/pair-score/ without querying the database
+SKILLMATCH_SNAPSHOT = {
+    "ENABLED": False,
+    "PATH": BASE_DIR / "var" / "snapshots",
+    "TOP_K": 100,  # Candidates kept per job; None keeps every scored pair
+    "KEEP": 3,  # Versions kept on disk
+}
+
+# Denormalized match list (see skillmatch.services.summary). After enabling, fill it once with
+# `manage.py refresh_match_summary`; /api/matches/ is then served from it without joins.
+SKILLMATCH_SUMMARY = {
+    "ENABLED": False,
+}
+
+# Match retention (see skillmatch.services.retention): batch matching stores only pairs scoring at
+# least MIN_SCORE, at most TOP_N_PER_JOB per job. `manage.py prune_matches` deletes matches of
+# inactive candidates/jobs and older matches outside the policy.
+SKILLMATCH_RETENTION = {
+    "MIN_SCORE": None,  # e.g. 1.0 to skip 0-score pairs
+    "TOP_N_PER_JOB": None,
+    "BATCH_SIZE": 5000,  # Rows per pruning statement
+}
+
+# CV text extraction (see skillmatch.services.extraction): a pool of worker processes per web
+# worker, with per-file limits. Parse requests get a 503 when all workers are busy and QUEUE_SIZE
+# more files are waiting.
+SKILLMATCH_EXTRACTION = {
+    "WORKERS": 2,
+    "QUEUE_SIZE": 8,
+    "TIMEOUT": 30.0,  # Wall-clock seconds per file
+    "CPU_SECONDS": 20,
+    "MEMORY_MB": 512,  # Per worker process
+}
+
+# Chunked, resumable CV uploads at /api/uploads/ (see skillmatch.services.uploads). Sessions idle
+# for EXPIRE_AFTER seconds are deleted by `manage.py reap_uploads`.
+SKILLMATCH_UPLOADS = {
+    "MAX_SIZE": 50 * 1024 * 1024,
+    "MAX_CHUNK_SIZE": 8 * 1024 * 1024,
+    "EXPIRE_AFTER": 24 * 3600,
+}
+
+# Match change feed at /api/matches/events/ (see skillmatch.services.match_events): server-sent events
+# relayed from Postgres NOTIFY by one listening connection per process.
+SKILLMATCH_EVENTS = {
+    "ENABLED": True,
+    "HEARTBEAT": 15.0,  # Seconds between keep-alive comments
+    "MAX_SUBSCRIBERS": 500,  # Open streams per process
+}
+
+# Per-client rate limits and admission control (see skillmatch.core.throttling). Every client (user,
+# else IP address) has a token bucket per BUCKETS entry holding up to BURST tokens, refilled at RATE
+# tokens per second. Requests to the URL names in COSTS spend tokens (per pair or upload for the batch
+# endpoints) or get a 429; over MAX_IN_FLIGHT concurrent requests per worker process they get a 503.
+SKILLMATCH_THROTTLING = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "shared",
+    "BUCKETS": {
+        "compute": {"BURST": 120, "RATE": 1.0},
+    },
+    "COSTS": {
+        "match-match-candidates": ("compute", 30),
+        "match-create-match": ("compute", 1),
+        "match-create-many": ("compute", 0.05),
+        "cvupload-parse": ("compute", 2),
+        "cvupload-parse-many": ("compute", 2),
+        "job-rematch": ("compute", 5),
+    },
+    "MAX_IN_FLIGHT": {
+        # Full matching runs; a tenant's runs also exclude each other (see claim_run)
+        "match-match-candidates": 2,
+        "match-create-match": 32,
+        "match-create-many": 4,
+        "cvupload-parse": 16,
+        "cvupload-parse-many": 2,
+    },
+}
+
+# Tenants (see skillmatch.core.tenancy): requests act for the tenant named by the X-Tenant header (its
+# slug) or for the user's only tenant. Tenants listed in DATABASES keep their candidates, jobs and
+# matches in that database alias (add it to DATABASES above and `manage.py migrate --database <alias>`).
+SKILLMATCH_TENANTS = {
+    "HEADER": "X-Tenant",
+    "ALLOW_ANONYMOUS": False,  # Naming a tenant takes a logged in member or staff user
+    "DATABASES": {},  # e.g. {"acme": "tenant_acme"}
+}
+
+DATABASE_ROUTERS = ["skillmatch.core.tenancy.TenantRouter"]
+
+# Request and match run profiling (see skillmatch.core.profiling). Staff users profile a request by
+# sending an X-Profile header or a `profile` query parameter; SAMPLE_RATE profiles a fraction of all
+# requests. Captures are downloaded from /api/profiles/ as speedscope JSON ("sample" mode) or pstats
+# ("cprofile" mode), with the timings of the SQL statements run.
+SKILLMATCH_PROFILING = {
+    "ENABLED": True,
+    "MODE": "sample",
+    "INTERVAL": 0.005,  # Seconds between stack samples
+    "SAMPLE_RATE": 0.0,
+    "PATH": BASE_DIR / "var" / "profiles",
+    "KEEP": 50,  # Captures kept on disk
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -144,12 +299,14 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",  # `IsAuthenticated` temporarily disabled
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        *(["rest_framework_simplejwt.authentication.JWTAuthentication"] if SKILLMATCH_OPTIONAL_APPS["JWT"] else []),
         "rest_framework.authentication.SessionAuthentication",
     ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "skillmatch.core.throttling.TokenBucketThrottle",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
-    "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
 }
 
 # CORS settings for development
@@ -1,8 +1,189 @@
-from django.contrib import admin
-from .models import CVUpload, Candidate, Job, Match
-
-# Register your models here.
-admin.site.register(CVUpload)
-admin.site.register(Candidate)
-admin.site.register(Job)
-admin.site.register(Match)
+"""
+Admin for the skillmatch app.
+
+The tables are large, so the changelists avoid what the default
+``ModelAdmin`` does per page: they count with the planner's estimate,
+fetch related rows in the same query, search through the full-text
+indexes, only filter and sort on indexed columns, and pick related
+objects with autocomplete or raw id widgets instead of a ``<select>`` of
+every row.
+
+Tenant-owned rows are read and written in the database of the tenant
+chosen in the changelist's tenant filter, so tenants kept in databases of
+their own (``SKILLMATCH_TENANTS['DATABASES']``) are listed there; change
+and delete pages keep the filter. Without it, and in autocomplete lookups,
+the admin shows the default database.
+"""
+from itertools import groupby
+
+from django.contrib import admin, messages
+from django.http import QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+
+from . import services
+from .core.cache import invalidate_models
+from .core.pagination import EstimatedCountPaginator
+from .core.search import prefix_query
+from .core.tenancy import use_tenant
+from .models import CVUpload, Candidate, Job, Match, MatchRun, Tenant
+
+# Jobs one "rematch" action may rescore; it runs within the request
+MAX_REMATCH_JOBS = 20
+
+TENANT_LOOKUP = 'tenant__id__exact'
+
+
+class TenantDatabaseMixin:
+    """Acts for the tenant of the changelist's tenant filter while a view runs."""
+
+    def acting_tenant(self, request):
+        tenant_id = request.GET.get(TENANT_LOOKUP) or QueryDict(
+            request.GET.get('_changelist_filters', '')).get(TENANT_LOOKUP)
+        if not tenant_id or not tenant_id.isdigit():
+            return None
+        return Tenant.objects.filter(pk=tenant_id).first()
+
+    def _for_tenant(self, view, request, *args):
+        with use_tenant(self.acting_tenant(request)):
+            response = view(request, *args)
+            # Template responses query their rows while rendering
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+    def changelist_view(self, request, extra_context=None):
+        return self._for_tenant(super().changelist_view, request, extra_context)
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        return self._for_tenant(super().changeform_view, request, object_id, form_url, extra_context)
+
+    def delete_view(self, request, object_id, extra_context=None):
+        return self._for_tenant(super().delete_view, request, object_id, extra_context)
+
+
+class LargeTableAdmin(TenantDatabaseMixin, admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the unfiltered count(*) shown next to filtered result counts
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class FullTextSearchAdmin(LargeTableAdmin):
+    """Searches the model's ``search_vector`` (GIN-indexed) by word prefixes."""
+
+    def get_search_results(self, request, queryset, search_term):
+        query = prefix_query(search_term)
+        if query is None:
+            return queryset, False
+        return queryset.filter(search_vector=query), False
+
+
+class StatusAdminMixin:
+    actions = ['activate', 'deactivate']
+
+    def _set_status(self, request, queryset, value):
+        # update() bypasses the model signals and auto_now; match indexes
+        # only reread rows whose updated_at moved
+        updated = queryset.update(status=value, updated_at=timezone.now())
+        invalidate_models(self.model)
+        self.message_user(request, _("%(count)d %(name)s marked %(status)s.") % {
+            'count': updated, 'name': self.model._meta.verbose_name_plural, 'status': value})
+
+    @admin.action(description=_("Mark selected as active"))
+    def activate(self, request, queryset):
+        self._set_status(request, queryset, 'active')
+
+    @admin.action(description=_("Mark selected as inactive"))
+    def deactivate(self, request, queryset):
+        self._set_status(request, queryset, 'inactive')
+
+
+@admin.register(Tenant)
+class TenantAdmin(admin.ModelAdmin):
+    list_display = ('slug', 'name', 'created_at')
+    search_fields = ('slug', 'name')
+    raw_id_fields = ('members',)
+
+
+@admin.register(CVUpload)
+class CVUploadAdmin(LargeTableAdmin):
+    list_display = ('id', 'file', 'tenant', 'uploaded_at')
+    list_filter = ('tenant',)
+
+
+@admin.register(Candidate)
+class CandidateAdmin(StatusAdminMixin, FullTextSearchAdmin):
+    list_display = ('id', 'name', 'experience_years', 'status', 'updated_at')
+    list_filter = ('tenant', 'status')
+    search_fields = ('name',)  # Shows the search box; see get_search_results
+    sortable_by = ('id',)
+    raw_id_fields = ('source_cv',)
+
+
+@admin.register(Job)
+class JobAdmin(StatusAdminMixin, FullTextSearchAdmin):
+    list_display = ('id', 'title', 'min_experience_years', 'status', 'updated_at', 'matches')
+    list_filter = ('tenant', 'status')
+    search_fields = ('title',)
+    sortable_by = ('id',)
+    actions = [*StatusAdminMixin.actions, 'rematch']
+
+    @admin.display(description=_("Matches"))
+    def matches(self, job):
+        # Filtering by job reads a single partition of the match table
+        url = reverse('admin:skillmatch_match_changelist')
+        if job.tenant_id is not None:
+            return format_html('<a href="{}?job__id__exact={}&amp;{}={}">{}</a>',
+                               url, job.pk, TENANT_LOOKUP, job.tenant_id, _("View"))
+        return format_html('<a href="{}?job__id__exact={}">{}</a>', url, job.pk, _("View"))
+
+    @admin.action(description=_("Rematch selected jobs"))
+    def rematch(self, request, queryset):
+        """Rescore all active candidates against each job, like the API's ``rematch``."""
+        jobs = list(queryset.filter(status='active').select_related('tenant')
+                    .order_by('tenant_id', 'pk')[:MAX_REMATCH_JOBS + 1])
+        if len(jobs) > MAX_REMATCH_JOBS:
+            self.message_user(request, _(
+                "Select at most %(limit)d active jobs, or run match_candidates for more."
+            ) % {'limit': MAX_REMATCH_JOBS}, messages.ERROR)
+            return
+        stored = 0
+        for tenant_id, tenant_jobs in groupby(jobs, key=lambda job: job.tenant_id):
+            tenant_jobs = list(tenant_jobs)
+            # Scored against the candidates of the job's tenant
+            with use_tenant(tenant_jobs[0].tenant):
+                # Looked up here: the batch engine needs numpy, which admin pages do not
+                stored += sum(services.match_runs.rematch_job(job.pk) for job in tenant_jobs)
+        self.message_user(request, _("Rematched %(jobs)d jobs, storing %(matches)d matches.") % {
+            'jobs': len(jobs), 'matches': stored})
+
+
+@admin.register(Match)
+class MatchAdmin(LargeTableAdmin):
+    list_display = ('id', 'candidate_name', 'job_title', 'score', 'matched_at')
+    list_select_related = ('candidate', 'job')
+    list_filter = ('tenant',)
+    sortable_by = ('id',)
+    autocomplete_fields = ('candidate', 'job')
+
+    @admin.display(description=_("Candidate"))
+    def candidate_name(self, match):
+        return match.candidate.name
+
+    @admin.display(description=_("Job"))
+    def job_title(self, match):
+        return match.job.title
+
+
+@admin.register(MatchRun)
+class MatchRunAdmin(TenantDatabaseMixin, admin.ModelAdmin):
+    list_display = ('id', 'tenant', 'status', 'shards_completed', 'matches_created', 'matches_updated',
+                    'duration_seconds', 'started_at', 'finished_at')
+    list_filter = ('tenant', 'status')
+    readonly_fields = [field.name for field in MatchRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
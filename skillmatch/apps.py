@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class SkillmatchConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "skillmatch"
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
+
+        # Times SQL statements for profile captures
+        from django.db.backends.signals import connection_created
+        from .core.profiling import install_query_recorder
+        connection_created.connect(install_query_recorder)
@@ -1,13 +1,26 @@
 """
 Core utilities for the skillmatch app.
+
+Imported eagerly: none of these modules need numpy or an optional app.
+The ``services`` package defers its numpy-backed modules (see ``lazy``).
 """
 from .serializers import safe_serialize, _deep_convert
 from .async_helpers import (
     async_to_sync_view, fetch_object, fetch_objects,
     check_exists, save_object, serialize_object,
-    fetch_object_or_none, run_in_transaction
+    fetch_object_or_none, run_in_transaction,
+    fetch_many, exists_many, upsert_many, get_or_upsert, served_over_asgi
 )
-from .mixins import SafeSerializationMixin
+from .mixins import SafeSerializationMixin, CachedResponseMixin
+from .cache import get_response_cache, invalidate_models
+from .storage import VersionedDirectory
+from .pagination import EstimatedCountPagination
+from .filters import FullTextSearchFilter
+from .search import prefix_query
+from .coalescing import coalesce_requests
+from .throttling import AdmissionControlMixin, TokenBucketThrottle
+from .profiling import capture
+from .tenancy import TenantScopedMixin, current_tenant, use_tenant
 
 __all__ = [
     'safe_serialize',
@@ -18,6 +31,25 @@ __all__ = [
     'save_object',
     'serialize_object',
     'SafeSerializationMixin',
+    'CachedResponseMixin',
+    'get_response_cache',
+    'invalidate_models',
+    'VersionedDirectory',
+    'EstimatedCountPagination',
+    'FullTextSearchFilter',
+    'prefix_query',
+    'coalesce_requests',
+    'AdmissionControlMixin',
+    'TokenBucketThrottle',
+    'capture',
+    'TenantScopedMixin',
+    'current_tenant',
+    'use_tenant',
     'fetch_object_or_none',
     'run_in_transaction',
+    'fetch_many',
+    'exists_many',
+    'upsert_many',
+    'get_or_upsert',
+    'served_over_asgi',
 ]
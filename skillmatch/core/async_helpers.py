@@ -3,8 +3,22 @@ Async utilities for the skillmatch app.
 """
 import functools
 import asyncio
+import inspect
 from asgiref.sync import sync_to_async
-from django.db import transaction
+from django.db import connections, router, transaction
+
+from .tenancy import current_tenant, tenant_database
+
+
+def served_over_asgi(request):
+    """
+    Whether ``request`` (a Django or DRF request) is served over ASGI, where
+    streaming responses need async iterators. Sync views run in a worker
+    thread there, so checking for a running event loop would not tell.
+    """
+    # Django's ASGIRequest keeps the connection's scope; DRF's Request
+    # proxies attribute lookups to the Django request
+    return getattr(request, 'scope', None) is not None
 
 
 def async_to_sync_view(func):
@@ -44,13 +58,14 @@ async def fetch_object_or_none(model_cls, **lookup):
 async def run_in_transaction(func, *args, **kwargs):
     """
     Run a function inside a database transaction in a way that's compatible with async.
+    The transaction is on the current tenant's database.
 
     Example:
         result = await run_in_transaction(create_user, username='john')
     """
     @sync_to_async
     def _run_in_transaction():
-        with transaction.atomic():
+        with transaction.atomic(using=tenant_database(current_tenant())):
             return func(*args, **kwargs)
 
     return await _run_in_transaction()
@@ -98,3 +113,91 @@ async def serialize_object(serializer_instance):
         data = await serialize_object(UserSerializer(user))
     """
     return await sync_to_async(lambda: dict(serializer_instance.data))()
+
+
+async def fetch_many(model_cls, ids, **filters):
+    """
+    Async helper to fetch objects by primary key in one query, among those
+    matching ``filters``. Returns a dict of the objects found, keyed by
+    primary key.
+
+    Example:
+        users = await fetch_many(User, [1, 2, 3], is_active=True)
+    """
+    return await sync_to_async(lambda: model_cls.objects.filter(**filters).in_bulk(list(ids)))()
+
+
+async def exists_many(model_cls, fields, values):
+    """
+    Async helper to check many lookups at once: returns the set of
+    ``values`` tuples (one value per name in ``fields``) that exist, in
+    one query.
+
+    Example:
+        existing = await exists_many(Match, ['candidate_id', 'job_id'], [(1, 2), (1, 3)])
+    """
+    values = [tuple(value) for value in values]
+    if not values:
+        return set()
+    using = router.db_for_read(model_cls)
+    columns = [model_cls._meta.get_field(name).column for name in fields]
+    types = [model_cls._meta.get_field(name).db_type(connections[using]) for name in fields]
+
+    def check():
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(f't.{column}' for column in columns)}
+                FROM {model_cls._meta.db_table} t
+                JOIN unnest({', '.join(f'%s::{db_type}[]' for db_type in types)})
+                    AS lookup ({', '.join(columns)}) USING ({', '.join(columns)})
+            """, [list(column_values) for column_values in zip(*values)])
+            return {tuple(row) for row in cursor.fetchall()}
+
+    return await sync_to_async(check)()
+
+
+async def upsert_many(model_cls, objs, unique_fields, update_fields):
+    """
+    Async helper to insert ``objs`` or update ``update_fields`` of the rows
+    already matching their ``unique_fields``, in one query. Returns the
+    objects with primary keys set. Like ``bulk_create``, it sends no
+    signals.
+
+    Example:
+        matches = await upsert_many(Match, matches, ['candidate', 'job'], ['score', 'rationale'])
+    """
+    objs = list(objs)
+    if not objs:
+        return []
+    return await sync_to_async(lambda: model_cls.objects.bulk_create(
+        objs, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields))()
+
+
+async def get_or_upsert(model_cls, lookup, defaults, update=True):
+    """
+    Async helper returning ``(obj, created)`` for the row matching
+    ``lookup`` (which must cover a unique constraint). A missing row is
+    inserted with ``defaults``; with ``update``, an existing one gets
+    ``defaults`` written. ``defaults`` may be a (sync or async) callable,
+    evaluated only when a write is needed. Concurrent callers never hit
+    an IntegrityError; it takes at most two queries.
+
+    Example:
+        profile, created = await get_or_upsert(Profile, {'user_id': 1}, {'theme': 'dark'})
+    """
+    obj = await fetch_object_or_none(model_cls, **lookup)
+    if obj is not None and not update:
+        return obj, False
+    if callable(defaults):
+        defaults = defaults()
+        if inspect.isawaitable(defaults):
+            defaults = await defaults
+    created = obj is None
+    if created:
+        obj = model_cls(**lookup, **defaults)
+    else:
+        for name, value in defaults.items():
+            setattr(obj, name, value)
+    unique_fields = [model_cls._meta.get_field(name).name for name in lookup]
+    obj, = await upsert_many(model_cls, [obj], unique_fields, list(defaults))
+    return obj, created
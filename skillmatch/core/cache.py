@@ -0,0 +1,140 @@
+"""
+Response caching for the skillmatch app.
+
+Serialized list/detail responses are cached in a process-local tier in front
+of an optional shared tier (any Django cache backend, e.g. file or database
+based). Cache keys embed a version per model; writing a model bumps its
+version, which makes every cached response depending on it unreachable
+without having to enumerate keys.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    'LOCAL_ALIAS': 'default',
+    'SHARED_ALIAS': None,
+    'KEY_PREFIX': 'skillmatch',
+}
+
+
+def get_cache_settings():
+    """Return ``settings.SKILLMATCH_CACHE`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_CACHE', {})}
+
+
+class ResponseCache:
+    """
+    Two-tier cache with per-model version counters.
+
+    Versions live in the shared tier when one is configured so that every
+    worker process sees the same invalidations; otherwise they are kept in
+    the local tier, which is only correct for a single process.
+    """
+
+    def __init__(self, local, shared=None, timeout=300, prefix='skillmatch'):
+        self.local = local
+        self.shared = shared
+        self.timeout = timeout
+        self.prefix = prefix
+
+    @property
+    def _version_store(self):
+        return self.shared if self.shared is not None else self.local
+
+    def _version_key(self, label):
+        return f"{self.prefix}:version:{label}"
+
+    def get_versions(self, models):
+        """Return the current version of each model, in order."""
+        keys = [self._version_key(model._meta.label_lower) for model in models]
+        stored = self._version_store.get_many(keys)
+        versions = []
+        for key in keys:
+            version = stored.get(key)
+            if version is None:
+                # Start from a timestamp rather than 1 so an evicted counter
+                # can never collide with versions handed out before.
+                self._version_store.add(key, time.time_ns(), timeout=None)
+                version = self._version_store.get(key)
+            versions.append(version)
+        return versions
+
+    def bump(self, *models):
+        """Invalidate all cached responses depending on ``models``."""
+        for model in models:
+            key = self._version_key(model._meta.label_lower)
+            try:
+                self._version_store.incr(key)
+            except ValueError:
+                self._version_store.set(key, time.time_ns(), timeout=None)
+
+    def make_key(self, request, models, extra=''):
+        """
+        Build the cache key for ``request``; also used as the ETag.
+
+        The absolute URI is used because paginated payloads embed absolute
+        next/previous links.
+        """
+        versions = self.get_versions(models)
+        renderer = getattr(request, 'accepted_renderer', None)
+        raw = '|'.join([
+            request.build_absolute_uri(),
+            getattr(renderer, 'format', '') or '',
+            extra,
+            ','.join(str(version) for version in versions),
+        ])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        full_key = f"{self.prefix}:response:{key}"
+        value = self.local.get(full_key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(full_key)
+            if value is not None:
+                self.local.set(full_key, value, self.timeout)
+        return value
+
+    def set(self, key, value):
+        full_key = f"{self.prefix}:response:{key}"
+        self.local.set(full_key, value, self.timeout)
+        if self.shared is not None:
+            self.shared.set(full_key, value, self.timeout)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+
+def get_response_cache():
+    """
+    Return the configured ``ResponseCache`` or None when caching is disabled.
+    """
+    config = get_cache_settings()
+    if not config['ENABLED']:
+        return None
+    shared_alias = config['SHARED_ALIAS']
+    return ResponseCache(
+        local=caches[config['LOCAL_ALIAS']],
+        shared=caches[shared_alias] if shared_alias else None,
+        timeout=config['TIMEOUT'],
+        prefix=config['KEY_PREFIX'],
+    )
+
+
+def invalidate_models(*models):
+    """
+    Bump the cache version of ``models``.
+
+    Model signals call this for regular ORM writes; bulk paths which bypass
+    signals (``QuerySet.update``, raw SQL, COPY) must call it themselves.
+    """
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        response_cache.bump(*models)
@@ -0,0 +1,124 @@
+"""
+Single-flight coalescing of identical concurrent requests.
+
+A double-submitted form, or several users acting on the same record at
+once, would otherwise redo the same work and race on unique constraints.
+Requests with the same key (e.g. ``('parse', upload_id)``) are coalesced:
+
+* within a process, the first request computes and the others await its
+  result (a thread-safe future, as each request runs its own event loop);
+* across processes, the computation holds a Postgres advisory lock on the
+  key, so duplicates in other processes run one after another and find the
+  first one's rows instead of conflicting with them.
+"""
+import asyncio
+import functools
+import threading
+import zlib
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from rest_framework.response import Response
+
+
+# First key of the two-key advisory lock; the second is a hash of the key
+COALESCE_LOCK_CLASS = 0x5343
+# Seconds between attempts to take a lock held by another process
+LOCK_POLL_INTERVAL = 0.05
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time; concurrent callers
+    with the same key share its result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    async def run(self, key, func):
+        """Return ``await func()``, or the result of the call already in flight for ``key``."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+flights = SingleFlight()
+
+
+def lock_id(key):
+    """Signed 32-bit hash of ``key`` for ``pg_advisory_lock``."""
+    value = zlib.crc32(repr(key).encode('utf-8'))
+    return value - (1 << 32) if value >= (1 << 31) else value
+
+
+@asynccontextmanager
+async def advisory_lock(key):
+    """
+    Hold a session-level advisory lock on ``key``. Waits without blocking
+    the shared sync thread, by polling ``pg_try_advisory_lock``.
+    """
+    params = [COALESCE_LOCK_CLASS, lock_id(key)]
+
+    def try_lock():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", params)
+            return cursor.fetchone()[0]
+
+    def unlock():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s, %s)", params)
+
+    while not await sync_to_async(try_lock)():
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        await sync_to_async(unlock)()
+
+
+def coalesce_requests(key_func):
+    """
+    Decorator for async view methods returning a DRF ``Response``.
+
+    ``key_func(request, *args, **kwargs)`` returns the coalescing key, or
+    None to run the view normally. Every coalesced caller gets its own
+    ``Response`` with the shared data, status code and headers.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapped(self, request, *args, **kwargs):
+            key = key_func(request, *args, **kwargs)
+            if key is None:
+                return await view(self, request, *args, **kwargs)
+
+            async def compute():
+                async with advisory_lock(key):
+                    response = await view(self, request, *args, **kwargs)
+                # Content-Type is set again when the copy is rendered
+                headers = {name: value for name, value in response.items() if name.lower() != 'content-type'}
+                return response.data, response.status_code, headers
+
+            data, status_code, headers = await flights.run(key, compute)
+            return Response(data, status=status_code, headers=headers)
+        return wrapped
+    return decorator
@@ -0,0 +1,26 @@
+"""
+Filter backends for the skillmatch app.
+"""
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F
+from rest_framework.filters import BaseFilterBackend
+
+from .search import prefix_query
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Filters by the ``?q=`` full-text query against the view's
+    ``search_vector_field`` and orders by relevance, falling back to the
+    queryset's own ordering on ties.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = prefix_query(request.query_params.get(self.search_param, ''))
+        if query is None:
+            return queryset
+        field = getattr(view, 'search_vector_field', 'search_vector')
+        return queryset.filter(**{field: query}).annotate(
+            search_rank=SearchRank(F(field), query)
+        ).order_by('-search_rank', *queryset.query.order_by)
@@ -0,0 +1,34 @@
+"""
+Lazy re-exports for packages.
+
+Every worker pays for what ``django.setup()`` and the URLconf import, so the
+``services`` package does not import its modules up front:
+``lazy_exports`` builds a module ``__getattr__`` (PEP 562) which imports the
+defining module the first time a name is looked up, so importing, say,
+``services.summary`` from a signal handler does not also load numpy.
+"""
+import importlib
+import importlib.util
+
+
+def lazy_exports(package, exports):
+    """
+    Return ``(__getattr__, __dir__)`` for ``package``, where ``exports``
+    maps each exported name to the submodule (relative to ``package``)
+    defining it. Submodules can also be reached as attributes.
+    """
+    def __getattr__(name):
+        if name in exports:
+            value = getattr(importlib.import_module(f'.{exports[name]}', package), name)
+        elif importlib.util.find_spec(f'{package}.{name}') is not None:
+            value = importlib.import_module(f'.{name}', package)
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        # Cache on the package, so later lookups skip __getattr__
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(importlib.import_module(package).__dict__) | set(exports))
+
+    return __getattr__, __dir__
@@ -1,8 +1,11 @@
 """
 Mixins for DRF viewsets in skillmatch app.
 """
+from django.utils.cache import parse_etags
+from rest_framework import status
 from rest_framework.response import Response
 from .serializers import safe_serialize
+from .cache import get_response_cache
 
 
 class SafeSerializationMixin:
@@ -55,3 +58,56 @@ class SafeSerializationMixin:
         return Response(
             safe_serialize(response_serializer)
         )
+
+
+class CachedResponseMixin:
+    """
+    Mixin that caches list and retrieve responses.
+
+    The serialized payload is cached under a key built from the request URI
+    and the versions of ``cache_models``; the key doubles as the ETag, so a
+    matching ``If-None-Match`` is answered with 304 before the queryset is
+    evaluated or anything is serialized. Place it before
+    SafeSerializationMixin in the bases.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        """Serve list from the response cache."""
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Serve retrieve from the response cache."""
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key_extra(self, request):
+        """What the response depends on besides the URI and the models."""
+        return self.action or ''
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        response_cache = get_response_cache()
+        if response_cache is None or not self.cache_models:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache.make_key(request, self.cache_models, extra=self.get_cache_key_extra(request))
+        etag = f'"{key}"'
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if '*' in etags or etag in etags or f'W/{etag}' in etags:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
+
+        data = response_cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            response_cache.set(key, response.data)
+        else:
+            response = Response(data)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,55 @@
+"""
+Pagination for large tables.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+# Below this many rows (by the planner's estimate) counting exactly is cheap
+EXACT_COUNT_LIMIT = 100000
+
+
+def estimated_count(queryset):
+    """
+    Return the planner's row estimate for the table of an unfiltered
+    ``queryset`` (summed over its partitions, if partitioned), or None when
+    it is filtered or has never been analyzed. Partitions not analyzed
+    yet, typically new and small, count as empty.
+    """
+    if queryset.query.where or queryset.query.distinct or queryset.query.combinator:
+        return None
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute("""
+            SELECT sum(greatest(reltuples, 0))::bigint, bool_and(reltuples < 0) FROM pg_class
+            WHERE relkind = 'r' AND (
+                oid = %(table)s::regclass
+                OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %(table)s::regclass)
+            )
+        """, {'table': queryset.model._meta.db_table})
+        estimate, unanalyzed = cursor.fetchone()
+    if estimate is None or unanalyzed:
+        return None
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reports the planner's estimate as the count of large
+    unfiltered tables, since ``count(*)`` has to visit every row.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimate is not None and estimate >= EXACT_COUNT_LIMIT:
+            return estimate
+        return super().count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    ``PageNumberPagination`` with an estimated ``count`` for large tables.
+    """
+    django_paginator_class = EstimatedCountPaginator
@@ -0,0 +1,326 @@
+"""
+Opt-in profiling of requests and match runs.
+
+``capture(label)`` profiles the code it wraps and records the SQL it runs,
+then stores both under ``PATH/<id>/`` (the newest ``KEEP`` are kept):
+
+* ``MODE = 'sample'``: a thread samples the stacks of every thread each
+  ``INTERVAL`` seconds, so code running in ``sync_to_async`` threads and on
+  the event loop is seen too; saved as speedscope JSON
+  (https://www.speedscope.app/).
+* ``MODE = 'cprofile'``: ``cProfile`` on the calling thread only (exact
+  call counts, but blind to other threads); saved as a pstats file.
+
+SQL is recorded through a connection execute wrapper, for queries run in
+the capture's context (which ``sync_to_async`` carries into its threads).
+
+``ProfilingMiddleware`` captures requests from staff users sending an
+``X-Profile`` header or a ``profile`` query parameter, and a ``SAMPLE_RATE``
+fraction of all requests. Staff users are recognized by their session or
+by the API's other authentication classes (JWT); the response names the capture in
+``X-Profile-Id``. Captures are listed and downloaded at ``/api/profiles/``.
+
+Configured through ``settings.SKILLMATCH_PROFILING``.
+"""
+import cProfile
+import contextvars
+import json
+import random
+import shutil
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MODE': 'sample',  # 'sample' or 'cprofile'
+    'INTERVAL': 0.005,  # Seconds between stack samples
+    'SAMPLE_RATE': 0.0,  # Fraction of all requests profiled without asking
+    'PATH': 'var/profiles',
+    'KEEP': 50,  # Captures kept on disk
+    'MAX_QUERIES': 10000,  # SQL statements recorded per capture
+}
+
+PROFILE_FILES = {
+    'sample': ('profile.speedscope.json', 'application/json'),
+    'cprofile': ('profile.pstats', 'application/octet-stream'),
+}
+
+
+def get_profiling_settings():
+    """Return ``settings.SKILLMATCH_PROFILING`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_PROFILING', {})}
+
+
+def profiles_path():
+    return Path(settings.BASE_DIR) / get_profiling_settings()['PATH']
+
+
+_current = contextvars.ContextVar('skillmatch_profile', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    """Connection execute wrapper timing statements run inside a capture."""
+    session = _current.get()
+    if session is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        session.add_query(sql, time.perf_counter() - started, many)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``record_queries`` to new connections."""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class StackSampler:
+    """Samples the stacks of all other threads from a background thread."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.frames = {}  # (name, file, line) -> index
+        self.samples = {}  # thread name -> [(elapsed, stack of frame indexes)]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _frame(self, code, line):
+        key = (code.co_qualname, code.co_filename, line)
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frames)
+        return index
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            elapsed = time.perf_counter() - self.started
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame(frame.f_code, frame.f_code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.setdefault(names.get(ident, str(ident)), []).append((elapsed, stack))
+
+    def speedscope(self, name):
+        """The samples as a speedscope file, one profile per thread."""
+        frames = [None] * len(self.frames)
+        for (qualname, filename, line), index in self.frames.items():
+            frames[index] = {'name': qualname, 'file': filename, 'line': line}
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'skillmatch',
+            'shared': {'frames': frames},
+            'profiles': [
+                {
+                    'type': 'sampled',
+                    'name': thread,
+                    'unit': 'seconds',
+                    'startValue': 0,
+                    'endValue': self.duration,
+                    'samples': [stack for _, stack in samples],
+                    'weights': [self.interval] * len(samples),
+                }
+                for thread, samples in sorted(self.samples.items())
+            ],
+        }
+
+
+class ProfileSession:
+    """One capture: a profiler and the SQL statements it saw."""
+
+    def __init__(self, label, mode=None):
+        config = get_profiling_settings()
+        # Sorts by start time, which pruning and listing rely on
+        self.id = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.mode = mode or config['MODE']
+        if self.mode not in PROFILE_FILES:
+            raise ValueError(f"Unknown profiling mode {self.mode!r}.")
+        self.interval = config['INTERVAL']
+        self.max_queries = config['MAX_QUERIES']
+        self.queries = []
+        self.dropped_queries = 0
+        self.meta = {}
+        self._lock = threading.Lock()
+
+    def add_query(self, sql, seconds, many):
+        with self._lock:
+            if len(self.queries) < self.max_queries:
+                self.queries.append({'sql': sql, 'ms': round(seconds * 1000, 3), 'many': many,
+                                     'thread': threading.current_thread().name})
+            else:
+                self.dropped_queries += 1
+
+    def start(self):
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = StackSampler(self.interval)
+            self.profiler.start()
+
+    def stop(self):
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        self.duration = time.perf_counter() - self._started
+
+    def save(self):
+        """Write the capture under ``profiles_path()`` and drop the oldest beyond ``KEEP``."""
+        root = profiles_path()
+        directory = root / self.id
+        directory.mkdir(parents=True)
+        filename, _ = PROFILE_FILES[self.mode]
+        if self.mode == 'cprofile':
+            self.profiler.dump_stats(directory / filename)
+        else:
+            (directory / filename).write_text(json.dumps(self.profiler.speedscope(self.label)))
+        (directory / 'sql.json').write_text(json.dumps(self.queries))
+        (directory / 'meta.json').write_text(json.dumps(self.summary()))
+
+        captures = sorted(path for path in root.iterdir() if (path / 'meta.json').exists())
+        for path in captures[:-get_profiling_settings()['KEEP']]:
+            shutil.rmtree(path, ignore_errors=True)
+        return directory
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'label': self.label,
+            'mode': self.mode,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'queries': len(self.queries) + self.dropped_queries,
+            'sql_ms': round(sum(query['ms'] for query in self.queries), 3),
+            **self.meta,
+        }
+
+
+@contextmanager
+def capture(label, mode=None):
+    """Profile the block; the ``ProfileSession`` is saved when it exits."""
+    session = ProfileSession(label, mode)
+    token = _current.set(session)
+    session.start()
+    try:
+        yield session
+    finally:
+        session.stop()
+        _current.reset(token)
+        session.save()
+
+
+def load_summary(profile_id):
+    """The stored summary of a capture, or None."""
+    if not profile_id.replace('-', '').isalnum():
+        return None
+    try:
+        return json.loads((profiles_path() / profile_id / 'meta.json').read_text())
+    except FileNotFoundError:
+        return None
+
+
+def list_summaries():
+    """Summaries of the stored captures, newest first."""
+    root = profiles_path()
+    if not root.is_dir():
+        return []
+    return [json.loads((path / 'meta.json').read_text())
+            for path in sorted(root.iterdir(), reverse=True) if (path / 'meta.json').exists()]
+
+
+class ProfilingMiddleware:
+    """Captures the requests described in the module docstring."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def requested(request):
+        return 'HTTP_X_PROFILE' in request.META or 'profile' in request.GET
+
+    @staticmethod
+    def from_staff(request):
+        """
+        Whether a staff user sent ``request``: Django's ``request.user``
+        only knows sessions, so the API's other authentication classes
+        (e.g. JWT) are asked too.
+        """
+        if request.user.is_staff:
+            return True
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            if issubclass(authentication_class, SessionAuthentication):
+                continue
+            try:
+                result = authentication_class().authenticate(Request(request))
+            except APIException:
+                continue
+            if result is not None:
+                return result[0].is_staff
+        return False
+
+    @staticmethod
+    def sampled():
+        return random.random() < get_profiling_settings()['SAMPLE_RATE']
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        config = get_profiling_settings()
+        if not config['ENABLED'] or not (
+                (self.requested(request) and self.from_staff(request)) or self.sampled()):
+            return self.get_response(request)
+        with capture(f"{request.method} {request.path}") as session:
+            response = self.get_response(request)
+            session.meta['status'] = response.status_code
+        response['X-Profile-Id'] = session.id
+        return response
+
+    async def __acall__(self, request):
+        config = get_profiling_settings()
+        if not config['ENABLED'] or not (
+                (self.requested(request) and await sync_to_async(self.from_staff)(request)) or self.sampled()):
+            return await self.get_response(request)
+        with capture(f"{request.method} {request.path}") as session:
+            response = await self.get_response(request)
+            session.meta['status'] = response.status_code
+        response['X-Profile-Id'] = session.id
+        return response
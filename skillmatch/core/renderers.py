@@ -0,0 +1,39 @@
+"""
+Renderers for the skillmatch app.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Renderer for views which stream pre-encoded content.
+
+    It exists so DRF's content negotiation (including ``?format=``) accepts
+    the format; payloads which do go through it, such as exception details,
+    are JSON-encoded.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, bytes):
+            return data
+        return json.dumps(data).encode(self.charset)
+
+
+class CSVRenderer(PassthroughRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(PassthroughRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class EventStreamRenderer(PassthroughRenderer):
+    media_type = 'text/event-stream'
+    format = 'event-stream'
@@ -0,0 +1,52 @@
+"""
+Full-text search expressions.
+
+Searchable models keep a stored, generated ``tsvector`` column (weighted
+``SearchVector`` expressions over their text fields) with a GIN index, so
+Postgres updates it on every write, bulk imports included, and searches are
+index lookups instead of ``ILIKE '%term%'`` scans.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Func, TextField, Value
+
+
+# Text search configuration: no stemming or stop words, which suit names
+# and skills better than a language dictionary
+SEARCH_CONFIG = 'simple'
+# Terms used from one query; later ones are ignored
+MAX_QUERY_TERMS = 10
+
+# Query terms: runs of these characters; tsquery operators and quotes split terms
+_TERM_RE = re.compile(r'[\w.+#@]+')
+
+
+class ArrayToText(Func):
+    """
+    Space-joined elements of an array column.
+
+    Calls ``skillmatch_array_to_text`` (migration 0009), an immutable
+    wrapper of ``array_to_string``, which Postgres marks stable and so
+    rejects in generated columns.
+    """
+    function = 'skillmatch_array_to_text'
+    output_field = TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, Value(' '), **extra)
+
+
+def prefix_query(text):
+    """
+    A ``SearchQuery`` matching documents with a word starting with each
+    word of ``text`` (``pyth dj`` finds "Python, Django"), or None if
+    ``text`` has no words.
+    """
+    terms = _TERM_RE.findall(text)
+    if not terms:
+        return None
+    # Quoted terms go through the same parser as the documents, so "node.js"
+    # stays one lexeme and "c++" becomes "c"
+    raw = ' & '.join(f"'{term}':*" for term in terms[:MAX_QUERY_TERMS])
+    return SearchQuery(raw, config=SEARCH_CONFIG, search_type='raw')
@@ -0,0 +1,82 @@
+"""
+Versioned on-disk artifacts.
+
+Each build writes a complete new version directory next to the previous
+ones and then atomically repoints a ``CURRENT`` file at it. Readers resolve
+``CURRENT`` once and keep using that version's files (typically through
+``numpy.load(..., mmap_mode='r')``), so a publish never exposes a
+half-written version and old memory maps stay valid until they are
+dropped.
+"""
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+
+POINTER = 'CURRENT'
+# Names given to versions by ``publish``; other entries (such as the trees of
+# tenants nested under the default tenant's path) are left alone. Versions
+# published before microseconds were added lack them
+VERSION_NAME = re.compile(r'\d{8}T\d{6}(\.\d{6})?-[0-9a-f]{8}')
+
+
+class VersionedDirectory:
+    """
+    A directory of immutable versions with an atomically swapped pointer.
+    """
+
+    def __init__(self, path, keep=3):
+        self.path = Path(path)
+        self.keep = keep
+
+    def current(self):
+        """Return the directory of the current version, or None."""
+        try:
+            version = (self.path / POINTER).read_text().strip()
+        except FileNotFoundError:
+            return None
+        directory = self.path / version
+        return directory if directory.is_dir() else None
+
+    def publish(self, write):
+        """
+        Call ``write(directory)`` to fill a new version, then make it current.
+
+        Returns the new version directory.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Microseconds keep versions published within a second in order
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(now))}.{int(now % 1 * 1e6):06d}"
+        version = f"{stamp}-{uuid.uuid4().hex[:8]}"
+        staging = self.path / f".tmp-{version}"
+        staging.mkdir()
+        try:
+            write(staging)
+            directory = self.path / version
+            os.replace(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = self.path / f".{POINTER}-{uuid.uuid4().hex[:8]}"
+        pointer.write_text(version)
+        os.replace(pointer, self.path / POINTER)
+        self.prune()
+        return directory
+
+    def prune(self):
+        """Delete all but the ``keep`` newest versions (never the current one)."""
+        current = self.current()
+        versions = sorted(
+            (entry for entry in self.path.iterdir() if entry.is_dir() and VERSION_NAME.fullmatch(entry.name)),
+            key=lambda entry: entry.name,
+            reverse=True,
+        )
+        for entry in versions[self.keep:]:
+            if entry != current:
+                # Open memory maps of removed files stay readable on POSIX
+                shutil.rmtree(entry, ignore_errors=True)
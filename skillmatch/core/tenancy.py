@@ -0,0 +1,196 @@
+"""
+Tenants: the client organizations sharing a deployment.
+
+A request acts for one tenant, found by ``resolve_tenant``: the tenant
+whose slug is in the ``X-Tenant`` header, else the user's only tenant,
+else none (the rows without a tenant, i.e. the deployment's own
+organization). Naming a tenant takes a logged in member of it, or a staff
+user; anonymous requests may only name tenants when ``ALLOW_ANONYMOUS`` is
+set, e.g. for a deployment behind an authenticating proxy.
+
+``TenantScopedMixin`` filters a viewset's queryset by that tenant and makes
+it the *current tenant* (``use_tenant``) while the view runs. The current
+tenant is what new rows are created for, which match index and snapshot
+matching uses, and, through ``TenantRouter``, which database is queried:
+tenants listed in ``DATABASES`` keep their rows in a database of their own,
+migrated like the default one (``manage.py migrate --database <alias>``),
+so their lists and matching runs only ever touch their own tables.
+
+Configured through ``settings.SKILLMATCH_TENANTS``.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied
+
+
+DEFAULTS = {
+    'HEADER': 'X-Tenant',
+    # Lets anonymous requests name any tenant, as long as the API allows them
+    'ALLOW_ANONYMOUS': False,
+    'DATABASES': {},  # tenant slug: database alias
+}
+
+# Models stored with their tenant's rows; the others (tenants, users,
+# sessions) stay in the default database
+TENANT_MODELS = {'cvupload', 'parsedcv', 'uploadsession', 'candidate', 'job', 'match', 'matchsummary', 'matchrun'}
+
+
+def get_tenant_settings():
+    """Return ``settings.SKILLMATCH_TENANTS`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_TENANTS', {})}
+
+
+_current = contextvars.ContextVar('skillmatch_tenant', default=None)
+
+
+def current_tenant():
+    """The ``Tenant`` the current request or run acts for, or None."""
+    return _current.get()
+
+
+@contextmanager
+def use_tenant(tenant):
+    """Make ``tenant`` (or None) the current tenant within the block."""
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
+
+
+def tenant_database(tenant):
+    """Alias of the database holding the rows of ``tenant``."""
+    if tenant is None:
+        return DEFAULT_DB_ALIAS
+    return get_tenant_settings()['DATABASES'].get(tenant.slug, DEFAULT_DB_ALIAS)
+
+
+def current_database():
+    """Alias of the current tenant's database, for raw SQL and transactions on its rows."""
+    return tenant_database(current_tenant())
+
+
+def database_tenants():
+    """
+    Return ``(alias, tenant)`` for every database holding tenant rows, where
+    ``use_tenant(tenant)`` routes queries to it: None for the default
+    database, else one of the tenants kept there. Maintenance covering all
+    rows runs once per database.
+    """
+    from ..models import Tenant
+
+    aliases = get_tenant_settings()['DATABASES']
+    tenants = {DEFAULT_DB_ALIAS: None}
+    for tenant in Tenant.objects.filter(slug__in=list(aliases)).order_by('slug'):
+        tenants.setdefault(aliases[tenant.slug], tenant)
+    return list(tenants.items())
+
+
+def tenant_filter(tenant):
+    """Lookup restricting a tenant-owned queryset to ``tenant``."""
+    return {'tenant_id': tenant.pk if tenant is not None else None}
+
+
+class TenantRouter:
+    """
+    Sends the queries of tenant-owned models to the current tenant's
+    database. Raw SQL and transactions on their tables use
+    ``current_database()``.
+    """
+
+    def _route(self, model, **hints):
+        if model._meta.app_label != 'skillmatch' or model._meta.model_name not in TENANT_MODELS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None:
+            if instance._meta.model_name == 'tenant':
+                # Rows assigned to a tenant are saved in its database
+                return tenant_database(instance)
+            if instance._meta.model_name in TENANT_MODELS and instance._state.db:
+                return instance._state.db
+        return tenant_database(current_tenant())
+
+    db_for_read = _route
+    db_for_write = _route
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Tenant-owned rows point at tenants in the default database
+        if 'tenant' in (obj1._meta.model_name, obj2._meta.model_name):
+            return True
+        return None
+
+    # Every database gets the whole schema: allow_migrate is left undecided
+
+
+def resolve_tenant(request):
+    """
+    Return the tenant ``request`` acts for, or None; raises
+    ``NotAuthenticated`` for anonymous requests naming a tenant, ``NotFound``
+    for unknown tenants and ``PermissionDenied`` for tenants the user may
+    not act for.
+    """
+    from ..models import Tenant
+
+    config = get_tenant_settings()
+    slug = request.headers.get(config['HEADER'])
+    user = request.user
+    if not slug:
+        if not user.is_authenticated or user.is_staff:
+            return None
+        tenants = list(user.tenants.all()[:2])
+        if len(tenants) > 1:
+            raise PermissionDenied(f"Name the tenant to act for in the {config['HEADER']} header.")
+        return tenants[0] if tenants else None
+
+    # Before the lookup, so anonymous clients cannot probe for tenant slugs
+    if not user.is_authenticated and not config['ALLOW_ANONYMOUS']:
+        raise NotAuthenticated(f"Log in to act for tenant '{slug}'.")
+    tenant = Tenant.objects.filter(slug=slug).first()
+    if tenant is None:
+        raise NotFound(f"Unknown tenant '{slug}'.")
+    if user.is_authenticated and not user.is_staff and not tenant.members.filter(pk=user.pk).exists():
+        raise PermissionDenied(f"You are not a member of tenant '{slug}'.")
+    return tenant
+
+
+class TenantScopedMixin:
+    """
+    Viewset mixin acting for the request's tenant (``request.tenant``): the
+    queryset is filtered by it and it is the current tenant while the view
+    runs, including its ``sync_to_async`` calls. Place it first in the
+    bases, so the response cache keys include the tenant too.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # After authentication, which resolving relies on
+        request.tenant = resolve_tenant(request)
+        self._tenant_token = _current.set(request.tenant)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._tenant_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._tenant_token is not None:
+                _current.reset(self._tenant_token)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, [get_tenant_settings()['HEADER']])
+        return response
+
+    def scoped(self, queryset):
+        """``queryset`` of a tenant-owned model, restricted to the request's tenant."""
+        return queryset.filter(**tenant_filter(getattr(self.request, 'tenant', None)))
+
+    def get_queryset(self):
+        return self.scoped(super().get_queryset())
+
+    def get_cache_key_extra(self, request):
+        tenant = getattr(request, 'tenant', None)
+        return f"{super().get_cache_key_extra(request)}|tenant:{tenant.pk if tenant is not None else ''}"
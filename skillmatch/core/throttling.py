@@ -0,0 +1,193 @@
+"""
+Per-client rate limiting and admission control for expensive endpoints.
+
+Two layers, both keyed by a request's *scope*, ``<basename>-<url_name>``
+as in ``reverse()`` (e.g. ``match-match-candidates``, ``cvupload-parse``):
+
+* ``TokenBucketThrottle`` (a DRF throttle) gives every client, the user or
+  else the IP address, a token bucket per configured bucket name. A scope
+  listed in ``COSTS`` spends its cost from one bucket, per item for batch
+  actions (see ``get_throttle_units``); an empty bucket answers 429 with
+  ``Retry-After`` set to when enough tokens will be back. Buckets live in
+  a Django cache shared by the worker processes.
+* ``AdmissionControlMixin`` caps the requests of a scope running at once in
+  a worker process (``MAX_IN_FLIGHT``). Requests over the cap get a 503 at
+  once, with ``Retry-After`` from the scope's recent duration, instead of
+  queueing behind work that is already too slow.
+
+Configured through ``settings.SKILLMATCH_THROTTLING``.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'skillmatch:throttle',
+    'BUCKETS': {},  # name: {'BURST': tokens, 'RATE': tokens refilled per second}
+    'COSTS': {},  # scope: (bucket name, tokens per request or item)
+    'MAX_IN_FLIGHT': {},  # scope: concurrent requests per process
+}
+
+# Weight of the latest request in a scope's average duration
+DURATION_SMOOTHING = 0.2
+
+
+def get_throttle_settings():
+    """Return ``settings.SKILLMATCH_THROTTLING`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_THROTTLING', {})}
+
+
+def view_scope(view):
+    """Scope of the request a viewset is handling, or None outside viewsets."""
+    basename, action = getattr(view, 'basename', None), getattr(view, 'action', None)
+    if not basename or not action:
+        return None
+    url_name = getattr(getattr(view, action, None), 'url_name', action)
+    return f"{basename}-{url_name}"
+
+
+class TokenBuckets:
+    """
+    Token buckets stored in a Django cache as ``(tokens, updated_at)``.
+
+    Updates are read-modify-write, serialized within a process; requests
+    racing in two processes can both spend the same tokens, so a client can
+    exceed its burst by at most one request per process.
+    """
+
+    def __init__(self, cache, prefix='skillmatch:throttle'):
+        self.cache = cache
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def take(self, key, cost, burst, rate, now=None):
+        """
+        Spend ``cost`` tokens of bucket ``key`` if it has them; returns 0,
+        or the seconds until it will. A cost above ``burst`` needs a full
+        bucket.
+        """
+        now = time.time() if now is None else now
+        cost = min(cost, burst)
+        full_key = f"{self.prefix}:{key}"
+        with self._lock:
+            tokens, updated_at = self.cache.get(full_key) or (burst, now)
+            tokens = min(burst, tokens + max(now - updated_at, 0) * rate)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            # An idle bucket is full again after burst / rate seconds
+            self.cache.set(full_key, (tokens - cost, now), timeout=math.ceil(burst / rate) + 1)
+            return 0.0
+
+
+def get_token_buckets():
+    config = get_throttle_settings()
+    return TokenBuckets(caches[config['CACHE_ALIAS']], config['KEY_PREFIX'])
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Charges the cost of the request's scope to the client's bucket. Views
+    may define ``get_throttle_units(request)``, the number of items a batch
+    request carries (default 1).
+    """
+
+    def allow_request(self, request, view):
+        self._wait = None
+        config = get_throttle_settings()
+        scope = view_scope(view)
+        if not config['ENABLED'] or scope not in config['COSTS']:
+            return True
+        bucket, cost = config['COSTS'][scope]
+        limits = config['BUCKETS'][bucket]
+        if hasattr(view, 'get_throttle_units'):
+            cost *= max(view.get_throttle_units(request), 1)
+
+        user = getattr(request, 'user', None)
+        client = f"user:{user.pk}" if user is not None and user.is_authenticated else f"ip:{self.get_ident(request)}"
+        wait = get_token_buckets().take(f"{bucket}:{client}", cost, limits['BURST'], limits['RATE'])
+        if wait:
+            self._wait = wait
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The server is busy; retry later."
+    default_code = 'overloaded'
+
+    def __init__(self, detail=None, wait=None):
+        super().__init__(detail)
+        # The exception handler sends ``wait`` as Retry-After
+        self.wait = math.ceil(wait) if wait is not None else None
+
+
+class AdmissionControl:
+    """Counts the requests running per scope in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = {}
+        self._durations = {}
+
+    def enter(self, scope, limit):
+        """Admit a request of ``scope``, or raise ``Overloaded`` when ``limit`` are running."""
+        with self._lock:
+            running = self._running.get(scope, 0)
+            if running >= limit:
+                wait = max(self._durations.get(scope, 1.0), 1.0)
+                raise Overloaded(f"Too many {scope} requests in progress; retry later.", wait=wait)
+            self._running[scope] = running + 1
+
+    def exit(self, scope, duration):
+        with self._lock:
+            self._running[scope] -= 1
+            average = self._durations.get(scope)
+            self._durations[scope] = duration if average is None else (
+                average + DURATION_SMOOTHING * (duration - average))
+
+    def running(self, scope):
+        with self._lock:
+            return self._running.get(scope, 0)
+
+
+admission = AdmissionControl()
+
+
+class AdmissionControlMixin:
+    """
+    Viewset mixin applying ``MAX_IN_FLIGHT`` to its actions. Admission is
+    decided after authentication, permissions and throttles, so rejected
+    requests do not take a slot.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self._admitted = None
+        super().initial(request, *args, **kwargs)
+        config = get_throttle_settings()
+        scope = view_scope(self)
+        if config['ENABLED'] and scope in config['MAX_IN_FLIGHT']:
+            admission.enter(scope, config['MAX_IN_FLIGHT'][scope])
+            self._admitted = (scope, time.monotonic())
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Also reached when the view raises an unhandled exception
+            admitted, self._admitted = getattr(self, '_admitted', None), None
+            if admitted is not None:
+                scope, started = admitted
+                admission.exit(scope, time.monotonic() - started)
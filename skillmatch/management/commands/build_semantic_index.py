@@ -0,0 +1,52 @@
+"""
+Build the semantic skill index used by semantic matching, for one tenant
+(--tenant) or for the rows without a tenant and every tenant.
+
+Examples:
+    python manage.py build_semantic_index
+    python manage.py build_semantic_index --lists 1024
+    python manage.py build_semantic_index --tenant acme
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from skillmatch.core import use_tenant
+from skillmatch.models import Tenant
+from skillmatch.services import semantic
+
+
+class Command(BaseCommand):
+    help = "Embed skills and candidates and publish a new memory-mapped IVF index version per tenant."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, help="IVF lists (default: sqrt of the candidate count)")
+        parser.add_argument('--dimensions', type=int, help="Vector dimensions")
+        parser.add_argument('--tenant', help="Slug of the only tenant to index")
+
+    def handle(self, *args, **options):
+        config = semantic.get_semantic_settings()
+        if options['lists']:
+            config['LISTS'] = options['lists']
+        if options['dimensions']:
+            config['DIMENSIONS'] = options['dimensions']
+
+        if options['tenant']:
+            tenants = list(Tenant.objects.filter(slug=options['tenant']))
+            if not tenants:
+                raise CommandError(f"Unknown tenant '{options['tenant']}'.")
+        else:
+            tenants = [None, *Tenant.objects.order_by('slug')]
+
+        for tenant in tenants:
+            started = time.monotonic()
+            with use_tenant(tenant):
+                directory = semantic.build_semantic_index(config)
+            elapsed = time.monotonic() - started
+
+            meta = json.loads((directory / 'meta.json').read_text())
+            self.stdout.write(json.dumps({'tenant': tenant.slug if tenant is not None else None, **meta}))
+            self.stdout.write(f"Published {directory} in {elapsed:.2f}s")
+        if not config['ENABLED']:
+            self.stdout.write("Semantic matching is disabled; set SKILLMATCH_SEMANTIC['ENABLED'] to use it.")
@@ -0,0 +1,89 @@
+"""
+Run a load test against the ASGI application.
+
+Examples:
+    python manage.py loadtest --rps 500 --duration 30
+    python manage.py loadtest --cv-upload-id 1 --scenarios scenarios.json
+    python manage.py loadtest --mode blocking --threshold-ms 20
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from skillmatch.services import loadtest
+
+
+class Command(BaseCommand):
+    help = "Run weighted request scenarios against the ASGI app and report latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', help="JSON file with scenario definitions")
+        parser.add_argument('--mode', choices=['throughput', 'blocking'], default='throughput')
+        parser.add_argument('--rps', type=float, default=50.0, help="Offered requests per second")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per run")
+        parser.add_argument('--concurrency', type=int, default=100, help="Max in-flight requests")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+        parser.add_argument('--threshold-ms', type=float, default=50.0,
+                            help="Loop lag (p99) above which an endpoint is flagged as blocking")
+        parser.add_argument('--seed', type=int, help="Seed for scenario selection")
+        parser.add_argument('--cv-upload-id', type=int, help="CV upload used by the parse scenario")
+        parser.add_argument('--url', help="Target an already running server instead of starting uvicorn")
+        parser.add_argument('--app', default='skillbridge.asgi:application', help="ASGI app to serve")
+        parser.add_argument('--json', action='store_true', help="Print the raw JSON report")
+
+    def handle(self, *args, **options):
+        if options['mode'] == 'blocking' and options['url']:
+            raise CommandError("Blocking mode needs the in-process server; drop --url.")
+        if options['rps'] <= 0:
+            raise CommandError("--rps must be positive.")
+
+        context = {}
+        if options['cv_upload_id'] is not None:
+            context['cv_upload_id'] = options['cv_upload_id']
+        scenarios = loadtest.load_scenarios(options['scenarios'], **context)
+        if not scenarios:
+            raise CommandError("No runnable scenarios.")
+
+        run_options = {
+            'rps': options['rps'],
+            'duration': options['duration'],
+            'concurrency': options['concurrency'],
+            'timeout': options['timeout'],
+            'seed': options['seed'],
+        }
+        if options['mode'] == 'blocking':
+            run_options['threshold_ms'] = options['threshold_ms']
+
+        report = loadtest.run(
+            scenarios, mode=options['mode'], base_url=options['url'],
+            app_path=options['app'], **run_options
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self._print_report(report, options['mode'])
+
+    def _print_report(self, report, mode):
+        header = f"{'scenario':<20} {'reqs':>7} {'err':>5} {'drop':>5} {'rps':>8} " \
+                 f"{'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+        if mode == 'blocking':
+            baseline = report['baseline']
+            self.stdout.write(f"Idle loop lag p99: {baseline['loop_lag_p99_ms']} ms")
+            header += f" {'lag p99':>8}  blocking"
+        self.stdout.write(header)
+
+        rows = dict(report['scenarios'])
+        if 'total' in report:
+            rows['total'] = report['total']
+        for name, row in rows.items():
+            line = f"{name:<20} {row['requests']:>7} {row['errors']:>5} {row['dropped']:>5} " \
+                   f"{row['throughput_rps']:>8} {_ms(row['p50_ms'])} {_ms(row['p90_ms'])} " \
+                   f"{_ms(row['p99_ms'])} {_ms(row['max_ms'])}"
+            if mode == 'blocking':
+                line += f" {_ms(row['loop_lag_p99_ms'])}  {'YES' if row['blocks_event_loop'] else 'no'}"
+            self.stdout.write(line)
+
+
+def _ms(value):
+    return f"{value:>8}" if value is not None else f"{'-':>8}"
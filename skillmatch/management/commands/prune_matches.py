@@ -0,0 +1,38 @@
+"""
+Delete matches of inactive candidates and jobs, and matches outside the
+retention policy (SKILLMATCH_RETENTION), in small batches, in the default
+database and every tenant database.
+
+Examples:
+    python manage.py prune_matches
+    python manage.py prune_matches --batch-size 1000 --pause 0.1
+    python manage.py prune_matches --interval 600   # keep pruning every 10 minutes
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from skillmatch.core.tenancy import database_tenants, use_tenant
+from skillmatch.services import retention
+
+
+class Command(BaseCommand):
+    help = "Prune stale and low-value matches in batches without long locks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Rows deleted per statement")
+        parser.add_argument('--pause', type=float, help="Seconds to sleep between batches")
+        parser.add_argument('--interval', type=float,
+                            help="Run again every this many seconds instead of exiting")
+
+    def handle(self, *args, **options):
+        while True:
+            for alias, tenant in database_tenants():
+                started = time.monotonic()
+                with use_tenant(tenant):
+                    counts = retention.prune_matches(batch_size=options['batch_size'], pause=options['pause'])
+                self.stdout.write(f"{alias}: {json.dumps(counts)} in {time.monotonic() - started:.2f}s")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
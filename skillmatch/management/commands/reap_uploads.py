@@ -0,0 +1,36 @@
+"""
+Delete resumable upload sessions idle for longer than
+SKILLMATCH_UPLOADS["EXPIRE_AFTER"], with the partial files of unfinished ones,
+in the default database and every tenant database.
+
+Examples:
+    python manage.py reap_uploads
+    python manage.py reap_uploads --expire-after 3600
+    python manage.py reap_uploads --interval 900   # keep reaping every 15 minutes
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from skillmatch.core.tenancy import database_tenants, use_tenant
+from skillmatch.services import uploads
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned chunked uploads and their partial files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expire-after', type=float, help="Seconds of inactivity before a session is reaped")
+        parser.add_argument('--interval', type=float,
+                            help="Run again every this many seconds instead of exiting")
+
+    def handle(self, *args, **options):
+        while True:
+            for alias, tenant in database_tenants():
+                with use_tenant(tenant):
+                    counts = uploads.reap_uploads(options['expire_after'])
+                self.stdout.write(f"{alias}: {json.dumps(counts)}")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
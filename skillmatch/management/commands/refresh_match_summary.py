@@ -0,0 +1,33 @@
+"""
+Fill or repair the denormalized match summary table, in the default
+database and every tenant database.
+
+Run once after enabling SKILLMATCH_SUMMARY; afterwards the table is kept up
+to date by matching runs, match saves and renames.
+
+Examples:
+    python manage.py refresh_match_summary
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from skillmatch.core import invalidate_models
+from skillmatch.core.tenancy import current_database, database_tenants, use_tenant
+from skillmatch.models import Match
+from skillmatch.services import summary
+
+
+class Command(BaseCommand):
+    help = "Copy all matches with candidate names and job titles into the match summary table."
+
+    def handle(self, *args, **options):
+        for alias, tenant in database_tenants():
+            started = time.monotonic()
+            with use_tenant(tenant), transaction.atomic(using=current_database()):
+                written = summary.refresh_summary()
+            self.stdout.write(f"{alias}: wrote {written} summary rows in {time.monotonic() - started:.2f}s")
+        invalidate_models(Match)
+        if not summary.summary_enabled():
+            self.stdout.write("The summary is disabled; set SKILLMATCH_SUMMARY['ENABLED'] to maintain and use it.")
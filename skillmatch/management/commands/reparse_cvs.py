@@ -0,0 +1,38 @@
+"""
+Rerun structured extraction on the stored text of CVs parsed by an older
+parser version, updating their candidates, without re-extracting files, in
+the default database and every tenant database.
+
+Examples:
+    python manage.py reparse_cvs
+    python manage.py reparse_cvs --batch-size 200 --limit 10000
+    python manage.py reparse_cvs --force   # every stored CV, whatever its version
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from skillmatch.core.tenancy import database_tenants, use_tenant
+from skillmatch.services import parsed_cvs
+
+
+class Command(BaseCommand):
+    help = "Reparse stored CV text with the current parser version."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="CVs per transaction")
+        parser.add_argument('--limit', type=int, help="Stop after this many CVs")
+        parser.add_argument('--force', action='store_true', help="Reparse CVs already at the current version")
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        for alias, tenant in database_tenants():
+            if limit is not None and limit <= 0:
+                break
+            started = time.monotonic()
+            with use_tenant(tenant):
+                counts = parsed_cvs.reparse(batch_size=options['batch_size'], force=options['force'], limit=limit)
+            if limit is not None:
+                limit -= counts['reparsed']
+            self.stdout.write(f"{alias}: {json.dumps(counts)} in {time.monotonic() - started:.2f}s")
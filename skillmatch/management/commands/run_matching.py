@@ -0,0 +1,70 @@
+"""
+Match all active candidates to all active jobs as a resumable run, for
+one tenant (--tenant) or for the rows without a tenant.
+
+An unfinished run (failed or interrupted) is resumed after its last
+committed candidate shard unless --restart is given.
+
+Examples:
+    python manage.py run_matching
+    python manage.py run_matching --shard-size 5000
+    python manage.py run_matching --restart
+    python manage.py run_matching --tenant acme
+    python manage.py run_matching --profile cprofile
+"""
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from skillmatch.core import profiling
+from skillmatch.models import Tenant
+from skillmatch.services import match_runs
+
+
+class Command(BaseCommand):
+    help = "Score all active candidate-job pairs in checkpointed shards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard-size', type=int, default=match_runs.DEFAULT_SHARD_SIZE,
+                            help="Candidates per committed shard")
+        parser.add_argument('--restart', action='store_true',
+                            help="Cancel the unfinished run instead of resuming it")
+        parser.add_argument('--tenant', help="Slug of the tenant to match")
+        parser.add_argument('--profile', nargs='?', const='sample', choices=sorted(profiling.PROFILE_FILES),
+                            help="Profile the run and its SQL (default mode: sample)")
+
+    def handle(self, *args, **options):
+        def progress(run):
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f"Run {run.pk}: shard {run.shards_completed} done, "
+                    f"up to candidate {run.last_candidate_id}")
+
+        tenant = None
+        if options['tenant']:
+            tenant = Tenant.objects.filter(slug=options['tenant']).first()
+            if tenant is None:
+                raise CommandError(f"Unknown tenant '{options['tenant']}'.")
+
+        mode = options['profile']
+        profiled = profiling.capture('run_matching', mode) if mode else nullcontext()
+        try:
+            with profiled as session:
+                run, resumed = match_runs.run_matching(
+                    shard_size=options['shard_size'], restart=options['restart'], on_shard=progress,
+                    tenant=tenant)
+        except match_runs.RunInProgress as e:
+            raise CommandError(str(e))
+
+        verb = "Resumed" if resumed else "Completed"
+        self.stdout.write(
+            f"{verb} run {run.pk}: {run.pairs_scored} pairs in {run.shards_completed} shards, "
+            f"{run.matches_created} created, {run.matches_updated} updated "
+            f"in {run.duration_seconds:.2f}s")
+        if run.snapshot:
+            self.stdout.write(f"Published snapshot {run.snapshot}")
+        if session is not None:
+            summary = session.summary()
+            self.stdout.write(
+                f"Profile {session.id}: {summary['queries']} queries in {summary['sql_ms']:.0f}ms, "
+                f"saved to {profiling.profiles_path() / session.id}")
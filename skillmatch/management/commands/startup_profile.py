@@ -0,0 +1,45 @@
+"""
+Report the import-time cost of starting a worker: importing the ASGI
+application and loading the URLconf, per module and per package.
+
+Examples:
+    python manage.py startup_profile
+    python manage.py startup_profile --limit 40 --packages 10
+    python manage.py startup_profile --app skillbridge.wsgi:application --json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from skillmatch.services import startup
+
+
+class Command(BaseCommand):
+    help = "Profile the imports done by a cold worker start."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', default='skillbridge.asgi:application', help="Application to import")
+        parser.add_argument('--limit', type=int, default=20, help="Slowest modules listed")
+        parser.add_argument('--packages', type=int, default=15, help="Top-level packages listed")
+        parser.add_argument('--json', action='store_true', help="Print the raw JSON report")
+
+    def handle(self, *args, **options):
+        try:
+            report = startup.profile_startup(options['app'], limit=options['limit'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"App import: {report['app_ms']} ms, URLconf: {report['urls_ms']} ms, "
+            f"{report['modules_loaded']} modules ({report['import_ms']} ms importing)"
+        )
+        self.stdout.write(f"\n{'package':<32} {'modules':>7} {'self ms':>9}")
+        for row in report['packages'][:options['packages']]:
+            self.stdout.write(f"{row['package']:<32} {row['modules']:>7} {row['self_ms']:>9}")
+        self.stdout.write(f"\n{'module':<48} {'self ms':>9} {'cumul. ms':>9}")
+        for row in report['slowest']:
+            self.stdout.write(f"{row['module']:<48} {row['self_ms']:>9} {row['cumulative_ms']:>9}")
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="candidate",
+            name="external_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifier in the source system (ATS) used for bulk imports",
+                max_length=100,
+                null=True,
+                unique=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="external_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifier in the source system (ATS) used for bulk imports",
+                max_length=100,
+                null=True,
+                unique=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="candidate",
+            name="source_cv",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="skillmatch.cvupload",
+            ),
+        ),
+    ]
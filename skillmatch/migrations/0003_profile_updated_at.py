@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0002_bulk_import_external_ids"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="candidate",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:09
+
+import django.contrib.postgres.fields
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0003_profile_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="min_experience_years",
+            field=models.IntegerField(
+                default=0, validators=[django.core.validators.MinValueValidator(0)]
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="nice_to_have",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=100),
+                blank=True,
+                default=list,
+                size=None,
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="skill_weights",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text='Relative weight per skill, e.g. {"Python": 2}; unlisted skills weigh 1',
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:21
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0004_job_scoring_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MatchRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        default="running",
+                        max_length=10,
+                    ),
+                ),
+                ("shard_size", models.PositiveIntegerField(default=1000)),
+                (
+                    "job_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), default=list, size=None
+                    ),
+                ),
+                (
+                    "last_candidate_id",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Candidates up to this id have been matched and committed",
+                        null=True,
+                    ),
+                ),
+                ("shards_completed", models.PositiveIntegerField(default=0)),
+                ("pairs_scored", models.BigIntegerField(default=0)),
+                ("matches_created", models.BigIntegerField(default=0)),
+                ("matches_updated", models.BigIntegerField(default=0)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("duration_seconds", models.FloatField(default=0.0)),
+                ("error", models.TextField(blank=True)),
+                ("snapshot", models.CharField(blank=True, max_length=64)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-started_at"],
+            },
+        ),
+    ]
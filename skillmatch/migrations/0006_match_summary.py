@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0005_match_run"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MatchSummary",
+            fields=[
+                (
+                    "match",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="skillmatch.match",
+                    ),
+                ),
+                ("candidate_id", models.BigIntegerField()),
+                ("job_id", models.BigIntegerField()),
+                ("candidate_name", models.CharField(max_length=200)),
+                ("job_title", models.CharField(max_length=200)),
+                ("score", models.FloatField()),
+                ("matched_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-score", "match"],
+                        include=("candidate_name", "job_title", "matched_at"),
+                        name="match_summary_score_idx",
+                    ),
+                    models.Index(
+                        fields=["job_id", "-score", "match"],
+                        include=("candidate_name", "job_title", "matched_at"),
+                        name="match_summary_job_score_idx",
+                    ),
+                    models.Index(
+                        fields=["candidate_id"], name="match_summary_candidate_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,127 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Rebuild skillmatch_match as a table partitioned by HASH (job_id) into a
+# fixed number of partitions: queries filtered by job touch one partition,
+# the others scan PARTITIONS tables however many jobs there are, and jobs
+# come and go without DDL. Partitioned tables need the partition key in
+# every unique index, so the primary key becomes (id, job_id); ids still
+# come from one sequence and stay unique. (candidate_id, job_id) already
+# contains it, so unique_together is kept.
+
+# Frozen: this is the layout the migration creates, whatever
+# skillmatch.services.partitions.PARTITIONS (which describes it) says later;
+# changing the count takes a new migration rebuilding the table.
+PARTITIONS = 16
+
+PARTITION_MATCH = f"""
+CREATE TABLE skillmatch_match_partitioned (
+    id bigint NOT NULL,
+    score double precision NOT NULL,
+    rationale text NOT NULL,
+    matched_at timestamp with time zone NOT NULL,
+    candidate_id bigint NOT NULL,
+    job_id bigint NOT NULL
+) PARTITION BY HASH (job_id);
+
+DO $$
+BEGIN
+    FOR remainder IN 0..{PARTITIONS - 1} LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF skillmatch_match_partitioned FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER %s)',
+            'skillmatch_match_p' || remainder, remainder
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO skillmatch_match_partitioned (id, score, rationale, matched_at, candidate_id, job_id)
+SELECT id, score, rationale, matched_at, candidate_id, job_id FROM skillmatch_match;
+
+DROP TABLE skillmatch_match;
+ALTER TABLE skillmatch_match_partitioned RENAME TO skillmatch_match;
+
+-- Identity columns on partitioned tables need PostgreSQL 17
+CREATE SEQUENCE skillmatch_match_id_seq OWNED BY skillmatch_match.id;
+ALTER TABLE skillmatch_match ALTER COLUMN id SET DEFAULT nextval('skillmatch_match_id_seq');
+SELECT setval('skillmatch_match_id_seq', COALESCE(max(id), 0) + 1, false) FROM skillmatch_match;
+
+ALTER TABLE skillmatch_match ADD CONSTRAINT skillmatch_match_pkey PRIMARY KEY (id, job_id);
+ALTER TABLE skillmatch_match
+    ADD CONSTRAINT skillmatch_match_candidate_id_job_id_9183e5cb_uniq UNIQUE (candidate_id, job_id);
+ALTER TABLE skillmatch_match
+    ADD CONSTRAINT skillmatch_match_candidate_id_a8ab7307_fk_skillmatc
+    FOREIGN KEY (candidate_id) REFERENCES skillmatch_candidate (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE skillmatch_match
+    ADD CONSTRAINT skillmatch_match_job_id_61932c23_fk_skillmatch_job_id
+    FOREIGN KEY (job_id) REFERENCES skillmatch_job (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX skillmatch_match_candidate_id_a8ab7307 ON skillmatch_match (candidate_id);
+-- Also serves lookups by job_id alone
+CREATE INDEX skillmatch_match_job_score_idx ON skillmatch_match (job_id, score DESC);
+"""
+
+UNPARTITION_MATCH = """
+CREATE TABLE skillmatch_match_unpartitioned (
+    id bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    score double precision NOT NULL,
+    rationale text NOT NULL,
+    matched_at timestamp with time zone NOT NULL,
+    candidate_id bigint NOT NULL,
+    job_id bigint NOT NULL
+);
+
+INSERT INTO skillmatch_match_unpartitioned (id, score, rationale, matched_at, candidate_id, job_id)
+SELECT id, score, rationale, matched_at, candidate_id, job_id FROM skillmatch_match;
+
+DROP TABLE skillmatch_match CASCADE;
+ALTER TABLE skillmatch_match_unpartitioned RENAME TO skillmatch_match;
+ALTER INDEX skillmatch_match_unpartitioned_pkey RENAME TO skillmatch_match_pkey;
+ALTER SEQUENCE skillmatch_match_unpartitioned_id_seq RENAME TO skillmatch_match_id_seq;
+SELECT setval('skillmatch_match_id_seq', COALESCE(max(id), 0) + 1, false) FROM skillmatch_match;
+
+ALTER TABLE skillmatch_match
+    ADD CONSTRAINT skillmatch_match_candidate_id_job_id_9183e5cb_uniq UNIQUE (candidate_id, job_id);
+ALTER TABLE skillmatch_match
+    ADD CONSTRAINT skillmatch_match_candidate_id_a8ab7307_fk_skillmatc
+    FOREIGN KEY (candidate_id) REFERENCES skillmatch_candidate (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE skillmatch_match
+    ADD CONSTRAINT skillmatch_match_job_id_61932c23_fk_skillmatch_job_id
+    FOREIGN KEY (job_id) REFERENCES skillmatch_job (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX skillmatch_match_candidate_id_a8ab7307 ON skillmatch_match (candidate_id);
+CREATE INDEX skillmatch_match_job_id_61932c23 ON skillmatch_match (job_id);
+CREATE INDEX skillmatch_match_job_score_idx ON skillmatch_match (job_id, score DESC);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0006_match_summary"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="matchsummary",
+            name="match",
+            field=models.OneToOneField(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                primary_key=True,
+                related_name="summary",
+                serialize=False,
+                to="skillmatch.match",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(PARTITION_MATCH, UNPARTITION_MATCH),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="match",
+                    index=models.Index(
+                        fields=["job", "-score"], name="skillmatch_match_job_score_idx"
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0007_partition_match"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="matchrun",
+            name="matches_deleted",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:39
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import skillmatch.core.search
+from django.db import migrations, models
+
+# array_to_string is stable (its result depends on the element type's output
+# function), so generated columns cannot call it; for text arrays it is
+# immutable in practice. Adding the stored columns rewrites both tables.
+ARRAY_TO_TEXT = """
+CREATE FUNCTION skillmatch_array_to_text(text[], text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT array_to_string($1, $2) $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0008_match_run_deleted"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ARRAY_TO_TEXT, "DROP FUNCTION skillmatch_array_to_text(text[], text);"
+        ),
+        migrations.AddField(
+            model_name="candidate",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "name", config="simple", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        skillmatch.core.search.ArrayToText("skills"),
+                        config="simple",
+                        weight="B",
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "title", config="simple", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        skillmatch.core.search.ArrayToText("requirements"),
+                        config="simple",
+                        weight="B",
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="candidate",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="candidate_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="job_search_idx"
+            ),
+        ),
+    ]
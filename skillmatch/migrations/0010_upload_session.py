@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:44
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0009_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("filename", models.CharField(max_length=200)),
+                ("file", models.FileField(upload_to="cvs/")),
+                ("length", models.BigIntegerField(help_text="Total size in bytes")),
+                (
+                    "offset",
+                    models.BigIntegerField(
+                        default=0, help_text="Bytes received so far"
+                    ),
+                ),
+                ("expected_sha256", models.CharField(blank=True, max_length=64)),
+                ("sha256", models.CharField(blank=True, max_length=64)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "cv_upload",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="upload_session",
+                        to="skillmatch.cvupload",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["updated_at"], name="upload_session_updated_idx"
+                    )
+                ],
+            },
+        ),
+    ]
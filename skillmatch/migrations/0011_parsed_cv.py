@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0010_upload_session"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParsedCV",
+            fields=[
+                (
+                    "cv_upload",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="parsed",
+                        serialize=False,
+                        to="skillmatch.cvupload",
+                    ),
+                ),
+                ("text", models.BinaryField()),
+                (
+                    "text_length",
+                    models.PositiveIntegerField(
+                        help_text="Characters of extracted text"
+                    ),
+                ),
+                (
+                    "fields",
+                    models.JSONField(
+                        default=dict, help_text="Structured fields from the last parse"
+                    ),
+                ),
+                ("extractor_version", models.PositiveSmallIntegerField()),
+                ("parser_version", models.PositiveSmallIntegerField()),
+                ("extracted_at", models.DateTimeField()),
+                ("parsed_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["parser_version"], name="parsed_cv_parser_version_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0011_parsed_cv"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="candidate",
+            index=models.Index(fields=["status", "-id"], name="candidate_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["status", "-id"], name="job_status_idx"),
+        ),
+    ]
@@ -0,0 +1,223 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skillmatch", "0012_status_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tenant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "slug",
+                    models.SlugField(
+                        help_text="Sent in the X-Tenant header", unique=True
+                    ),
+                ),
+                ("name", models.CharField(max_length=200)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="matchsummary",
+            name="match_summary_score_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="matchsummary",
+            name="match_summary_job_score_idx",
+        ),
+        migrations.AddField(
+            model_name="matchsummary",
+            name="tenant_id",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="candidate",
+            name="external_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifier in the source system (ATS) used for bulk imports; unique per tenant",
+                max_length=100,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="external_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifier in the source system (ATS) used for bulk imports; unique per tenant",
+                max_length=100,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="matchsummary",
+            index=models.Index(
+                fields=["tenant_id", "-score", "match"],
+                include=("candidate_name", "job_title", "matched_at"),
+                name="match_summary_tenant_score_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="matchsummary",
+            index=models.Index(
+                fields=["job_id", "-score", "match"],
+                include=("candidate_name", "job_title", "matched_at", "tenant_id"),
+                name="match_summary_job_score_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tenant",
+            name="members",
+            field=models.ManyToManyField(
+                blank=True, related_name="tenants", to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AddField(
+            model_name="candidate",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="skillmatch.tenant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="cvupload",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="skillmatch.tenant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="skillmatch.tenant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="match",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="skillmatch.tenant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="matchrun",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="skillmatch.tenant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="skillmatch.tenant",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="candidate",
+            index=models.Index(
+                fields=["tenant", "-parsed_at"], name="candidate_tenant_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="candidate",
+            index=models.Index(
+                fields=["tenant", "updated_at"], name="candidate_tenant_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cvupload",
+            index=models.Index(
+                fields=["tenant", "-uploaded_at"], name="cv_upload_tenant_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["tenant", "-created_at"], name="job_tenant_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["tenant", "updated_at"], name="job_tenant_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["tenant", "-score"], name="match_tenant_score_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="candidate",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("external_id__isnull", False)),
+                fields=("tenant", "external_id"),
+                name="candidate_tenant_external_id_uniq",
+                nulls_distinct=False,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="job",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("external_id__isnull", False)),
+                fields=("tenant", "external_id"),
+                name="job_tenant_external_id_uniq",
+                nulls_distinct=False,
+            ),
+        ),
+    ]
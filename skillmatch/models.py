@@ -1,8 +1,16 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 
+from .core.search import SEARCH_CONFIG, ArrayToText
+
 
 class StatusBase(models.Model):
     """
@@ -24,41 +32,196 @@ class StatusBase(models.Model):
         abstract = True  # Mark as abstract so no DB table is created
 
 
+class Tenant(models.Model):
+    """
+    A client organization. Its CVs, candidates, jobs and matches are only
+    visible to requests for it and are matched among themselves; see
+    ``skillmatch.core.tenancy``. Rows without a tenant belong to the
+    deployment's own organization.
+    """
+    slug = models.SlugField(max_length=50, unique=True, help_text=_('Sent in the X-Tenant header'))
+    name = models.CharField(max_length=200)
+    members = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='tenants')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.slug
+
+
+def tenant_field():
+    # No database constraint: a tenant's rows may live in another database
+    # than the tenant table (see TenantRouter). Not indexed on its own, the
+    # composite indexes below lead with it.
+    return models.ForeignKey(
+        Tenant, on_delete=models.PROTECT, null=True, blank=True, related_name='+',
+        db_constraint=False, db_index=False,
+    )
+
+
 class CVUpload(models.Model):
     """
     Stores raw CV files for parsing.
     """
+    tenant = tenant_field()
     # DRF expects multipart/form-data uploads
     file = models.FileField(upload_to='cvs/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', '-uploaded_at'], name='cv_upload_tenant_idx'),
+        ]
+
+
+class ParsedCV(models.Model):
+    """
+    Text extracted from a CV upload and the fields parsed from it, with
+    the versions of both stages, so an improved parser reruns on the stored
+    text (``manage.py reparse_cvs``) instead of extracting every file again.
+    """
+    cv_upload = models.OneToOneField(CVUpload, on_delete=models.CASCADE, primary_key=True, related_name='parsed')
+    # zlib-compressed UTF-8; see skillmatch.services.parsed_cvs
+    text = models.BinaryField()
+    text_length = models.PositiveIntegerField(help_text=_('Characters of extracted text'))
+    fields = models.JSONField(default=dict, help_text=_('Structured fields from the last parse'))
+    extractor_version = models.PositiveSmallIntegerField()
+    parser_version = models.PositiveSmallIntegerField()
+    extracted_at = models.DateTimeField()
+    parsed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Finds the outdated parses
+            models.Index(fields=['parser_version'], name='parsed_cv_parser_version_idx'),
+        ]
+
+
+class UploadSession(models.Model):
+    """
+    A chunked, resumable CV upload. Chunks are written in place to
+    ``file``, which becomes the ``CVUpload``'s file when the upload is
+    finalized; see ``skillmatch.services.uploads``.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = tenant_field()
+    filename = models.CharField(max_length=200)
+    file = models.FileField(upload_to='cvs/')
+    length = models.BigIntegerField(help_text=_('Total size in bytes'))
+    offset = models.BigIntegerField(default=0, help_text=_('Bytes received so far'))
+    # Optional checksum announced by the client, verified on finalize
+    expected_sha256 = models.CharField(max_length=64, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    cv_upload = models.OneToOneField(
+        CVUpload, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The reaper's scan
+            models.Index(fields=['updated_at'], name='upload_session_updated_idx'),
+        ]
+
 
 class Candidate(StatusBase):
     """
     Parsed candidate profile.
     """
+    tenant = tenant_field()
+    external_id = models.CharField(
+        max_length=100, null=True, blank=True,
+        help_text=_('Identifier in the source system (ATS) used for bulk imports; unique per tenant')
+    )
     name = models.CharField(max_length=200)
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
     skills = ArrayField(models.CharField(max_length=100), default=list)
     experience_years = models.IntegerField()
-    source_cv = models.OneToOneField(CVUpload, on_delete=models.CASCADE)
+    # Empty for candidates bulk imported from another system
+    source_cv = models.OneToOneField(CVUpload, on_delete=models.CASCADE, null=True, blank=True)
     parsed_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by Postgres on every write; see skillmatch.core.search
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(ArrayToText('skills'), weight='B', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='candidate_search_idx'),
+            # Admin status filter, newest first
+            models.Index(fields=['status', '-id'], name='candidate_status_idx'),
+            # The candidate list, and the match index refresh
+            models.Index(fields=['tenant', '-parsed_at'], name='candidate_tenant_idx'),
+            models.Index(fields=['tenant', 'updated_at'], name='candidate_tenant_updated_idx'),
+        ]
+        constraints = [
+            # NULLS NOT DISTINCT: rows without a tenant share one namespace.
+            # Bulk imports upsert on it.
+            models.UniqueConstraint(
+                fields=['tenant', 'external_id'], condition=Q(external_id__isnull=False),
+                nulls_distinct=False, name='candidate_tenant_external_id_uniq',
+            ),
+        ]
 
 
 class Job(StatusBase):
     """
     Job postings to match against.
     """
+    tenant = tenant_field()
+    external_id = models.CharField(
+        max_length=100, null=True, blank=True,
+        help_text=_('Identifier in the source system (ATS) used for bulk imports; unique per tenant')
+    )
     title = models.CharField(max_length=200)
+    # Must-have skills
     requirements = ArrayField(models.CharField(max_length=100), default=list)
+    nice_to_have = ArrayField(models.CharField(max_length=100), default=list, blank=True)
+    skill_weights = models.JSONField(
+        default=dict, blank=True,
+        help_text=_('Relative weight per skill, e.g. {"Python": 2}; unlisted skills weigh 1')
+    )
+    min_experience_years = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(ArrayToText('requirements'), weight='B', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='job_search_idx'),
+            models.Index(fields=['status', '-id'], name='job_status_idx'),
+            models.Index(fields=['tenant', '-created_at'], name='job_tenant_idx'),
+            models.Index(fields=['tenant', 'updated_at'], name='job_tenant_updated_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'external_id'], condition=Q(external_id__isnull=False),
+                nulls_distinct=False, name='job_tenant_external_id_uniq',
+            ),
+        ]
 
 
 class Match(models.Model):
     """
     Stores a candidate-job match with score & rationale.
     """
+    # The tenant of the job (and candidate), copied so the match list of a
+    # tenant is read without joins
+    tenant = tenant_field()
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     score = models.FloatField(
@@ -71,3 +234,90 @@ class Match(models.Model):
     class Meta:
         # Ensure candidate-job pairs are unique
         unique_together = ['candidate', 'job']
+        # The table is hash-partitioned by job (migration 0007); see
+        # skillmatch.services.partitions
+        indexes = [
+            models.Index(fields=['job', '-score'], name='skillmatch_match_job_score_idx'),
+            models.Index(fields=['tenant', '-score'], name='match_tenant_score_idx'),
+        ]
+
+
+class MatchSummary(models.Model):
+    """
+    Denormalized copy of a match with the candidate name and job title, for
+    the match list. Maintained by ``skillmatch.services.summary`` when
+    ``SKILLMATCH_SUMMARY['ENABLED']`` is set.
+    """
+    # No database constraint: the partitioned match table has no unique index on id alone
+    match = models.OneToOneField(
+        Match, on_delete=models.CASCADE, primary_key=True, related_name='summary', db_constraint=False
+    )
+    # Plain columns: joining back to the candidate or job is what this table avoids
+    tenant_id = models.BigIntegerField(null=True)
+    candidate_id = models.BigIntegerField()
+    job_id = models.BigIntegerField()
+    candidate_name = models.CharField(max_length=200)
+    job_title = models.CharField(max_length=200)
+    score = models.FloatField()
+    matched_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Covering indexes: list pages are read from the index alone
+            models.Index(
+                fields=['tenant_id', '-score', 'match'], include=['candidate_name', 'job_title', 'matched_at'],
+                name='match_summary_tenant_score_idx',
+            ),
+            models.Index(
+                fields=['job_id', '-score', 'match'],
+                include=['candidate_name', 'job_title', 'matched_at', 'tenant_id'],
+                name='match_summary_job_score_idx',
+            ),
+            # Renames
+            models.Index(fields=['candidate_id'], name='match_summary_candidate_idx'),
+        ]
+
+
+class MatchRun(models.Model):
+    """
+    A batch matching run over all active candidates and jobs of a tenant.
+
+    Candidates are processed in shards of ``shard_size`` in id order; each
+    shard's matches and the checkpoint (``last_candidate_id``) commit
+    together, so an interrupted run resumes after the last committed shard.
+    """
+    STATUS_CHOICES = [
+        ('running', _('Running')),
+        ('completed', _('Completed')),
+        ('failed', _('Failed')),
+        ('cancelled', _('Cancelled')),
+    ]
+
+    # Runs match the candidates and jobs of one tenant
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.PROTECT, null=True, blank=True, related_name='+', db_constraint=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    shard_size = models.PositiveIntegerField(default=1000)
+    # Jobs are fixed when the run starts so a resumed run scores the same set
+    job_ids = ArrayField(models.BigIntegerField(), default=list)
+    last_candidate_id = models.BigIntegerField(
+        null=True, blank=True,
+        help_text=_('Candidates up to this id have been matched and committed')
+    )
+    shards_completed = models.PositiveIntegerField(default=0)
+    pairs_scored = models.BigIntegerField(default=0)
+    matches_created = models.BigIntegerField(default=0)
+    matches_updated = models.BigIntegerField(default=0)
+    # Stored matches dropped by the retention policy
+    matches_deleted = models.BigIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    # Time spent processing, summed over attempts
+    duration_seconds = models.FloatField(default=0.0)
+    error = models.TextField(blank=True)
+    # Version of the match snapshot published by the run, if any
+    snapshot = models.CharField(max_length=64, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
@@ -1,8 +1,23 @@
 from rest_framework import serializers
-from .models import CVUpload, Candidate, Job, Match
+from .core.tenancy import current_tenant, tenant_filter
+from .models import CVUpload, Candidate, Job, Match, MatchRun, MatchSummary, UploadSession
 
 
-class CVUploadSerializer(serializers.ModelSerializer):
+class TenantPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Accepts only the rows of the current tenant."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**tenant_filter(current_tenant()))
+
+
+class TenantOwnedSerializer(serializers.ModelSerializer):
+    """Creates rows for the current tenant."""
+
+    def create(self, validated_data):
+        return super().create({**validated_data, 'tenant': current_tenant()})
+
+
+class CVUploadSerializer(TenantOwnedSerializer):
     """
     Serializer for CV uploads.
     """
@@ -12,23 +27,68 @@ class CVUploadSerializer(serializers.ModelSerializer):
         read_only_fields = ['uploaded_at']
 
 
-class JobSerializer(serializers.ModelSerializer):
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for resumable upload sessions.
+    """
+    expected_sha256 = serializers.RegexField(
+        r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True,
+        help_text='SHA-256 of the whole file, verified on finalize'
+    )
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'length', 'offset', 'expected_sha256', 'sha256',
+            'cv_upload', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['offset', 'sha256', 'cv_upload', 'created_at', 'updated_at']
+
+
+class JobSerializer(TenantOwnedSerializer):
     """
     Serializer for job postings.
     """
 
     class Meta:
         model = Job
-        fields = ['id', 'title', 'requirements', 'created_at', 'status']
+        fields = [
+            'id', 'external_id', 'title', 'requirements', 'nice_to_have',
+            'skill_weights', 'min_experience_years', 'created_at', 'status'
+        ]
         read_only_fields = ['created_at']
 
+    def validate_external_id(self, value):
+        """
+        External ids are unique per tenant.
+        """
+        if value is None:
+            return value
+        jobs = Job.objects.filter(external_id=value, **tenant_filter(current_tenant()))
+        if self.instance is not None:
+            jobs = jobs.exclude(pk=self.instance.pk)
+        if jobs.exists():
+            raise serializers.ValidationError("job with this external id already exists.")
+        return value
 
-class CandidateSerializer(serializers.ModelSerializer):
+    def validate_skill_weights(self, value):
+        """
+        Weights must map skill names to positive numbers.
+        """
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Expected an object mapping skills to weights.")
+        for skill, weight in value.items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0:
+                raise serializers.ValidationError(f"Weight of '{skill}' must be a positive number.")
+        return value
+
+
+class CandidateSerializer(TenantOwnedSerializer):
     """
     Serializer for candidate profiles.
     """
     source_cv = CVUploadSerializer(read_only=True)
-    cv_id = serializers.PrimaryKeyRelatedField(
+    cv_id = TenantPrimaryKeyRelatedField(
         queryset=CVUpload.objects.all(),
         write_only=True,
         source='source_cv'
@@ -37,25 +97,25 @@ class CandidateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Candidate
         fields = [
-            'id', 'name', 'email', 'phone', 'skills',
+            'id', 'external_id', 'name', 'email', 'phone', 'skills',
             'experience_years', 'source_cv', 'cv_id',
             'parsed_at', 'status'
         ]
         read_only_fields = ['parsed_at']
 
 
-class MatchSerializer(serializers.ModelSerializer):
+class MatchSerializer(TenantOwnedSerializer):
     """
     Serializer for candidate-job matches.
     """
     candidate = CandidateSerializer(read_only=True)
     job = JobSerializer(read_only=True)
-    candidate_id = serializers.PrimaryKeyRelatedField(
+    candidate_id = TenantPrimaryKeyRelatedField(
         queryset=Candidate.objects.all(),
         write_only=True,
         source='candidate'
     )
-    job_id = serializers.PrimaryKeyRelatedField(
+    job_id = TenantPrimaryKeyRelatedField(
         queryset=Job.objects.all(),
         write_only=True,
         source='job'
@@ -81,3 +141,31 @@ class MatchListSerializer(serializers.ModelSerializer):
         model = Match
         fields = ['id', 'candidate_name', 'job_title', 'score', 'matched_at']
         read_only_fields = ['matched_at']
+
+
+class MatchSummaryListSerializer(serializers.ModelSerializer):
+    """
+    ``MatchListSerializer`` output read from the match summary table.
+    """
+    id = serializers.IntegerField(source='match_id', read_only=True)
+
+    class Meta:
+        model = MatchSummary
+        fields = ['id', 'candidate_name', 'job_title', 'score', 'matched_at']
+        read_only_fields = fields
+
+
+class MatchRunSerializer(serializers.ModelSerializer):
+    """
+    Serializer for batch matching runs.
+    """
+
+    class Meta:
+        model = MatchRun
+        fields = [
+            'id', 'status', 'shard_size', 'last_candidate_id',
+            'shards_completed', 'pairs_scored', 'matches_created',
+            'matches_updated', 'matches_deleted', 'attempts', 'duration_seconds', 'error',
+            'snapshot', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
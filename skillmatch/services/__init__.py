@@ -1,9 +1,63 @@
 """
 Services package for skillmatch app.
+
+Names are imported from their modules on first use (see
+``skillmatch.core.lazy``): most services need numpy, which request paths
+that do not score matches never have to load, and extraction workers
+import ``services.extraction`` before Django is set up.
 """
-from .ai import parse_cv_file, rank_candidate
+from ..core.lazy import lazy_exports
+
+_EXPORTS = {
+    'parse_cv_file': 'ai',
+    'extract_cv_text': 'ai',
+    'ExtractionError': 'extraction',
+    'PoolBusy': 'extraction',
+    'get_extraction_pool': 'extraction',
+    'rank_candidate': 'ai',
+    'rank_pairs': 'ai',
+    'skill_overlap_rationale': 'scoring',
+    'RunInProgress': 'match_runs',
+    'run_matching': 'match_runs',
+    'MatchIndex': 'profiles',
+    'get_match_index': 'profiles',
+    'ScoringBatch': 'scoring',
+    'ScoringEngine': 'scoring',
+    'get_scoring_engine': 'scoring',
+    'build_semantic_index': 'semantic',
+    'get_semantic_model': 'semantic',
+    'get_semantic_settings': 'semantic',
+    'refresh_summary': 'summary',
+    'summary_enabled': 'summary',
+    'SnapshotWriter': 'snapshot',
+    'get_match_snapshot': 'snapshot',
+    'get_snapshot_settings': 'snapshot',
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     'parse_cv_file',
+    'extract_cv_text',
+    'ExtractionError',
+    'PoolBusy',
+    'get_extraction_pool',
     'rank_candidate',
+    'rank_pairs',
+    'skill_overlap_rationale',
+    'RunInProgress',
+    'run_matching',
+    'MatchIndex',
+    'get_match_index',
+    'ScoringBatch',
+    'ScoringEngine',
+    'get_scoring_engine',
+    'build_semantic_index',
+    'get_semantic_model',
+    'get_semantic_settings',
+    'refresh_summary',
+    'summary_enabled',
+    'SnapshotWriter',
+    'get_match_snapshot',
+    'get_snapshot_settings',
 ]
@@ -1,15 +1,41 @@
 """
 AI utilities for the skillmatch app.
 """
+from asgiref.sync import sync_to_async
 
+from . import parsed_cvs
+from .extraction import get_extraction_pool
 
-async def parse_cv_file(file_obj) -> dict:
+
+# Bump when extract_cv_fields changes; `manage.py reparse_cvs` then reruns it
+# on the stored text of every CV
+PARSER_VERSION = 1
+
+
+async def extract_cv_text(file_obj, block=False) -> str:
+    """
+    Extracts the text of a CV file in the extraction pool. Raises
+    ``PoolBusy`` when the pool is saturated, unless ``block`` is set, and
+    ``ExtractionError`` for unreadable files.
+    """
+    try:
+        source = file_obj.path
+    except NotImplementedError:
+        # Storage without local files: send the content instead
+        def read():
+            with file_obj.open('rb') as f:
+                return f.read()
+        source = await sync_to_async(read)()
+    return await get_extraction_pool().extract(source, block=block)
+
+
+def extract_cv_fields(text) -> dict:
     """
-    Parses a CV file to extract candidate information.
+    Extracts candidate information from the text of a CV.
     In a real implementation, this would call an LLM or NLP pipeline.
     """
     # Print debugging info
-    print(f"Parsing CV - using mock data only")
+    print(f"Parsing CV - using mock data only ({len(text)} characters extracted)")
 
     # Mock response - in production this would use AI
     return {
@@ -19,20 +45,69 @@ async def parse_cv_file(file_obj) -> dict:
     }
 
 
+async def parse_cv_file(file_obj, block=False) -> dict:
+    """
+    Parses a CV file to extract candidate information: text extraction in
+    the extraction pool (see ``extract_cv_text``), then ``extract_cv_fields``.
+    Both results are stored for the file's CVUpload, and text stored by the
+    current extractor is reused.
+    """
+    cv_upload_id = file_obj.instance.pk
+    text = await sync_to_async(parsed_cvs.stored_text)(cv_upload_id)
+    extracted = text is None
+    if extracted:
+        text = await extract_cv_text(file_obj, block=block)
+    fields = extract_cv_fields(text)
+    await sync_to_async(parsed_cvs.store)(cv_upload_id, text, fields, PARSER_VERSION, extracted=extracted)
+    return fields
+
+
 async def rank_candidate(candidate_data, job_data) -> dict:
     """
     Ranks a candidate against a job posting.
     In a real implementation, this would prompt an LLM for scoring.
+
+    Uses the scorers configured in ``SKILLMATCH_SCORING``; by default the
+    share of required skills the candidate has, scaled to 0-100.
     """
-    # Calculate overlap between candidate skills and job requirements
-    candidate_skills = set(candidate_data.get('skills', []))
-    job_requirements = set(job_data.get('requirements', []))
+    # Deferred, as scoring needs numpy and CV parsing does not
+    from .profiles import get_match_index
+    from .scoring import get_scoring_engine, score_pair
 
-    matching_skills = candidate_skills.intersection(job_requirements)
-    score = len(matching_skills) / len(job_requirements) if job_requirements else 0
+    engine = get_scoring_engine()
+    document_frequency = None
+    if engine.needs_population:
+        # Rarity weighting needs statistics over all candidates. Not thread
+        # sensitive, as callers may already block the sync thread on this.
+        index = await sync_to_async(get_match_index, thread_sensitive=False)()
+        skills = list(job_data.get('requirements', [])) + list(job_data.get('nice_to_have', []))
+        document_frequency = index.document_frequency(skills)
 
     # Mock response - in production this would use AI
-    return {
-        'score': min(score * 100, 100),  # Scale to 0-100
-        'rationale': f'Candidate has {len(matching_skills)} of {len(job_requirements)} required skills'
-    }
+    return score_pair(candidate_data, job_data, engine, document_frequency)
+
+
+async def rank_pairs(pairs) -> list:
+    """
+    Ranks many ``(candidate_data, job_data)`` pairs like ``rank_candidate``,
+    building the scoring engine and the statistics of each job only once.
+    """
+    from .profiles import get_match_index
+    from .scoring import get_scoring_engine, score_pair
+
+    engine = get_scoring_engine()
+    index = None
+    if engine.needs_population:
+        index = await sync_to_async(get_match_index, thread_sensitive=False)()
+
+    results = []
+    frequencies = {}
+    for candidate_data, job_data in pairs:
+        document_frequency = None
+        if index is not None:
+            skills = tuple(job_data.get('requirements', [])) + tuple(job_data.get('nice_to_have', []))
+            if skills not in frequencies:
+                frequencies[skills] = index.document_frequency(list(skills))
+            document_frequency = frequencies[skills]
+        results.append(score_pair(candidate_data, job_data, engine, document_frequency))
+    return results
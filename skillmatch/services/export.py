@@ -0,0 +1,108 @@
+"""
+Streaming export of matches.
+
+Rows are read through a server-side cursor with a ``values_list``
+projection and encoded chunk by chunk, so memory use does not depend on how
+many rows are exported.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from ..core.tenancy import tenant_database, tenant_filter
+from ..models import Match
+
+
+EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('candidate_id', 'candidate_id'),
+    ('candidate_name', 'candidate__name'),
+    ('job_id', 'job_id'),
+    ('job_title', 'job__title'),
+    ('score', 'score'),
+    ('rationale', 'rationale'),
+    ('matched_at', 'matched_at'),
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def export_queryset(job_id=None, tenant=None):
+    """
+    Return the projected, ordered queryset of the matches of ``tenant`` to
+    export, bound to its database (streaming outlives the current tenant).
+    """
+    queryset = Match.objects.using(tenant_database(tenant)).filter(**tenant_filter(tenant))
+    if job_id is not None:
+        queryset = queryset.filter(job_id=job_id)
+    return queryset.order_by('-score', 'id').values_list(*[lookup for _, lookup in EXPORT_FIELDS])
+
+
+def _encode_rows(rows, fmt):
+    """Encode a chunk of value tuples as CSV or NDJSON text."""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+        return buffer.getvalue()
+
+    names = [name for name, _ in EXPORT_FIELDS]
+    lines = []
+    for row in rows:
+        record = {name: (value.isoformat() if hasattr(value, 'isoformat') else value)
+                  for name, value in zip(names, row)}
+        lines.append(json.dumps(record))
+    return ''.join(line + '\n' for line in lines)
+
+
+def _header(fmt):
+    if fmt == 'csv':
+        return _encode_rows([[name for name, _ in EXPORT_FIELDS]], 'csv')
+    return ''
+
+
+def stream_matches(queryset, fmt='csv', chunk_size=2000):
+    """Yield encoded chunks of ``queryset`` (synchronous, for WSGI)."""
+    header = _header(fmt)
+    if header:
+        yield header
+    chunk = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield _encode_rows(chunk, fmt)
+            chunk = []
+    if chunk:
+        yield _encode_rows(chunk, fmt)
+
+
+async def astream_matches(queryset, fmt='csv', chunk_size=2000):
+    """
+    Yield encoded chunks of ``queryset`` (asynchronous, for ASGI).
+
+    Django buffers synchronous iterators completely when serving a
+    StreamingHttpResponse over ASGI, so each chunk is fetched from the
+    server-side cursor in a thread and yielded from here instead.
+    """
+    header = _header(fmt)
+    if header:
+        yield header
+
+    rows = queryset.iterator(chunk_size=chunk_size)
+    next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    try:
+        while True:
+            chunk = await next_chunk()
+            if not chunk:
+                break
+            yield _encode_rows(chunk, fmt)
+    finally:
+        # Release the server-side cursor if the client goes away early
+        await sync_to_async(rows.close)()
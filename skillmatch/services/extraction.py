@@ -0,0 +1,360 @@
+"""
+CV text extraction in a pool of worker processes.
+
+Extracting text is CPU-bound and runs on untrusted files, so it never runs
+in a web worker: ``ExtractionPool`` keeps ``WORKERS`` processes (started
+with ``spawn``, on first use) and sends each file to an idle one.
+
+* Every file gets ``TIMEOUT`` seconds of wall-clock time and ``CPU_SECONDS``
+  of CPU time; a worker over either limit, or one that crashes or runs out
+  of its ``MEMORY_MB``, is killed and replaced, and only that file fails.
+* At most ``QUEUE_SIZE`` submissions wait for a worker. Beyond that,
+  non-blocking submissions (single parse requests) fail at once with
+  ``PoolBusy``, so callers can shed load instead of piling up requests.
+* ``stats()`` reports utilisation and outcome counters.
+
+Configured through ``settings.SKILLMATCH_EXTRACTION``.
+"""
+import asyncio
+import html
+import multiprocessing
+import queue
+import re
+import resource
+import signal
+import threading
+import time
+import zipfile
+import zlib
+from io import BytesIO
+
+from django.conf import settings
+
+
+# Bump when extract_text changes: parsing an upload re-extracts stored text
+# of older versions
+EXTRACTOR_VERSION = 1
+
+DEFAULTS = {
+    'WORKERS': 2,
+    'QUEUE_SIZE': 8,  # Submissions waiting for a worker
+    'TIMEOUT': 30.0,  # Wall-clock seconds per file
+    'CPU_SECONDS': 20,  # CPU seconds per file
+    'MEMORY_MB': 512,  # Address space limit per worker; None for no limit
+    'MAX_CHARS': 1000000,  # Extracted text is truncated to this length
+}
+
+
+def get_extraction_settings():
+    """Return ``settings.SKILLMATCH_EXTRACTION`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_EXTRACTION', {})}
+
+
+class ExtractionError(Exception):
+    """Text could not be extracted from a file."""
+
+
+class ExtractionTimeout(ExtractionError):
+    """A file took longer than the pool's timeout."""
+
+
+class PoolBusy(Exception):
+    """The submission queue is full."""
+
+
+# Text extraction (runs in the worker processes)
+
+_PDF_STREAM_RE = re.compile(rb'<<(.*?)>>\s*stream\r?\n(.*?)\r?\n?endstream', re.S)
+# Literal strings and the text operators acting on them or moving to a new line
+_PDF_TEXT_RE = re.compile(rb'\((?:\\.|[^\\)])*\)|\[(?:\\.|[^\]])*\]\s*TJ|\b(?:Tj|TJ|Td|TD|ET)\b|T\*|\'|"', re.S)
+_PDF_STRING_RE = re.compile(rb'\(((?:\\.|[^\\)])*)\)', re.S)
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+_DOCX_TEXT_RE = re.compile(r'<w:t(?:\s[^>]*)?>([^<]*)</w:t>|</w:p>|<w:(?:br|tab)\b[^>]*/>')
+
+
+def _pdf_string(raw):
+    def unescape(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        return _PDF_ESCAPES.get(escaped, escaped if escaped not in b'\r\n' else b'')
+    return re.sub(rb'\\([0-7]{1,3}|.)', unescape, raw, flags=re.S).decode('cp1252', errors='replace')
+
+
+def extract_pdf_text(data):
+    """
+    Text drawn by the content streams of a PDF with simple (single-byte)
+    fonts; streams are inflated if Flate-encoded. Fonts with other
+    encodings yield no text.
+    """
+    lines, line = [], []
+    for match in _PDF_STREAM_RE.finditer(data):
+        header, stream = match.groups()
+        if b'/FlateDecode' in header:
+            try:
+                stream = zlib.decompress(stream)
+            except zlib.error:
+                continue
+        elif b'/Filter' in header:
+            continue  # Images and other encodings
+        for token in _PDF_TEXT_RE.finditer(stream):
+            token = token.group(0)
+            if token.startswith((b'(', b'[')):
+                line.extend(_pdf_string(part) for part in _PDF_STRING_RE.findall(token))
+            elif line and token != b'Tj' and token != b'TJ':
+                lines.append(''.join(line))
+                line = []
+    if line:
+        lines.append(''.join(line))
+    return '\n'.join(line.strip() for line in lines if line.strip())
+
+
+def extract_docx_text(data):
+    """Paragraph text of a DOCX file."""
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        document = archive.read('word/document.xml').decode('utf-8')
+    parts = []
+    for match in _DOCX_TEXT_RE.finditer(document):
+        if match.group(1) is not None:
+            parts.append(html.unescape(match.group(1)))
+        else:
+            parts.append('\n' if match.group(0) != '<w:tab/>' else '\t')
+    return ''.join(parts).strip()
+
+
+def extract_text(source, max_chars=None):
+    """
+    Text of a CV given as a path or bytes: PDF, DOCX or plain text,
+    detected from the content.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+
+    if data.startswith(b'%PDF'):
+        text = extract_pdf_text(data)
+    elif data.startswith(b'PK\x03\x04'):
+        try:
+            text = extract_docx_text(data)
+        except (zipfile.BadZipFile, KeyError):
+            raise ExtractionError("Not a DOCX file.")
+    else:
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ExtractionError("Unsupported file type.")
+        if '\x00' in text:
+            raise ExtractionError("Unsupported file type.")
+    return text[:max_chars] if max_chars else text
+
+
+def _worker_main(conn, memory_mb):
+    """Worker process loop: run ``(func, args, cpu_seconds)`` tasks from ``conn``."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+    while True:
+        try:
+            func, args, cpu_seconds = conn.recv()
+        except EOFError:
+            return
+        if cpu_seconds:
+            # RLIMIT_CPU counts the process's total CPU time; SIGXCPU kills it
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(usage.ru_utime + usage.ru_stime) + int(cpu_seconds) + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (
+                soft if cpu_hard == resource.RLIM_INFINITY else min(soft, cpu_hard), cpu_hard))
+        try:
+            result = (True, func(*args))
+        except MemoryError:
+            result = (False, "Out of memory.")
+        except Exception as e:
+            result = (False, str(e) if isinstance(e, ExtractionError) else f"{type(e).__name__}: {e}")
+        conn.send(result)
+
+
+# The pool (runs in the web workers)
+
+class _Worker:
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    Fixed-size pool of extraction processes with per-task limits and a
+    bounded submission queue. Thread-safe; ``run`` blocks the calling
+    thread, ``arun`` waits in a separate thread.
+    """
+
+    def __init__(self, workers=2, queue_size=8, timeout=30.0, cpu_seconds=None, memory_mb=None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self._context = multiprocessing.get_context('spawn')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._all = set()
+        self._starting = 0
+        self._started_at = time.monotonic()
+        self._counts = dict.fromkeys(
+            ['started', 'completed', 'failed', 'timed_out', 'crashed', 'rejected'], 0)
+        self._busy = 0
+        self._queued = 0
+        self._busy_seconds = 0.0
+        self._closed = False
+
+    @classmethod
+    def from_settings(cls):
+        config = get_extraction_settings()
+        return cls(config['WORKERS'], config['QUEUE_SIZE'], config['TIMEOUT'],
+                   config['CPU_SECONDS'], config['MEMORY_MB'])
+
+    def _checkout(self):
+        """An idle worker, a new one while the pool is not full, else wait."""
+        with self._lock:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                start = len(self._all) + self._starting < self.workers
+                if start:
+                    self._starting += 1
+        if not start:
+            return self._idle.get()
+        try:
+            worker = _Worker(self._context, self.memory_mb)
+        finally:
+            with self._lock:
+                self._starting -= 1
+        with self._lock:
+            self._all.add(worker)
+            self._counts['started'] += 1
+        return worker
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            self._all.discard(worker)
+            if not self._closed:
+                # Wakes a submission waiting for a worker, which starts a new one
+                self._idle.put(None)
+
+    def run(self, func, *args, block=True):
+        """
+        Run ``func(*args)`` in a worker and return its result. ``func`` must
+        be importable by the workers. Raises ``PoolBusy`` if the queue is
+        full and ``block`` is false (else waits for room), and
+        ``ExtractionError`` if the task fails, crashes or times out.
+        """
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self._counts['rejected'] += 1
+            raise PoolBusy(f"All {self.workers} extraction workers are busy and the queue is full.")
+        try:
+            with self._lock:
+                self._queued += 1
+            worker = self._checkout()
+            while worker is None:  # A killed worker's place
+                worker = self._checkout()
+            with self._lock:
+                self._queued -= 1
+                self._busy += 1
+            started = time.monotonic()
+            try:
+                return self._execute(worker, func, args)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._busy_seconds += time.monotonic() - started
+        finally:
+            self._slots.release()
+
+    def _execute(self, worker, func, args):
+        try:
+            worker.conn.send((func, args, self.cpu_seconds))
+            ready = worker.conn.poll(self.timeout)
+            if ready:
+                ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            ready, ok, value = True, None, None
+        if not ready:
+            self._discard(worker)
+            self._count('timed_out')
+            raise ExtractionTimeout(f"Extraction took longer than {self.timeout}s.")
+        if ok is None:
+            worker.process.join(1)
+            code = worker.process.exitcode
+            self._discard(worker)
+            self._count('crashed')
+            reason = "CPU time limit exceeded" if code == -signal.SIGXCPU else f"exit code {code}"
+            raise ExtractionError(f"Extraction worker died ({reason}).")
+
+        self._idle.put(worker)
+        if not ok:
+            self._count('failed')
+            raise ExtractionError(value)
+        self._count('completed')
+        return value
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    async def arun(self, func, *args, block=True):
+        """``run`` without blocking the event loop."""
+        return await asyncio.to_thread(self.run, func, *args, block=block)
+
+    async def extract(self, source, block=True):
+        """Text of ``source`` (a path or bytes); see ``extract_text``."""
+        return await self.arun(extract_text, source, get_extraction_settings()['MAX_CHARS'], block=block)
+
+    def stats(self):
+        """Pool size, load and outcome counters since the pool was created."""
+        with self._lock:
+            uptime = time.monotonic() - self._started_at
+            return {
+                'workers': self.workers,
+                'alive': len(self._all),
+                'busy': self._busy,
+                'queued': self._queued,
+                'capacity': self.workers + self.queue_size,
+                'utilisation': round(self._busy_seconds / (uptime * self.workers), 4) if uptime else 0.0,
+                **self._counts,
+            }
+
+    def close(self):
+        """Stop all workers."""
+        with self._lock:
+            self._closed = True
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool():
+    """Return the process-wide ``ExtractionPool``, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool.from_settings()
+        return _pool
@@ -0,0 +1,344 @@
+"""
+Load-testing utilities for the skillmatch API.
+
+Drives weighted request scenarios against ``skillbridge.asgi:application``
+(served by a uvicorn instance started for the run) and reports throughput
+and latency percentiles per scenario. The server runs on an event loop of
+its own in a background thread, so the client does not compete with it for
+the loop. In blocking mode each scenario is run on its own while the lag of
+the server's loop is sampled, so endpoints which stall the loop can be told
+apart from ones which are merely slow.
+
+Loop lag only reveals blocking code running on the loop (async views and
+middleware). Django runs sync views in its thread-sensitive executor, one
+at a time, so a sync view that blocks shows up as latency instead.
+"""
+import asyncio
+import json
+import math
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_SCENARIOS = [
+    {'name': 'candidate-search', 'method': 'GET', 'path': '/api/candidates/?search=Python', 'weight': 4},
+    {'name': 'job-list', 'method': 'GET', 'path': '/api/jobs/', 'weight': 2},
+    {'name': 'match-list', 'method': 'GET', 'path': '/api/matches/', 'weight': 4},
+    {'name': 'cv-parse', 'method': 'POST', 'path': '/api/cv-uploads/{cv_upload_id}/parse/', 'weight': 1},
+]
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Scenario:
+    """
+    A single weighted request against the API.
+
+    ``path`` may contain ``{placeholders}`` which are filled from the context
+    passed to ``load_scenarios`` (e.g. ``cv_upload_id``).
+    """
+
+    def __init__(self, name, path, method='GET', weight=1, body=None, headers=None):
+        self.name = name
+        self.path = path
+        self.method = method.upper()
+        self.weight = weight
+        self.body = body
+        self.headers = headers or {}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data['name'],
+            path=data['path'],
+            method=data.get('method', 'GET'),
+            weight=data.get('weight', 1),
+            body=data.get('body'),
+            headers=data.get('headers'),
+        )
+
+    def __repr__(self):
+        return f"Scenario({self.name!r}, {self.method} {self.path})"
+
+
+def load_scenarios(path=None, **context):
+    """
+    Load scenario definitions from a JSON file (a list of objects with
+    ``name``, ``path`` and optional ``method``, ``weight``, ``body`` and
+    ``headers``), falling back to ``DEFAULT_SCENARIOS``.
+
+    Scenarios whose path needs a placeholder missing from ``context`` are
+    skipped, so the parse scenario only runs when a CV upload id is given.
+    """
+    if path:
+        with open(path) as fh:
+            definitions = json.load(fh)
+    else:
+        definitions = DEFAULT_SCENARIOS
+
+    scenarios = []
+    for definition in definitions:
+        try:
+            resolved = dict(definition, path=definition['path'].format(**context))
+        except KeyError:
+            continue
+        scenarios.append(Scenario.from_dict(resolved))
+    return scenarios
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (which need not be sorted)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class ScenarioStats:
+    """
+    Latency and status bookkeeping for one scenario.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.status_codes = {}
+        self.errors = 0
+        self.dropped = 0
+
+    def record(self, latency, status_code):
+        self.latencies.append(latency)
+        self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+
+    def record_error(self, latency):
+        self.latencies.append(latency)
+        self.errors += 1
+
+    def summary(self, duration):
+        completed = len(self.latencies)
+        result = {
+            'requests': completed,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'status_codes': {str(code): count for code, count in sorted(self.status_codes.items())},
+            'throughput_rps': round(completed / duration, 2) if duration else 0.0,
+        }
+        for pct in PERCENTILES:
+            value = percentile(self.latencies, pct)
+            result[f'p{pct}_ms'] = round(value * 1000, 2) if value is not None else None
+        result['max_ms'] = round(max(self.latencies) * 1000, 2) if self.latencies else None
+        return result
+
+
+class LoopLagMonitor:
+    """
+    Samples how late ``loop`` (running in another thread) wakes up from a
+    short sleep.
+
+    Anything running synchronously on the loop delays every wake-up, so the
+    lag percentiles show whether an endpoint blocks the event loop.
+    """
+
+    def __init__(self, loop, interval=0.01):
+        self.loop = loop
+        self.interval = interval
+        self.samples = []
+        self._future = None
+
+    async def _run(self):
+        while True:
+            expected = self.loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(self.loop.time() - expected, 0.0))
+
+    def start(self):
+        self.samples = []
+        self._future = asyncio.run_coroutine_threadsafe(self._run(), self.loop)
+
+    def stop(self):
+        self._future.cancel()
+
+    def summary(self):
+        samples = list(self.samples)
+        return {
+            'loop_lag_p50_ms': round((percentile(samples, 50) or 0.0) * 1000, 2),
+            'loop_lag_p99_ms': round((percentile(samples, 99) or 0.0) * 1000, 2),
+            'loop_lag_max_ms': round(max(samples, default=0.0) * 1000, 2),
+        }
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """
+    A uvicorn server for ``app_path`` on an event loop of its own, in a
+    background thread; ``loop`` is that loop once ``start`` returns.
+    """
+
+    def __init__(self, app_path='skillbridge.asgi:application', host='127.0.0.1', port=None):
+        import uvicorn
+
+        port = port or _free_port(host)
+        self.url = f"http://{host}:{port}"
+        config = uvicorn.Config(
+            app_path, host=host, port=port,
+            lifespan='off', log_level='warning', access_log=False,
+        )
+        self.server = uvicorn.Server(config)
+        self.loop = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='loadtest-server', daemon=True)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.server.serve())
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.loop.close()
+
+    def start(self):
+        self._thread.start()
+        while not self.server.started:
+            if not self._thread.is_alive():
+                # Surface startup failures (port in use, import errors, ...)
+                raise RuntimeError("uvicorn exited before starting") from self._error
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join()
+
+
+@contextmanager
+def serve_app(app_path='skillbridge.asgi:application', host='127.0.0.1', port=None):
+    """
+    Start a ``ServerThread`` for ``app_path`` and yield it. The server is
+    shut down when the context exits.
+    """
+    server = ServerThread(app_path, host, port)
+    server.start()
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+async def _issue(client, scenario, stats, semaphore):
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await client.request(
+                scenario.method, scenario.path,
+                json=scenario.body, headers=scenario.headers,
+            )
+        except Exception:
+            stats.record_error(time.perf_counter() - started)
+            return
+        stats.record(time.perf_counter() - started, response.status_code)
+
+
+async def run_load(base_url, scenarios, rps=50, duration=10, concurrency=100, seed=None, timeout=30.0):
+    """
+    Send requests open-loop at ``rps`` for ``duration`` seconds, picking a
+    scenario per request by weight.
+
+    Requests are scheduled on a fixed clock rather than after the previous
+    one returns, so a slow server shows up as latency instead of silently
+    lowering the offered load. When ``concurrency`` requests are already in
+    flight, new ones are counted as ``dropped`` (the client is saturated).
+    """
+    import httpx
+
+    rng = random.Random(seed)
+    weights = [scenario.weight for scenario in scenarios]
+    stats = {scenario.name: ScenarioStats(scenario.name) for scenario in scenarios}
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    loop = asyncio.get_running_loop()
+    pending = set()
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = loop.time()
+        interval = 1.0 / rps
+        sent = 0
+        while sent * interval < duration:
+            delay = started + sent * interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            scenario = rng.choices(scenarios, weights)[0]
+            sent += 1
+            if semaphore.locked():
+                stats[scenario.name].dropped += 1
+                continue
+            task = asyncio.create_task(_issue(client, scenario, stats[scenario.name], semaphore))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        elapsed = loop.time() - started
+
+    summaries = {name: item.summary(elapsed) for name, item in stats.items()}
+    total = ScenarioStats('total')
+    for item in stats.values():
+        total.latencies.extend(item.latencies)
+        total.errors += item.errors
+        total.dropped += item.dropped
+        for code, count in item.status_codes.items():
+            total.status_codes[code] = total.status_codes.get(code, 0) + count
+    return {'duration_s': round(elapsed, 2), 'scenarios': summaries, 'total': total.summary(elapsed)}
+
+
+async def detect_blocking(server, scenarios, rps=20, duration=5, concurrency=50,
+                          threshold_ms=50.0, seed=None, timeout=30.0):
+    """
+    Run each scenario on its own against ``server`` (a ``ServerThread``)
+    while sampling the lag of the server's loop. Scenarios whose p99 loop
+    lag exceeds ``threshold_ms`` are flagged as blocking.
+    """
+    monitor = LoopLagMonitor(server.loop)
+
+    # Idle baseline of the server's loop
+    monitor.start()
+    await asyncio.sleep(1.0)
+    monitor.stop()
+    results = {'baseline': monitor.summary(), 'scenarios': {}}
+
+    for scenario in scenarios:
+        monitor.start()
+        load = await run_load(server.url, [scenario], rps=rps, duration=duration,
+                              concurrency=concurrency, seed=seed, timeout=timeout)
+        monitor.stop()
+        lag = monitor.summary()
+        results['scenarios'][scenario.name] = {
+            **load['scenarios'][scenario.name],
+            **lag,
+            'blocks_event_loop': lag['loop_lag_p99_ms'] > threshold_ms,
+        }
+    return results
+
+
+def run(scenarios, mode='throughput', base_url=None, app_path='skillbridge.asgi:application',
+        host='127.0.0.1', port=None, **options):
+    """
+    Synchronous entry point used by the ``loadtest`` management command.
+
+    Starts a uvicorn instance for ``app_path`` unless ``base_url`` points at
+    an already running server. Blocking mode always needs the in-process
+    server, because the lag can only be measured on the server's own loop.
+    """
+    if base_url and mode != 'blocking':
+        return asyncio.run(run_load(base_url, scenarios, **options))
+    with serve_app(app_path, host, port) as server:
+        if mode == 'blocking':
+            return asyncio.run(detect_blocking(server, scenarios, **options))
+        return asyncio.run(run_load(server.url, scenarios, **options))
@@ -0,0 +1,309 @@
+"""
+Match change feed.
+
+Code writing matches publishes the changes with ``pg_notify`` on
+``CHANNEL``, in the writing transaction, so they are delivered on commit
+and never for rolled back writes. An event is a dict with a ``type``:
+
+* ``created`` / ``updated``: a match, with ``id``, ``tenant_id``,
+  ``candidate_id``, ``job_id`` and ``score``;
+* ``replaced``: every match of ``job_id`` (of ``tenant_id``) was replaced
+  (``rematch``);
+* ``reset``: sent to a subscriber that may have missed events (its queue
+  overflowed or the listening connection was lost); it should reload.
+
+Each process keeps one connection listening on the channel per database
+(tenants may have their own, see ``skillmatch.core.tenancy``), in a thread
+started with the first subscriber, and hands events to the subscriptions
+whose tenant, job and candidate filters they pass; ``/api/matches/events/``
+streams them as server-sent events.
+
+Configured through ``settings.SKILLMATCH_EVENTS``.
+"""
+import asyncio
+import json
+import queue
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from ..core.tenancy import current_database
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CHANNEL': 'skillmatch_matches',
+    'HEARTBEAT': 15.0,  # Seconds between keep-alive comments on an idle stream
+    'QUEUE_SIZE': 1000,  # Events buffered per subscriber before it gets a reset
+    'MAX_SUBSCRIBERS': 500,  # Open streams per process
+}
+
+# pg_notify payloads are limited to 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+# Seconds between checks for the listener to stop, and before reconnecting
+POLL_INTERVAL = 1.0
+RECONNECT_DELAY = 2.0
+
+
+def get_events_settings():
+    """Return ``settings.SKILLMATCH_EVENTS`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_EVENTS', {})}
+
+
+def match_event(match_id, candidate_id, job_id, score, created, tenant_id=None):
+    return {
+        'type': 'created' if created else 'updated',
+        'id': match_id,
+        'candidate_id': candidate_id,
+        'job_id': job_id,
+        'score': round(score, 2),
+        'tenant_id': tenant_id,
+    }
+
+
+def encode(events):
+    """Split ``events`` into JSON arrays that fit a notification payload."""
+    payloads, part, size = [], [], 2
+    for event in events:
+        encoded = json.dumps(event, separators=(',', ':'))
+        if part and size + len(encoded) + 1 > MAX_PAYLOAD_BYTES:
+            payloads.append(f"[{','.join(part)}]")
+            part, size = [], 2
+        part.append(encoded)
+        size += len(encoded) + 1
+    if part:
+        payloads.append(f"[{','.join(part)}]")
+    return payloads
+
+
+def publish(events, using=None):
+    """
+    Notify listeners of ``events``, on commit of the current transaction
+    of database ``using`` (default: the current tenant's).
+    """
+    config = get_events_settings()
+    if not config['ENABLED'] or not events:
+        return
+    with connections[using or current_database()].cursor() as cursor:
+        cursor.execute("SELECT count(pg_notify(%s, payload)) FROM unnest(%s::text[]) AS payload",
+                       [config['CHANNEL'], encode(events)])
+
+
+def publish_matches(matches, created_ids=(), using=None):
+    """Publish ``created``/``updated`` events for saved ``Match`` objects."""
+    created_ids = set(created_ids)
+    publish([match_event(match.pk, match.candidate_id, match.job_id, match.score, match.pk in created_ids,
+                         match.tenant_id)
+             for match in matches], using)
+
+
+class Subscription:
+    """
+    Events for one stream, of one tenant (None: rows without a tenant) and
+    filtered by job and candidate ids. Created for an event loop (``loop``)
+    it is read with ``aget``, else with ``get``.
+    """
+
+    def __init__(self, job_ids=None, candidate_ids=None, loop=None, maxsize=1000, tenant_id=None):
+        self.tenant_id = tenant_id
+        self.job_ids = set(job_ids) if job_ids else None
+        self.candidate_ids = set(candidate_ids) if candidate_ids else None
+        self.loop = loop
+        self._queue = asyncio.Queue(maxsize) if loop is not None else queue.Queue(maxsize)
+        self._overflowed = False
+
+    def wants(self, event):
+        if event['type'] == 'reset':
+            return True
+        if event.get('tenant_id') != self.tenant_id:
+            return False
+        if self.job_ids is not None and event.get('job_id') not in self.job_ids:
+            return False
+        if self.candidate_ids is not None and event['type'] != 'replaced':
+            return event.get('candidate_id') in self.candidate_ids
+        return True
+
+    def deliver(self, events):
+        """Queue the wanted ``events``; called by the listener thread."""
+        events = [event for event in events if self.wants(event)]
+        if not events:
+            return
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._offer, events)
+            except RuntimeError:
+                pass  # The stream's loop is closed
+        else:
+            self._offer(events)
+
+    def _offer(self, events):
+        for event in events:
+            if self._overflowed:
+                return
+            try:
+                self._queue.put_nowait(event)
+            except (asyncio.QueueFull, queue.Full):
+                # Dropped events are replaced by a reset once the queue drains
+                self._overflowed = True
+
+    def _reset_due(self):
+        """True once a subscriber that overflowed has read every queued event."""
+        if self._overflowed and self._queue.empty():
+            self._overflowed = False
+            return True
+        return False
+
+    def get(self, timeout=None):
+        """Next event, or None after ``timeout`` seconds."""
+        if self._reset_due():
+            return {'type': 'reset'}
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout=None):
+        """Next event, or None after ``timeout`` seconds."""
+        if self._reset_due():
+            return {'type': 'reset'}
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MatchEventListener:
+    """
+    Listens on the channel with a dedicated connection to database
+    ``using`` while there are subscribers, reconnecting after errors.
+    """
+
+    def __init__(self, channel, using='default'):
+        self.channel = channel
+        self.using = using
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._listening = threading.Event()
+
+    def subscribe(self, subscription):
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='match-events', daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def wait_listening(self, timeout=None):
+        """Wait until events are being received; returns False on timeout."""
+        return self._listening.wait(timeout)
+
+    def _broadcast(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(events)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            wrapper = connections[self.using]
+            try:
+                conn = wrapper.get_new_connection(wrapper.get_connection_params())
+            except Exception:
+                time.sleep(RECONNECT_DELAY)
+                continue
+            try:
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                self._listening.set()
+                self._listen(conn)
+            except Exception:
+                # Events may have been missed while reconnecting
+                self._broadcast([{'type': 'reset'}])
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                self._listening.clear()
+                conn.close()
+
+    def _listen(self, conn):
+        """Hand notifications to the subscribers until there are none left."""
+        while self.subscribers:
+            if not select.select([conn], [], [], POLL_INTERVAL)[0]:
+                continue
+            conn.poll()
+            events = []
+            while conn.notifies:
+                events.extend(json.loads(conn.notifies.pop(0).payload))
+            if events:
+                self._broadcast(events)
+
+
+_listeners = {}
+_listener_lock = threading.Lock()
+
+
+def get_listener(using='default'):
+    """Return the process-wide ``MatchEventListener`` of database ``using``."""
+    with _listener_lock:
+        if using not in _listeners:
+            _listeners[using] = MatchEventListener(get_events_settings()['CHANNEL'], using)
+        return _listeners[using]
+
+
+def _format(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+# Sent first: the reconnection delay asked of EventSource clients
+STREAM_PREAMBLE = "retry: 3000\n: connected\n\n"
+
+
+def stream_events(job_ids, candidate_ids, heartbeat, maxsize=1000, tenant_id=None, using='default'):
+    """
+    Yield server-sent events for matches of ``job_ids`` and
+    ``candidate_ids`` (all when empty) of a tenant stored in database
+    ``using``, with a keep-alive comment after ``heartbeat`` idle seconds
+    (synchronous, for WSGI).
+    """
+    subscription = Subscription(job_ids, candidate_ids, maxsize=maxsize, tenant_id=tenant_id)
+    listener = get_listener(using)
+    listener.subscribe(subscription)
+    try:
+        listener.wait_listening(heartbeat)
+        yield STREAM_PREAMBLE
+        while True:
+            event = subscription.get(timeout=heartbeat)
+            yield _format(event) if event is not None else ": keep-alive\n\n"
+    finally:
+        listener.unsubscribe(subscription)
+
+
+async def astream_events(job_ids, candidate_ids, heartbeat, maxsize=1000, tenant_id=None, using='default'):
+    """Async version of ``stream_events`` for ASGI."""
+    subscription = Subscription(job_ids, candidate_ids, asyncio.get_running_loop(), maxsize, tenant_id)
+    listener = get_listener(using)
+    listener.subscribe(subscription)
+    try:
+        await asyncio.to_thread(listener.wait_listening, heartbeat)
+        yield STREAM_PREAMBLE
+        while True:
+            event = await subscription.aget(timeout=heartbeat)
+            yield _format(event) if event is not None else ": keep-alive\n\n"
+    finally:
+        listener.unsubscribe(subscription)
@@ -0,0 +1,315 @@
+"""
+Resumable batch matching runs.
+
+A ``MatchRun`` scores the active candidates of a tenant against its jobs
+that were active when it started, in shards of candidates taken in id order. Each
+shard's matches are upserted and the run's checkpoint advanced in one
+transaction, so after a failure (or a killed process) running again
+resumes after the last committed shard. Upserts make re-running a shard
+idempotent.
+
+Only one process works on a run at a time: the run is claimed with a
+session-level Postgres advisory lock held until it finishes, and a
+per-tenant advisory lock serializes deciding whether to resume a run or
+start one. Runs of different tenants are independent. ``claim_run`` and ``execute_run`` act for
+the current tenant (``skillmatch.core.tenancy``); ``run_matching`` takes it.
+"""
+import time
+
+import numpy as np
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..core.cache import invalidate_models
+from ..core.tenancy import current_database, current_tenant, tenant_filter, use_tenant
+from ..models import Match, MatchRun
+from . import match_events
+from .partitions import replace_job_matches
+from .profiles import get_match_index
+from .retention import RetentionPolicy, delete_unkept, trim
+from .scoring import ScoringBatch, get_scoring_engine
+from .semantic import get_semantic_model, get_semantic_settings
+from .snapshot import SnapshotWriter, get_snapshot_settings, snapshot_path
+from .summary import refresh_summary, summary_enabled
+
+
+DEFAULT_SHARD_SIZE = 1000
+# Pairs per INSERT statement within a shard
+UPSERT_CHUNK_SIZE = 20000
+# First key of the two-key advisory lock; the second is the run id
+ADVISORY_LOCK_CLASS = 0x534D
+# First key of the claim lock; the second is the tenant id (0 without one)
+CLAIM_LOCK_CLASS = 0x534E
+
+
+class RunInProgress(Exception):
+    """
+    Another process is working on the unfinished run, or is claiming one
+    (``run`` is None).
+    """
+
+    def __init__(self, run=None):
+        if run is None:
+            super().__init__("A match run is being started in another process.")
+        else:
+            super().__init__(f"Match run {run.pk} is in progress in another process.")
+        self.run = run
+
+
+def _try_advisory_lock(key, subkey):
+    with connections[current_database()].cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [key, subkey])
+        return cursor.fetchone()[0]
+
+
+def _advisory_unlock(key, subkey):
+    with connections[current_database()].cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [key, subkey])
+
+
+def _try_lock(run):
+    return _try_advisory_lock(ADVISORY_LOCK_CLASS, run.pk)
+
+
+def _unlock(run):
+    _advisory_unlock(ADVISORY_LOCK_CLASS, run.pk)
+
+
+def claim_run(shard_size=None, job_ids=None, restart=False):
+    """
+    Return ``(run, resumed)``: the latest unfinished run, locked for this
+    connection, or a new run when there is none.
+
+    ``job_ids`` restricts a new run to these jobs (default: all active jobs);
+    it is ignored when resuming. ``restart`` cancels the unfinished run
+    instead of resuming it. Raises ``RunInProgress`` when the unfinished
+    run is locked by another process, or another process is claiming a
+    run of the tenant.
+    """
+    tenant = current_tenant()
+    claim_key = tenant.pk if tenant is not None else 0
+    # Without it, two callers finding no unfinished run would both start one
+    if not _try_advisory_lock(CLAIM_LOCK_CLASS, claim_key):
+        raise RunInProgress()
+    try:
+        run = MatchRun.objects.filter(
+            status__in=['running', 'failed'], **tenant_filter(tenant)).order_by('-pk').first()
+        if run is not None:
+            if not _try_lock(run):
+                raise RunInProgress(run)
+            if not restart:
+                return run, True
+            MatchRun.objects.filter(pk=run.pk).update(status='cancelled', finished_at=timezone.now())
+            _unlock(run)
+
+        index = get_match_index(prune=True)
+        jobs = index.jobs.view()
+        active = sorted(int(job_id) for job_id in jobs['ids'][jobs['active']])
+        if job_ids is not None:
+            active = [job_id for job_id in active if job_id in set(job_ids)]
+        run = MatchRun.objects.create(tenant=tenant, shard_size=shard_size or DEFAULT_SHARD_SIZE, job_ids=active)
+        # A new run id, so the lock is free
+        _try_lock(run)
+        return run, False
+    finally:
+        _advisory_unlock(CLAIM_LOCK_CLASS, claim_key)
+
+
+def _upsert(tenant_id, candidate_ids, job_ids, scores, rationales):
+    """Insert or update matches of a tenant and publish the changes; returns (created, updated)."""
+    created = updated = 0
+    with connections[current_database()].cursor() as cursor:
+        for start in range(0, len(candidate_ids), UPSERT_CHUNK_SIZE):
+            stop = start + UPSERT_CHUNK_SIZE
+            # Partitioned tables cannot return xmax, so existing pairs are
+            # found in the snapshot the statement started with
+            cursor.execute(f"""
+                WITH pairs AS (
+                    SELECT * FROM unnest(%s::bigint[], %s::bigint[], %s::double precision[], %s::text[])
+                        AS pairs (candidate_id, job_id, score, rationale)
+                ), existing AS (
+                    SELECT candidate_id, job_id FROM {Match._meta.db_table} m
+                    JOIN pairs USING (candidate_id, job_id)
+                ), upserted AS (
+                    INSERT INTO {Match._meta.db_table} (tenant_id, candidate_id, job_id, score, rationale, matched_at)
+                    SELECT %s, candidate_id, job_id, score, rationale, now() FROM pairs
+                    ON CONFLICT (candidate_id, job_id)
+                    DO UPDATE SET score = EXCLUDED.score, rationale = EXCLUDED.rationale
+                    RETURNING id, candidate_id, job_id, score
+                )
+                SELECT u.id, u.candidate_id, u.job_id, u.score, e.job_id IS NULL
+                FROM upserted u LEFT JOIN existing e USING (candidate_id, job_id)
+            """, [candidate_ids[start:stop], job_ids[start:stop], scores[start:stop], rationales[start:stop],
+                  tenant_id])
+            rows = cursor.fetchall()
+            chunk_created = sum(1 for row in rows if row[4])
+            created += chunk_created
+            updated += len(rows) - chunk_created
+            match_events.publish([match_events.match_event(*row, tenant_id) for row in rows])
+    return created, updated
+
+
+def _shards(index, after, shard_size):
+    """Yield rows of active candidates with id > ``after``, in id order."""
+    candidates = index.candidates.view()
+    rows = np.flatnonzero(candidates['active'])
+    rows = rows[np.argsort(candidates['ids'][rows], kind='stable')]
+    if after is not None:
+        rows = rows[candidates['ids'][rows] > after]
+    for start in range(0, len(rows), shard_size):
+        yield rows[start:start + shard_size]
+
+
+def execute_run(run, on_shard=None):
+    """
+    Process the remaining shards of a claimed ``run``, mark it completed and
+    publish a match snapshot when enabled. On error the run is marked
+    failed, keeping its checkpoint, and the error is re-raised.
+
+    ``on_shard(run)`` is called after each committed shard.
+    """
+    started = time.monotonic()
+    resumed_after = run.last_candidate_id
+    MatchRun.objects.filter(pk=run.pk).update(status='running', error='', attempts=F('attempts') + 1)
+    try:
+        index = get_match_index(prune=True)
+        engine = get_scoring_engine()
+        job_ids = [job_id for job_id in run.job_ids if index.jobs.row_of(job_id) is not None]
+        frequencies = {}
+        if engine.needs_population:
+            # Rarity is relative to all candidates, not to one shard
+            frequencies = {job_id: ScoringBatch.index_frequency(index, job_id) for job_id in job_ids}
+
+        # In semantic mode only the nearest candidates of each job are scored
+        semantic_model = get_semantic_model()
+        semantic_config = get_semantic_settings()
+        retrieved = {}
+        retention = RetentionPolicy.from_settings()
+        maintain_summary = summary_enabled()
+        snapshot_config = get_snapshot_settings()
+        snapshot = SnapshotWriter(snapshot_config['TOP_K']) if snapshot_config['ENABLED'] else None
+
+        for rows in _shards(index, run.last_candidate_id, run.shard_size):
+            pair_candidates, pair_jobs, pair_scores, rationales = [], [], [], []
+            scored = 0
+            for job_id in job_ids:
+                batch = ScoringBatch.for_job(index, job_id, rows, frequencies.get(job_id))
+                if semantic_model is not None:
+                    batch = semantic_model.restrict(
+                        batch, semantic_config['TOP_K'], semantic_config['NPROBE'], cache=retrieved)
+                scores = engine.score_batch(batch)
+                scored += len(batch)
+                if snapshot is not None:
+                    snapshot.add(job_id, batch.candidate_ids, scores)
+                kept = np.arange(len(batch))
+                if retention.active:
+                    kept = np.flatnonzero(retention.keep(job_id, scores))
+                pair_candidates.extend(batch.candidate_ids[kept].tolist())
+                pair_jobs.extend([job_id] * len(kept))
+                pair_scores.extend(scores[kept].tolist())
+                rationales.extend(engine.rationales(batch, kept))
+
+            first_candidate_id = int(index.candidates.ids[rows[0]])
+            last_candidate_id = int(index.candidates.ids[rows[-1]])
+            with transaction.atomic(using=current_database()):
+                created, updated = _upsert(run.tenant_id, pair_candidates, pair_jobs, pair_scores, rationales)
+                deleted = 0
+                if retention.active:
+                    # Pairs which fell out of the policy since an earlier run
+                    deleted = delete_unkept(
+                        first_candidate_id, last_candidate_id, job_ids, pair_candidates, pair_jobs)
+                if maintain_summary:
+                    refresh_summary(candidate_ids=index.candidates.ids[rows].tolist())
+                MatchRun.objects.filter(pk=run.pk).update(
+                    last_candidate_id=last_candidate_id,
+                    shards_completed=F('shards_completed') + 1,
+                    pairs_scored=F('pairs_scored') + scored,
+                    matches_created=F('matches_created') + created,
+                    matches_updated=F('matches_updated') + updated,
+                    matches_deleted=F('matches_deleted') + deleted,
+                )
+            # Raw SQL bypasses the model signals
+            invalidate_models(Match)
+            run.refresh_from_db()
+            if on_shard is not None:
+                on_shard(run)
+
+        if retention.top_n is not None:
+            # Shards only skip pairs below the best N seen so far
+            for job_id in job_ids:
+                trimmed = trim(job_id, retention.top_n)
+                if trimmed:
+                    MatchRun.objects.filter(pk=run.pk).update(matches_deleted=F('matches_deleted') + trimmed)
+            invalidate_models(Match)
+
+        snapshot_version = ''
+        if snapshot is not None:
+            if resumed_after is not None:
+                # Shards committed by earlier attempts are only in the database
+                snapshot = SnapshotWriter(snapshot_config['TOP_K'])
+                snapshot.add_from_database(job_ids)
+            snapshot_version = snapshot.publish(snapshot_path(snapshot_config), snapshot_config['KEEP']).name
+
+        MatchRun.objects.filter(pk=run.pk).update(
+            status='completed',
+            snapshot=snapshot_version,
+            finished_at=timezone.now(),
+            duration_seconds=F('duration_seconds') + (time.monotonic() - started),
+        )
+    except Exception as e:
+        try:
+            MatchRun.objects.filter(pk=run.pk).update(
+                status='failed',
+                error=f"{type(e).__name__}: {e}",
+                duration_seconds=F('duration_seconds') + (time.monotonic() - started),
+            )
+        except DatabaseError:
+            # The database is gone; the run stays 'running' and is resumed
+            # once the lock dies with this connection
+            pass
+        raise
+    finally:
+        try:
+            _unlock(run)
+        except DatabaseError:
+            pass
+    run.refresh_from_db()
+    return run
+
+
+def run_matching(shard_size=None, job_ids=None, restart=False, on_shard=None, tenant=None):
+    """
+    Resume the unfinished run of ``tenant`` (None: the rows without a
+    tenant) or start a new one, and process it to the end. Returns
+    ``(run, resumed)``; see ``claim_run`` and ``execute_run``.
+    """
+    with use_tenant(tenant):
+        run, resumed = claim_run(shard_size, job_ids, restart)
+        return execute_run(run, on_shard), resumed
+
+
+def rematch_job(job_id):
+    """
+    Score the current tenant's active candidates against one of its jobs
+    and replace the job's matches by deleting and reloading its rows.
+    Returns the number
+    of matches stored; raises ``KeyError`` for unknown jobs.
+    """
+    index = get_match_index(prune=True)
+    engine = get_scoring_engine()
+    batch = ScoringBatch.for_job(index, int(job_id))
+    semantic_model = get_semantic_model()
+    if semantic_model is not None:
+        semantic_config = get_semantic_settings()
+        batch = semantic_model.restrict(batch, semantic_config['TOP_K'], semantic_config['NPROBE'])
+    scores = engine.score_batch(batch)
+    kept = RetentionPolicy.from_settings().select(batch.candidate_ids, scores)
+    rationales = engine.rationales(batch, kept)
+    stored = replace_job_matches(job_id, batch.candidate_ids[kept].tolist(), scores[kept].tolist(), rationales)
+    # Raw SQL bypasses the model signals
+    invalidate_models(Match)
+    tenant = current_tenant()
+    match_events.publish([{'type': 'replaced', 'job_id': int(job_id),
+                           'tenant_id': tenant.pk if tenant is not None else None}])
+    return stored
@@ -0,0 +1,112 @@
+"""
+Stored CV parses.
+
+Parsing a CV has two stages: text extraction from the file (versioned by
+``extraction.EXTRACTOR_VERSION``) and structured extraction from the text
+(``ai.PARSER_VERSION``). Both results are kept in ``ParsedCV``, the text
+zlib-compressed (fields are small, and Postgres compresses large JSON
+values itself). Parsing an upload again reuses text from the current
+extractor, and ``reparse`` reruns only the structured stage over uploads
+parsed by an older parser, in batches.
+"""
+import zlib
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..core.cache import invalidate_models
+from ..core.tenancy import current_database
+from ..models import Candidate, ParsedCV
+from .extraction import EXTRACTOR_VERSION
+from .summary import summary_enabled, sync_names
+
+
+COMPRESSION_LEVEL = 6
+# Candidate fields set from the parsed fields
+CANDIDATE_FIELDS = ('name', 'skills', 'experience_years')
+
+
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(data):
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+def stored_text(cv_upload_id):
+    """Stored text of an upload from the current extractor, or None."""
+    data = ParsedCV.objects.filter(
+        cv_upload_id=cv_upload_id, extractor_version=EXTRACTOR_VERSION
+    ).values_list('text', flat=True).first()
+    return decompress_text(data) if data is not None else None
+
+
+def store(cv_upload_id, text, fields, parser_version, extracted=True):
+    """
+    Save the text and fields of a parse; ``extracted`` is false when the
+    text came from the store, keeping its extraction time.
+    """
+    now = timezone.now()
+    defaults = {'fields': fields, 'parser_version': parser_version, 'parsed_at': now}
+    if extracted:
+        defaults.update(text=compress_text(text), text_length=len(text),
+                        extractor_version=EXTRACTOR_VERSION, extracted_at=now)
+        ParsedCV.objects.update_or_create(cv_upload_id=cv_upload_id, defaults=defaults)
+    else:
+        ParsedCV.objects.filter(cv_upload_id=cv_upload_id).update(**defaults)
+
+
+def reparse(batch_size=500, force=False, limit=None):
+    """
+    Rerun structured extraction on the stored text of uploads parsed by an
+    older parser (all of them if ``force``), at most ``limit``, updating
+    their fields and candidates. Each batch commits on its own. Text from
+    an older extractor is used as stored (parsing the upload again
+    re-extracts it). Returns counts of reparsed uploads and updated
+    candidates.
+    """
+    # ai imports this module
+    from .ai import PARSER_VERSION, extract_cv_fields
+
+    queryset = ParsedCV.objects.order_by('cv_upload_id')
+    if not force:
+        queryset = queryset.filter(parser_version__lt=PARSER_VERSION)
+    counts = {'reparsed': 0, 'candidates_updated': 0}
+    last_id = 0
+    while limit is None or counts['reparsed'] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - counts['reparsed'])
+        batch = list(queryset.filter(cv_upload_id__gt=last_id)[:size])
+        if not batch:
+            break
+        last_id = batch[-1].cv_upload_id
+
+        now = timezone.now()
+        for parsed in batch:
+            parsed.fields = extract_cv_fields(decompress_text(parsed.text))
+            parsed.parser_version = PARSER_VERSION
+            parsed.parsed_at = now
+        fields_by_upload = {parsed.cv_upload_id: parsed.fields for parsed in batch}
+
+        with transaction.atomic(using=current_database()):
+            ParsedCV.objects.bulk_update(batch, ['fields', 'parser_version', 'parsed_at'])
+            candidates = list(Candidate.objects.filter(source_cv_id__in=fields_by_upload).select_for_update())
+            changed = []
+            for candidate in candidates:
+                fields = fields_by_upload[candidate.source_cv_id]
+                values = {name: fields[name] for name in CANDIDATE_FIELDS if name in fields}
+                if any(getattr(candidate, name) != value for name, value in values.items()):
+                    for name, value in values.items():
+                        setattr(candidate, name, value)
+                    candidate.updated_at = now
+                    changed.append(candidate)
+            if changed:
+                Candidate.objects.bulk_update(changed, [*CANDIDATE_FIELDS, 'updated_at'])
+                # bulk_update skips the save signals
+                if summary_enabled():
+                    sync_names(Candidate, [candidate.pk for candidate in changed])
+        if changed:
+            invalidate_models(Candidate)
+        counts['reparsed'] += len(batch)
+        counts['candidates_updated'] += len(changed)
+    return counts
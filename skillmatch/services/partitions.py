@@ -0,0 +1,55 @@
+"""
+Hash partitions of the match table.
+
+``skillmatch_match`` is partitioned by HASH (``job_id``) into a fixed number
+of ``PARTITIONS`` (migration 0007), each holding the matches of a share of
+the jobs. Queries filtered by job touch a single partition, while the rest
+(the match list, retention and summary upkeep) plan and scan the same few
+partitions however many jobs there are. Creating or deleting a job runs no
+DDL, so it never locks the match table.
+
+Rematching a job deletes and reloads its rows in one transaction, within
+its partition.
+"""
+from django.db import connections, transaction
+
+from ..core.tenancy import current_database
+from ..models import Job, Match, MatchSummary
+from .summary import refresh_summary, summary_enabled
+
+
+# Mirrors the count frozen in migration 0007; changing it takes a migration rebuilding the table
+PARTITIONS = 16
+
+
+def partition_names():
+    """Return the names of the match table partitions."""
+    with connections[current_database()].cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass AND c.relkind = 'r'
+        """, [Match._meta.db_table])
+        return {name for name, in cursor.fetchall()}
+
+
+def replace_job_matches(job_id, candidate_ids, scores, rationales):
+    """
+    Replace all matches of ``job_id`` by the given pairs: its rows are
+    deleted and reloaded in one transaction, so readers see either the old
+    or the new matches. Reloaded matches get new ids. Returns the number of
+    matches stored.
+    """
+    with transaction.atomic(using=current_database()), connections[current_database()].cursor() as cursor:
+        # Both statements are pruned to the job's partition
+        cursor.execute(f"DELETE FROM {Match._meta.db_table} WHERE job_id = %s", [int(job_id)])
+        cursor.execute(f"""
+            INSERT INTO {Match._meta.db_table} (tenant_id, candidate_id, job_id, score, rationale, matched_at)
+            SELECT (SELECT tenant_id FROM {Job._meta.db_table} WHERE id = %s), candidate_id, %s, score, rationale, now()
+            FROM unnest(%s::bigint[], %s::double precision[], %s::text[]) AS pairs (candidate_id, score, rationale)
+        """, [int(job_id), int(job_id), list(candidate_ids), list(scores), list(rationales)])
+        stored = cursor.rowcount
+        # Raw SQL skips the ORM cascade
+        MatchSummary.objects.filter(job_id=job_id).delete()
+        if summary_enabled():
+            refresh_summary(job_ids=[job_id])
+    return stored
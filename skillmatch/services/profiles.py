@@ -0,0 +1,368 @@
+"""
+Compact in-memory read model for matching.
+
+Candidates and jobs are held as column arrays (ids, experience, active flag)
+plus one packed skill bitset per row over a shared skill vocabulary, instead
+of Django model instances and serialized dicts. Skill overlap between a job
+and every candidate then becomes a vectorized AND + popcount. At a few
+thousand distinct skills a candidate costs well under 1 KB (mostly the id
+lookup dict), so a million candidates fit in a few hundred MB.
+"""
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from ..core.tenancy import current_tenant
+from ..models import Candidate, Job
+
+
+WORD_BITS = 64
+LOAD_CHUNK_SIZE = 10000
+# Re-read rows stamped slightly before the last refresh, in case their
+# transaction committed after it; re-ingesting a row is idempotent.
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(values):
+        """Number of set bits in each element of a uint64 array."""
+        return np.bitwise_count(values)
+else:  # numpy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(values):
+        """Number of set bits in each element of a uint64 array."""
+        as_bytes = values.view(np.uint8).reshape(values.shape + (8,))
+        return _BYTE_COUNTS[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+class SkillVocabulary:
+    """
+    Maps skill strings to bit positions. Grows as new skills are seen.
+
+    Skills are compared exactly, like the set intersection in
+    ``rank_candidate``.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.names = []
+        # Derived per-skill data (e.g. semantic vectors), keyed by producer
+        self.embeddings = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def words(self):
+        """Number of uint64 words needed per bitset."""
+        return max((len(self.positions) + WORD_BITS - 1) // WORD_BITS, 1)
+
+    def bits(self, skills):
+        """Return the bit positions of ``skills``, registering new ones."""
+        positions = self.positions
+        result = []
+        for skill in skills:
+            position = positions.get(skill)
+            if position is None:
+                position = positions[skill] = len(positions)
+                self.names.append(skill)
+            result.append(position)
+        return result
+
+    def lookup(self, skills):
+        """Return the bit positions of known ``skills`` without registering."""
+        return [self.positions[skill] for skill in skills if skill in self.positions]
+
+
+def pack(positions, words):
+    """Pack bit positions into a uint64 bitset of ``words`` words."""
+    bitset = np.zeros(words, dtype=np.uint64)
+    for position in positions:
+        bitset[position // WORD_BITS] |= np.uint64(1) << np.uint64(position % WORD_BITS)
+    return bitset
+
+
+def bit_columns(bits, positions):
+    """
+    Return a boolean ``(rows, len(positions))`` matrix telling which rows of
+    ``bits`` have each bit position set.
+    """
+    positions = np.asarray(positions, dtype=np.uint64)
+    words = (positions // np.uint64(WORD_BITS)).astype(np.intp)
+    shifts = positions % np.uint64(WORD_BITS)
+    return ((bits[:, words] >> shifts) & np.uint64(1)).astype(bool)
+
+
+class JobTerms:
+    """
+    Scoring inputs of one job beyond its required-skill bitset: bit
+    positions of required and nice-to-have skills, weights per position
+    and the minimum experience.
+    """
+    __slots__ = ('required', 'nice_to_have', 'weights', 'min_experience')
+
+    def __init__(self, required, nice_to_have=(), weights=None, min_experience=0):
+        self.required = sorted(set(required))
+        required_set = set(self.required)
+        self.nice_to_have = sorted(set(nice_to_have) - required_set)
+        self.weights = weights or {}
+        self.min_experience = min_experience
+
+    @classmethod
+    def from_skills(cls, vocabulary, requirements, nice_to_have=(), skill_weights=None, min_experience=0):
+        """Build terms from skill names, registering them in ``vocabulary``."""
+        required = vocabulary.bits(requirements or [])
+        optional = vocabulary.bits(nice_to_have or [])
+        # Weights of skills the job does not list are ignored
+        weights = {
+            vocabulary.positions[skill]: float(weight)
+            for skill, weight in (skill_weights or {}).items()
+            if skill in (requirements or []) or skill in (nice_to_have or [])
+        }
+        return cls(required, optional, weights, min_experience or 0)
+
+
+class ProfileTable:
+    """
+    Column store for one entity kind (candidates or jobs).
+
+    Rows are appended or updated in place; removal swaps the last row into
+    the freed slot, so row order is not stable but ``row_of`` always is.
+    """
+
+    def __init__(self, words=1):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.experience = np.zeros(0, dtype=np.int32)
+        self.active = np.zeros(0, dtype=bool)
+        self.skill_counts = np.zeros(0, dtype=np.int32)
+        self.bits = np.zeros((0, words), dtype=np.uint64)
+        self._rows = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the column arrays (excluding the id map)."""
+        return sum(column[:self._size].nbytes for column in self._columns())
+
+    def _columns(self):
+        return [self.ids, self.experience, self.active, self.skill_counts, self.bits]
+
+    def row_of(self, entity_id):
+        """Return the row of ``entity_id`` or None."""
+        return self._rows.get(entity_id)
+
+    def view(self):
+        """Return the live slices of the column arrays as a dict."""
+        n = self._size
+        return {
+            'ids': self.ids[:n],
+            'experience': self.experience[:n],
+            'active': self.active[:n],
+            'skill_counts': self.skill_counts[:n],
+            'bits': self.bits[:n],
+        }
+
+    def widen(self, words):
+        """Grow the bitsets to ``words`` words (after the vocabulary grew)."""
+        current = self.bits.shape[1]
+        if words > current:
+            extra = np.zeros((self.bits.shape[0], words - current), dtype=np.uint64)
+            self.bits = np.hstack([self.bits, extra])
+
+    def _reserve(self, capacity):
+        if capacity <= len(self.ids):
+            return
+        capacity = max(capacity, len(self.ids) * 2, 1024)
+        for name in ('ids', 'experience', 'active', 'skill_counts'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+        bits = np.zeros((capacity, self.bits.shape[1]), dtype=np.uint64)
+        bits[:self._size] = self.bits[:self._size]
+        self.bits = bits
+
+    def upsert(self, entity_id, positions, experience, active):
+        """Insert or update one row from its skill bit positions."""
+        row = self._rows.get(entity_id)
+        if row is None:
+            self._reserve(self._size + 1)
+            row = self._size
+            self._rows[entity_id] = row
+            self._size += 1
+        words = self.bits.shape[1]
+        unique_positions = set(positions)
+        self.ids[row] = entity_id
+        self.experience[row] = experience
+        self.active[row] = active
+        self.skill_counts[row] = len(unique_positions)
+        self.bits[row] = pack(unique_positions, words)
+
+    def remove(self, entity_id):
+        """Remove ``entity_id`` if present."""
+        row = self._rows.pop(entity_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            for column in self._columns():
+                column[row] = column[last]
+            self._rows[int(self.ids[row])] = row
+        self._size = last
+
+
+class MatchIndex:
+    """
+    Candidates and jobs of one tenant as ``ProfileTable``s over one skill
+    vocabulary.
+
+    Build it with ``MatchIndex.load()`` and keep it current with
+    ``refresh()``, which only reads rows whose ``updated_at`` moved.
+    """
+
+    def __init__(self, tenant_id=None):
+        self.tenant_id = tenant_id
+        self.vocabulary = SkillVocabulary()
+        self.candidates = ProfileTable()
+        self.jobs = ProfileTable()
+        self.job_terms = {}
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, tenant_id=None):
+        """Build an index of the candidates and jobs of a tenant (None: without a tenant)."""
+        index = cls(tenant_id)
+        index.refresh()
+        return index
+
+    def _ingest(self, table, rows):
+        count = 0
+        for entity_id, skills, experience, status in rows:
+            positions = self.vocabulary.bits(skills or [])
+            words = self.vocabulary.words
+            if words > self.candidates.bits.shape[1] or words > self.jobs.bits.shape[1]:
+                self.candidates.widen(words)
+                self.jobs.widen(words)
+            table.upsert(entity_id, positions, experience, status == 'active')
+            count += 1
+        return count
+
+    def _ingest_jobs(self, rows):
+        terms = {}
+
+        def required_rows():
+            for job_id, requirements, nice_to_have, skill_weights, min_experience, status in rows:
+                terms[job_id] = JobTerms.from_skills(
+                    self.vocabulary, requirements, nice_to_have, skill_weights, min_experience)
+                # The experience column holds the job's minimum
+                yield job_id, requirements, min_experience, status
+
+        count = self._ingest(self.jobs, required_rows())
+        self.job_terms.update(terms)
+        return count
+
+    def refresh(self, prune=False):
+        """
+        Load rows changed since the last refresh.
+
+        ``prune`` also drops rows deleted from the database, which needs a
+        scan of all ids; soft deletion through ``status`` is picked up
+        without it. Returns the number of rows read.
+        """
+        with self._lock:
+            started = timezone.now()
+            candidates = Candidate.objects.filter(tenant_id=self.tenant_id)
+            jobs = Job.objects.filter(tenant_id=self.tenant_id)
+            if self.refreshed_at is not None:
+                since = self.refreshed_at - REFRESH_OVERLAP
+                candidates = candidates.filter(updated_at__gte=since)
+                jobs = jobs.filter(updated_at__gte=since)
+
+            changed = self._ingest(self.candidates, candidates.values_list(
+                'id', 'skills', 'experience_years', 'status').iterator(chunk_size=LOAD_CHUNK_SIZE))
+            changed += self._ingest_jobs(jobs.values_list(
+                'id', 'requirements', 'nice_to_have', 'skill_weights', 'min_experience_years', 'status'
+            ).iterator(chunk_size=LOAD_CHUNK_SIZE))
+
+            if prune and self.refreshed_at is not None:
+                self._prune(self.candidates, Candidate)
+                self._prune(self.jobs, Job)
+            self.refreshed_at = started
+            return changed
+
+    def _prune(self, table, model):
+        existing = set(model.objects.filter(tenant_id=self.tenant_id).values_list('id', flat=True)
+                       .iterator(chunk_size=LOAD_CHUNK_SIZE))
+        for entity_id in [int(entity_id) for entity_id in table.view()['ids'] if entity_id not in existing]:
+            table.remove(entity_id)
+            if table is self.jobs:
+                self.job_terms.pop(entity_id, None)
+
+    def overlap(self, job_id):
+        """
+        Return ``(candidate_rows, overlap_counts)`` for the active candidates
+        against job ``job_id``.
+        """
+        row = self.jobs.row_of(job_id)
+        if row is None:
+            raise KeyError(job_id)
+        candidates = self.candidates.view()
+        rows = np.flatnonzero(candidates['active'])
+        job_bits = self.jobs.bits[row]
+        counts = popcount(candidates['bits'][rows] & job_bits).sum(axis=1, dtype=np.int32)
+        return rows, counts
+
+    def overlap_scores(self, job_id):
+        """
+        Score every active candidate against job ``job_id`` with the
+        ``rank_candidate`` formula: matched requirements over requirements,
+        scaled to 0-100. Returns ``(candidate_ids, overlap_counts, scores)``.
+        """
+        rows, counts = self.overlap(job_id)
+        required = int(self.jobs.skill_counts[self.jobs.row_of(job_id)])
+        if required:
+            scores = np.minimum(counts / required * 100, 100.0)
+        else:
+            scores = np.zeros(len(rows), dtype=np.float64)
+        return self.candidates.ids[rows], counts, scores
+
+    def document_frequency(self, skills):
+        """
+        Return ``({skill: active candidates having it}, active candidates)``.
+        Unknown skills have a frequency of 0.
+        """
+        candidates = self.candidates.view()
+        bits = candidates['bits'][candidates['active']]
+        known = [skill for skill in skills if skill in self.vocabulary.positions]
+        counts = bit_columns(bits, self.vocabulary.lookup(known)).sum(axis=0) if known else []
+        frequency = dict.fromkeys(skills, 0)
+        frequency.update(zip(known, (int(count) for count in counts)))
+        return frequency, len(bits)
+
+
+# Tenant id: MatchIndex
+_match_indexes = {}
+_match_index_lock = threading.Lock()
+
+
+def get_match_index(refresh=True, prune=False):
+    """
+    Return the process-wide ``MatchIndex`` of the current tenant, loading
+    it on first use and refreshing it incrementally afterwards.
+    """
+    tenant = current_tenant()
+    tenant_id = tenant.pk if tenant is not None else None
+    with _match_index_lock:
+        index = _match_indexes.get(tenant_id)
+        if index is None:
+            index = _match_indexes[tenant_id] = MatchIndex.load(tenant_id)
+            return index
+    if refresh:
+        index.refresh(prune=prune)
+    return index
@@ -0,0 +1,223 @@
+"""
+Match retention.
+
+Only useful matches are stored. Batch matching (runs and job rematches)
+skips pairs scoring below ``MIN_SCORE`` and keeps at most ``TOP_N_PER_JOB``
+matches per job, deleting stored matches that fall out. ``prune_matches``
+(``manage.py prune_matches``) deletes the matches of inactive candidates and
+jobs, and any stored matches outside the policy, in batches of
+``BATCH_SIZE`` rows, each its own short transaction, so pruning never holds
+locks for long.
+
+Configured through ``settings.SKILLMATCH_RETENTION``; by default every
+match is kept.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+
+from ..core.cache import invalidate_models
+from ..core.tenancy import current_database
+from ..models import Candidate, Job, Match, MatchSummary
+
+
+DEFAULTS = {
+    'MIN_SCORE': None,  # Scores below this are not stored; None stores all
+    'TOP_N_PER_JOB': None,  # None keeps every match of a job
+    'BATCH_SIZE': 5000,  # Rows deleted per pruning statement
+    'PAUSE': 0.0,  # Seconds between pruning batches
+}
+
+
+def get_retention_settings():
+    """Return ``settings.SKILLMATCH_RETENTION`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_RETENTION', {})}
+
+
+class RetentionPolicy:
+    """
+    Decides which scored pairs of a matching run are stored.
+
+    Keeps, per job, the best ``top_n`` scores seen so far, so pairs that
+    can no longer make a job's top N are skipped while candidates are
+    still being scored shard by shard; ``trim`` enforces the exact cap at
+    the end.
+    """
+
+    def __init__(self, min_score=None, top_n=None):
+        self.min_score = min_score
+        self.top_n = top_n
+        self._best = {}
+
+    @classmethod
+    def from_settings(cls):
+        config = get_retention_settings()
+        return cls(config['MIN_SCORE'], config['TOP_N_PER_JOB'])
+
+    @property
+    def active(self):
+        return self.min_score is not None or self.top_n is not None
+
+    def keep(self, job_id, scores):
+        """Boolean mask of the ``scores`` of ``job_id`` worth storing."""
+        scores = np.asarray(scores, dtype=np.float64)
+        keep = np.ones(len(scores), dtype=bool)
+        if self.min_score is not None:
+            keep &= scores >= self.min_score
+        if self.top_n is not None:
+            best = np.concatenate([self._best.get(job_id, np.empty(0)), scores[keep]])
+            if len(best) > self.top_n:
+                best = -np.partition(-best, self.top_n - 1)[:self.top_n]
+                # Ties with the N-th best score are kept; trim breaks them
+                keep &= scores >= best.min()
+            self._best[job_id] = best
+        return keep
+
+    def select(self, candidate_ids, scores):
+        """
+        Indices of the pairs to store out of all scores of one job, best
+        first, with ties at the cut broken by candidate id.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        order = np.lexsort((np.asarray(candidate_ids), -scores))
+        if self.min_score is not None:
+            order = order[scores[order] >= self.min_score]
+        if self.top_n is not None:
+            order = order[:self.top_n]
+        return order
+
+
+def _delete(cursor, where, params):
+    """
+    Delete the matches selected by ``where`` (with ``m`` as the match
+    table) and their summary rows; returns the count.
+    """
+    cursor.execute(f"""
+        WITH deleted AS (
+            DELETE FROM {Match._meta.db_table} m
+            WHERE {where}
+            RETURNING m.id
+        ), cleared AS (
+            DELETE FROM {MatchSummary._meta.db_table} WHERE match_id IN (SELECT id FROM deleted)
+        )
+        SELECT count(*) FROM deleted
+    """, params)
+    return cursor.fetchone()[0]
+
+
+def delete_unkept(first_candidate_id, last_candidate_id, job_ids, kept_candidate_ids, kept_job_ids):
+    """
+    Delete the stored matches of ``job_ids`` with candidates in the given id
+    range, except the kept (candidate, job) pairs. Only rows that exist are
+    visited, so this stays cheap when most scored pairs were dropped.
+    """
+    with connections[current_database()].cursor() as cursor:
+        return _delete(cursor, """
+            m.candidate_id BETWEEN %s AND %s AND m.job_id = ANY(%s) AND NOT EXISTS (
+                SELECT 1 FROM unnest(%s::bigint[], %s::bigint[]) AS kept (candidate_id, job_id)
+                WHERE kept.candidate_id = m.candidate_id AND kept.job_id = m.job_id
+            )
+        """, [first_candidate_id, last_candidate_id, list(job_ids), list(kept_candidate_ids), list(kept_job_ids)])
+
+
+def trim(job_id, top_n, batch_size=None, pause=0.0):
+    """
+    Delete the matches of ``job_id`` ranked below ``top_n`` (by score, then
+    candidate id); returns the count.
+
+    The match ranked ``top_n`` is looked up once, and the rows ordered after
+    it are deleted in one statement, or with ``batch_size``, in statements
+    of at most that many rows.
+    """
+    table = Match._meta.db_table
+    below, params = "job_id = %s", [job_id]
+    if top_n > 0:
+        with connections[current_database()].cursor() as cursor:
+            cursor.execute(f"""
+                SELECT score, candidate_id FROM {table} WHERE job_id = %s
+                ORDER BY score DESC, candidate_id OFFSET %s LIMIT 1
+            """, [job_id, top_n - 1])
+            boundary = cursor.fetchone()
+        if boundary is None:
+            return 0
+        score, candidate_id = boundary
+        below += " AND (score < %s OR (score = %s AND candidate_id > %s))"
+        params += [score, score, candidate_id]
+
+    if batch_size is None:
+        with connections[current_database()].cursor() as cursor:
+            return _delete(cursor, f"m.id IN (SELECT id FROM {table} WHERE {below}) AND m.job_id = %s",
+                           [*params, job_id])
+
+    def delete_batch():
+        with connections[current_database()].cursor() as cursor:
+            return _delete(cursor, f"m.id IN (SELECT id FROM {table} WHERE {below} LIMIT %s) AND m.job_id = %s",
+                           [*params, batch_size, job_id])
+    return _batches(delete_batch, pause)
+
+
+def _batches(delete, pause):
+    """Call ``delete()`` until it deletes nothing; returns the total."""
+    total = 0
+    while True:
+        deleted = delete()
+        total += deleted
+        if not deleted:
+            return total
+        invalidate_models(Match)
+        if pause:
+            time.sleep(pause)
+
+
+def prune_matches(batch_size=None, pause=None, min_score=None, top_n=None):
+    """
+    Delete matches of inactive candidates and jobs, and stored matches
+    outside the retention policy (arguments default to the settings).
+
+    Each statement deletes at most ``batch_size`` rows in its own
+    transaction. Call outside of a transaction.
+    Returns the counts deleted per reason.
+    """
+    config = get_retention_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+    pause = config['PAUSE'] if pause is None else pause
+    min_score = config['MIN_SCORE'] if min_score is None else min_score
+    top_n = config['TOP_N_PER_JOB'] if top_n is None else top_n
+    counts = {'inactive_jobs': 0, 'inactive_candidates': 0, 'below_min_score': 0, 'over_top_n': 0}
+    table = Match._meta.db_table
+
+    for job_id in list(Job.objects.filter(status='inactive').values_list('id', flat=True)):
+        def delete_job_batch():
+            with connections[current_database()].cursor() as cursor:
+                return _delete(cursor, f"""
+                    m.job_id = %s AND m.id IN (SELECT id FROM {table} WHERE job_id = %s LIMIT %s)
+                """, [job_id, job_id, batch_size])
+        counts['inactive_jobs'] += _batches(delete_job_batch, pause)
+
+    def delete_candidate_batch():
+        with connections[current_database()].cursor() as cursor:
+            return _delete(cursor, f"""
+                (m.id, m.job_id) IN (
+                    SELECT id, job_id FROM {table}
+                    WHERE candidate_id IN (SELECT id FROM {Candidate._meta.db_table} WHERE status = 'inactive')
+                    LIMIT %s
+                )
+            """, [batch_size])
+    counts['inactive_candidates'] = _batches(delete_candidate_batch, pause)
+
+    if min_score is not None or top_n is not None:
+        for job_id in list(Job.objects.filter(status='active').values_list('id', flat=True)):
+            if min_score is not None:
+                def delete_low_batch():
+                    with connections[current_database()].cursor() as cursor:
+                        return _delete(cursor, f"""
+                            m.job_id = %s AND m.id IN (
+                                SELECT id FROM {table} WHERE job_id = %s AND score < %s LIMIT %s
+                            )
+                        """, [job_id, job_id, min_score, batch_size])
+                counts['below_min_score'] += _batches(delete_low_batch, pause)
+            if top_n is not None:
+                counts['over_top_n'] += trim(job_id, top_n, batch_size, pause)
+    return counts
@@ -0,0 +1,387 @@
+"""
+Pluggable match scoring.
+
+A scorer rates all candidates of a ``ScoringBatch`` against one job at once
+and returns fractions in [0, 1]. The ``ScoringEngine`` combines the
+configured scorers as a weighted mean scaled to 0-100. Scorers only see
+column arrays (skill bitsets, experience), so adding one does not bring
+back a Python loop per candidate-job pair. Rationales are built the same
+way: from count arrays, formatting each distinct text once.
+
+Configured through ``settings.SKILLMATCH_SCORING``::
+
+    SKILLMATCH_SCORING = {
+        "SCORERS": [
+            {"class": "skillmatch.services.scoring.WeightedSkillScorer", "weight": 3},
+            {"class": "skillmatch.services.scoring.ExperienceFitScorer", "weight": 1,
+             "options": {"exponent": 2}},
+        ],
+    }
+
+The default is ``SkillOverlapScorer`` alone, i.e. the original formula.
+"""
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .profiles import JobTerms, SkillVocabulary, bit_columns, pack, popcount
+
+
+DEFAULT_SCORERS = [
+    {'class': 'skillmatch.services.scoring.SkillOverlapScorer', 'weight': 1.0},
+]
+
+
+def skill_overlap_rationale(matched, required) -> str:
+    """
+    Rationale text for a skill overlap score, shared with batch matching.
+    """
+    return f'Candidate has {matched} of {required} required skills'
+
+
+def render_counts(counts, template):
+    """
+    ``template(count)`` for each of ``counts`` as an object array, formatted
+    once per distinct count rather than once per pair.
+    """
+    values, inverse = np.unique(np.asarray(counts, dtype=np.int64), return_inverse=True)
+    texts = np.empty(len(values), dtype=object)
+    texts[:] = [template(int(value)) for value in values]
+    return texts[inverse]
+
+
+class ScoringBatch:
+    """
+    Candidates as column arrays plus the terms of one job.
+
+    ``frequency`` optionally supplies ``({position: candidates having it},
+    population)`` for rarity weighting; by default both are computed from
+    the batch's own candidates (or those of the batch it is a subset of).
+    ``cache`` is free for scorers to keep per-batch intermediate results.
+    """
+
+    def __init__(self, candidate_ids, candidate_bits, candidate_experience, terms,
+                 vocabulary=None, frequency=None, population=None):
+        self.candidate_ids = candidate_ids
+        self.candidate_bits = candidate_bits
+        self.candidate_experience = candidate_experience
+        self.terms = terms
+        self.vocabulary = vocabulary
+        self.cache = {}
+        self._frequency = frequency
+        self._population = population
+        self._matched_required = None
+        self._has_skills = {}
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    @classmethod
+    def for_job(cls, index, job_id, rows=None, frequency=None):
+        """
+        Batch of the candidates of ``index`` at ``rows`` (default: all
+        active ones) against job ``job_id``.
+        """
+        terms = index.job_terms.get(job_id)
+        if terms is None:
+            raise KeyError(job_id)
+        candidates = index.candidates.view()
+        if rows is None:
+            rows = np.flatnonzero(candidates['active'])
+        return cls(
+            candidates['ids'][rows],
+            candidates['bits'][rows],
+            candidates['experience'][rows],
+            terms,
+            index.vocabulary,
+            frequency,
+        )
+
+    @staticmethod
+    def index_frequency(index, job_id):
+        """
+        Document frequencies of a job's skills over all active candidates of
+        ``index``, in the ``frequency`` format, for batches of a subset.
+        """
+        terms = index.job_terms[job_id]
+        positions = terms.required + terms.nice_to_have
+        counts, population = index.document_frequency([index.vocabulary.names[p] for p in positions])
+        return {index.vocabulary.positions[skill]: count for skill, count in counts.items()}, population
+
+    @classmethod
+    def from_pair(cls, candidate_data, job_data, document_frequency=None):
+        """
+        Batch of one candidate and one job given as serialized dicts.
+
+        ``document_frequency`` is ``({skill: count}, population)`` as
+        returned by ``MatchIndex.document_frequency``.
+        """
+        vocabulary = SkillVocabulary()
+        terms = JobTerms.from_skills(
+            vocabulary,
+            job_data.get('requirements', []),
+            job_data.get('nice_to_have', []),
+            job_data.get('skill_weights', {}),
+            job_data.get('min_experience_years', 0),
+        )
+        positions = vocabulary.bits(candidate_data.get('skills', []))
+        frequency = None
+        if document_frequency is not None:
+            counts, population = document_frequency
+            frequency = ({vocabulary.positions[skill]: count for skill, count in counts.items()
+                          if skill in vocabulary.positions}, population)
+        return cls(
+            np.zeros(1, dtype=np.int64),
+            pack(positions, vocabulary.words)[np.newaxis, :],
+            np.array([candidate_data.get('experience_years') or 0], dtype=np.int32),
+            terms,
+            vocabulary,
+            frequency,
+        )
+
+    def subset(self, rows):
+        """
+        Batch of the candidates at ``rows``; document frequencies still
+        refer to this batch's candidates.
+        """
+        return ScoringBatch(
+            self.candidate_ids[rows],
+            self.candidate_bits[rows],
+            self.candidate_experience[rows],
+            self.terms,
+            self.vocabulary,
+            self._frequency,
+            self._population or self,
+        )
+
+    @property
+    def matched_required(self):
+        """Number of required skills each candidate has."""
+        if self._matched_required is None:
+            job_bits = pack(self.terms.required, self.candidate_bits.shape[1])
+            self._matched_required = popcount(self.candidate_bits & job_bits).sum(axis=1, dtype=np.int32)
+        return self._matched_required
+
+    def has_skills(self, positions):
+        """Boolean ``(candidates, len(positions))`` matrix, cached per batch."""
+        key = tuple(positions)
+        if key not in self._has_skills:
+            self._has_skills[key] = bit_columns(self.candidate_bits, positions)
+        return self._has_skills[key]
+
+    def document_frequency(self, positions):
+        """
+        Return ``(counts, population)``: how many candidates have each of
+        ``positions``, out of how many.
+        """
+        if self._frequency is not None:
+            counts, population = self._frequency
+            return np.array([counts.get(position, 0) for position in positions], dtype=np.float64), population
+        if self._population is not None:
+            return self._population.document_frequency(positions)
+        return self.has_skills(positions).sum(axis=0).astype(np.float64), len(self)
+
+
+class Scorer:
+    """
+    Base class for scorers.
+
+    ``score_batch`` returns one fraction in [0, 1] per candidate of the
+    batch. ``rationales`` may return a short explanation for each of the
+    candidates at ``rows`` (an object array), or None; scorers which only
+    implement ``rationale`` for one candidate are called once per row.
+    Constructor keyword arguments come from the scorer's ``options``.
+    """
+    # Whether scoring a single pair needs candidate statistics (see rank_candidate)
+    needs_population = False
+
+    def score_batch(self, batch):
+        raise NotImplementedError
+
+    def rationale(self, batch, row):
+        return None
+
+    def rationales(self, batch, rows):
+        texts = [self.rationale(batch, row) for row in rows]
+        if not any(texts):
+            return None
+        array = np.empty(len(texts), dtype=object)
+        array[:] = [text or '' for text in texts]
+        return array
+
+
+class SkillOverlapScorer(Scorer):
+    """
+    Share of the required skills the candidate has. This is the original
+    ``rank_candidate`` formula.
+    """
+
+    def score_batch(self, batch):
+        required = len(batch.terms.required)
+        if not required:
+            return np.zeros(len(batch), dtype=np.float64)
+        return batch.matched_required / required
+
+    def rationales(self, batch, rows):
+        required = len(batch.terms.required)
+        return render_counts(batch.matched_required[rows], lambda matched: skill_overlap_rationale(matched, required))
+
+
+class WeightedSkillScorer(Scorer):
+    """
+    Weighted coverage of must-have and nice-to-have skills.
+
+    Each skill weighs its ``Job.skill_weights`` entry (default 1); nice-to-have
+    skills are further multiplied by ``nice_to_have_weight``. Candidates
+    missing any must-have skill have their score multiplied by
+    ``missing_must_have_factor`` (1 means no penalty, 0 excludes them).
+    """
+
+    def __init__(self, nice_to_have_weight=0.5, missing_must_have_factor=1.0):
+        self.nice_to_have_weight = nice_to_have_weight
+        self.missing_must_have_factor = missing_must_have_factor
+
+    def score_batch(self, batch):
+        terms = batch.terms
+        positions = terms.required + terms.nice_to_have
+        if not positions:
+            return np.zeros(len(batch), dtype=np.float64)
+        weights = np.array([terms.weights.get(position, 1.0) for position in positions])
+        weights[len(terms.required):] *= self.nice_to_have_weight
+        total = weights.sum()
+        if total <= 0:
+            return np.zeros(len(batch), dtype=np.float64)
+
+        has = batch.has_skills(positions)
+        scores = has @ weights / total
+        if self.missing_must_have_factor != 1.0 and terms.required:
+            missing = batch.matched_required < len(terms.required)
+            scores = np.where(missing, scores * self.missing_must_have_factor, scores)
+        return scores
+
+    def rationales(self, batch, rows):
+        terms = batch.terms
+        required, nice_to_have = len(terms.required), len(terms.nice_to_have)
+        must = batch.matched_required[rows]
+        if not nice_to_have:
+            return render_counts(must, lambda matched: f'{matched} of {required} must-have skills')
+        # Both counts in one key, so each combination is formatted once
+        nice = batch.has_skills(terms.nice_to_have).sum(axis=1)[rows]
+        return render_counts(must * (nice_to_have + 1) + nice, lambda key: (
+            f'{key // (nice_to_have + 1)} of {required} must-have skills, '
+            f'{key % (nice_to_have + 1)} of {nice_to_have} nice-to-have skills'))
+
+
+class ExperienceFitScorer(Scorer):
+    """
+    How well experience meets ``Job.min_experience_years``.
+
+    Candidates at or above the minimum (less ``grace_years``) score 1; below
+    it the score follows ``(years / minimum) ** exponent``, so an exponent
+    above 1 penalizes shortfalls more steeply.
+    """
+
+    def __init__(self, exponent=1.0, grace_years=0):
+        self.exponent = exponent
+        self.grace_years = grace_years
+
+    def score_batch(self, batch):
+        minimum = batch.terms.min_experience
+        if minimum <= 0:
+            return np.ones(len(batch), dtype=np.float64)
+        years = batch.candidate_experience.astype(np.float64)
+        ratio = np.clip(years / minimum, 0.0, 1.0)
+        return np.where(years + self.grace_years >= minimum, 1.0, ratio ** self.exponent)
+
+    def rationales(self, batch, rows):
+        minimum = batch.terms.min_experience
+        if minimum <= 0:
+            return None
+        return render_counts(batch.candidate_experience[rows],
+                             lambda years: f'{years} of {minimum} years of experience')
+
+
+class RarityScorer(Scorer):
+    """
+    Required-skill coverage weighted by inverse document frequency, so
+    matching a skill few candidates have counts more than a common one.
+
+    Frequencies are taken over the active candidates (smoothed IDF,
+    ``log((1 + n) / (1 + df)) + 1``).
+    """
+    needs_population = True
+
+    def score_batch(self, batch):
+        positions = batch.terms.required
+        if not positions:
+            return np.zeros(len(batch), dtype=np.float64)
+        counts, population = batch.document_frequency(positions)
+        idf = np.log((1 + population) / (1 + counts)) + 1
+        return batch.has_skills(positions) @ idf / idf.sum()
+
+
+class ScoringEngine:
+    """
+    Weighted mean of ``(scorer, weight)`` pairs, scaled to 0-100.
+    """
+
+    def __init__(self, scorers):
+        if not scorers:
+            raise ValueError("At least one scorer is required.")
+        self.scorers = list(scorers)
+        self.total_weight = sum(weight for _, weight in self.scorers)
+        if self.total_weight <= 0:
+            raise ValueError("Scorer weights must add up to a positive number.")
+
+    @classmethod
+    def from_config(cls, config):
+        """Build an engine from a list of ``{"class", "weight", "options"}`` dicts."""
+        scorers = []
+        for entry in config:
+            scorer_cls = import_string(entry['class'])
+            scorers.append((scorer_cls(**entry.get('options', {})), float(entry.get('weight', 1.0))))
+        return cls(scorers)
+
+    @property
+    def needs_population(self):
+        return any(scorer.needs_population for scorer, _ in self.scorers)
+
+    def score_batch(self, batch):
+        """Return the 0-100 score of every candidate in ``batch``."""
+        combined = sum(weight * scorer.score_batch(batch) for scorer, weight in self.scorers)
+        return np.minimum(combined / self.total_weight * 100, 100.0)
+
+    def rationales(self, batch, rows):
+        """Join the scorers' explanations for the candidates at ``rows``; returns a list."""
+        rows = np.asarray(rows, dtype=np.intp)
+        parts = [part for part in (scorer.rationales(batch, rows) for scorer, _ in self.scorers)
+                 if part is not None]
+        if not parts:
+            return [''] * len(rows)
+        joined = parts[0]
+        for part in parts[1:]:
+            joined = joined + '; ' + part
+        return joined.tolist()
+
+    def rationale(self, batch, row):
+        """Join the scorers' explanations for candidate ``row``."""
+        return self.rationales(batch, [row])[0]
+
+
+def get_scoring_engine():
+    """Return a ``ScoringEngine`` for ``settings.SKILLMATCH_SCORING``."""
+    config = getattr(settings, 'SKILLMATCH_SCORING', {})
+    return ScoringEngine.from_config(config.get('SCORERS') or DEFAULT_SCORERS)
+
+
+def score_pair(candidate_data, job_data, engine=None, document_frequency=None):
+    """
+    Score one candidate against one job (serialized dicts) with the same
+    scorers as batch matching; returns ``{'score', 'rationale'}``.
+    """
+    engine = engine or get_scoring_engine()
+    batch = ScoringBatch.from_pair(candidate_data, job_data, document_frequency)
+    return {
+        'score': float(engine.score_batch(batch)[0]),
+        'rationale': engine.rationale(batch, 0),
+    }
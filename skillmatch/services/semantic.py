@@ -0,0 +1,435 @@
+"""
+Semantic skill similarity.
+
+Skills are embedded locally on the CPU, without a model download:
+
+- a hashed bag of character trigrams, so spelling variants such as
+  "PostgreSQL" / "Postgres" or "React.js" / "ReactJS" land close together;
+- an acronym feature, so "ML" is close to "Machine Learning";
+- a co-occurrence term: each skill is nudged towards the skills it appears
+  with in candidate profiles and job requirements.
+
+``build_semantic_index()`` stores skill and candidate vectors as float32
+``.npy`` matrices plus an IVF (inverted file) index over the candidate
+vectors, in a ``VersionedDirectory``. Each tenant has an index of its own,
+so a job only retrieves candidates of its tenant. Workers memory-map the
+current version. In semantic mode ``match_candidates`` scores only the candidates
+the IVF index retrieves for each job, and ``SemanticSkillScorer`` counts a
+requirement as met when the candidate has a skill similar enough to it.
+"""
+import json
+import re
+import threading
+import zlib
+from array import array
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from ..core.storage import VersionedDirectory
+from ..core.tenancy import current_tenant, tenant_filter
+from ..models import Candidate, Job
+from .profiles import LOAD_CHUNK_SIZE, pack, popcount
+from .scoring import Scorer, render_counts
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'PATH': None,  # settings.BASE_DIR / 'var' / 'semantic'
+    'DIMENSIONS': 256,
+    'THRESHOLD': 0.75,
+    'CO_OCCURRENCE_WEIGHT': 0.25,
+    'TOP_K': 200,
+    'NPROBE': 8,
+    'LISTS': None,  # sqrt(candidates)
+}
+
+ACRONYM_WEIGHT = 6.0
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 100000
+ASSIGN_CHUNK_SIZE = 65536
+PROFILE_CHUNK_SIZE = 4096
+
+
+def get_semantic_settings():
+    """Return ``settings.SKILLMATCH_SEMANTIC`` merged over the defaults."""
+    config = {**DEFAULTS, **getattr(settings, 'SKILLMATCH_SEMANTIC', {})}
+    if config['PATH'] is None:
+        config['PATH'] = settings.BASE_DIR / 'var' / 'semantic'
+    return config
+
+
+def index_path(config):
+    """Directory of the current tenant's index versions."""
+    tenant = current_tenant()
+    if tenant is None:
+        return config['PATH']
+    return Path(config['PATH']) / 'tenants' / tenant.slug
+
+
+def normalize_skill(skill):
+    """Lowercase ``skill`` and reduce it to alphanumeric tokens (keeping + and #)."""
+    return re.sub(r'[^0-9a-z+#]+', ' ', skill.lower()).split()
+
+
+def skill_features(skill):
+    """Return the weighted features ``{name: weight}`` of one skill."""
+    # Version numbers and a "js" suffix do not change the skill
+    tokens = [token for token in normalize_skill(skill) if not token.isdigit()]
+    if len(tokens) > 1 and tokens[-1] == 'js':
+        tokens = tokens[:-1]
+    compact = ''.join(tokens)
+    if compact.endswith('js') and len(compact) > 4:
+        compact = compact[:-2]
+
+    features = {}
+    padded = f'<{compact}>'
+    for i in range(len(padded) - 2):
+        gram = f'g:{padded[i:i + 3]}'
+        features[gram] = features.get(gram, 0.0) + 1.0
+
+    if len(tokens) > 1 and all(len(token) <= 3 for token in tokens):
+        # Already an abbreviation, e.g. "CI/CD"
+        features[f'a:{compact}'] = ACRONYM_WEIGHT
+    elif len(tokens) > 1:
+        features[f"a:{''.join(token[0] for token in tokens)}"] = ACRONYM_WEIGHT
+    elif 1 < len(compact) <= 4 and compact.isalpha():
+        features[f'a:{compact}'] = ACRONYM_WEIGHT
+    return features
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def hash_skills(skills, dimensions):
+    """Embed ``skills`` with the hashed features only (unit float32 rows)."""
+    matrix = np.zeros((len(skills), dimensions), dtype=np.float32)
+    for row, skill in enumerate(skills):
+        for feature, weight in skill_features(skill).items():
+            digest = zlib.crc32(feature.encode('utf-8'))
+            matrix[row, digest % dimensions] += weight if (digest >> 16) & 1 else -weight
+    return _normalize_rows(matrix)
+
+
+def profile_sums(vectors_t, flat, offsets, chunk_size=PROFILE_CHUNK_SIZE):
+    """
+    Yield ``(start, stop, sums_t)``: for profiles ``start:stop`` the sum of
+    the vectors of their skills, in chunks to bound memory.
+
+    Works on transposed ``(dimensions, n)`` matrices: gathering columns
+    with ``take`` and reducing along the last axis is several times faster
+    than the row-wise equivalent.
+    """
+    profiles = len(offsets) - 1
+    for start in range(0, profiles, chunk_size):
+        stop = min(start + chunk_size, profiles)
+        bounds = offsets[start:stop + 1] - offsets[start]
+        values = vectors_t.take(flat[offsets[start]:offsets[stop]], axis=1)
+        sums = np.zeros((vectors_t.shape[0], stop - start), dtype=np.float32)
+        nonempty = np.flatnonzero(np.diff(bounds) > 0)
+        if len(nonempty):
+            sums[:, nonempty] = np.add.reduceat(values, bounds[nonempty], axis=1)
+        yield start, stop, sums
+
+
+class SkillProfiles:
+    """
+    Skill lists of many entities as one flat array of skill numbers plus
+    offsets, with a vocabulary of skill names.
+    """
+
+    def __init__(self):
+        self.skills = {}
+        self.ids = array('q')
+        self.flat = array('i')
+        self.offsets = array('q', [0])
+
+    def add(self, entity_id, skills):
+        positions = self.skills
+        for skill in dict.fromkeys(skills or []):
+            self.flat.append(positions.setdefault(skill, len(positions)))
+        self.ids.append(entity_id)
+        self.offsets.append(len(self.flat))
+
+    def arrays(self):
+        return (np.frombuffer(self.ids, dtype=np.int64), np.frombuffer(self.flat, dtype=np.int32),
+                np.frombuffer(self.offsets, dtype=np.int64))
+
+
+def embed_vocabulary(names, profiles, dimensions, co_occurrence_weight):
+    """
+    Skill vectors: hashed features plus ``co_occurrence_weight`` times the
+    (normalized) sum of the hashed vectors of co-occurring skills.
+    """
+    base = hash_skills(names, dimensions)
+    if not co_occurrence_weight:
+        return base
+    base_t = np.ascontiguousarray(base.T)
+    context_t = np.zeros_like(base_t)
+    for _, flat, offsets in profiles:
+        for start, stop, sums_t in profile_sums(base_t, flat, offsets):
+            # Add each profile's sum to all of its skills, minus the skill itself
+            skills = flat[offsets[start]:offsets[stop]]
+            owners = np.repeat(np.arange(stop - start), np.diff(offsets[start:stop + 1]))
+            order = np.argsort(skills, kind='stable')
+            skills = skills[order]
+            firsts = np.flatnonzero(np.r_[True, skills[1:] != skills[:-1]])
+            contributions = sums_t.take(owners[order], axis=1) - base_t.take(skills, axis=1)
+            context_t[:, skills[firsts]] += np.add.reduceat(contributions, firsts, axis=1)
+    return _normalize_rows(base + co_occurrence_weight * _normalize_rows(context_t.T))
+
+
+def train_ivf(vectors, lists, seed=0):
+    """Spherical k-means over (a sample of) ``vectors``; returns the centroids."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample = np.asarray(vectors[np.sort(rng.choice(n, min(n, KMEANS_SAMPLE), replace=False))])
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        # Keep the previous centroid of an emptied list
+        filled = np.bincount(assignment, minlength=lists) > 0
+        centroids[filled] = _normalize_rows(sums[filled])
+    return centroids
+
+
+def assign_lists(vectors, centroids):
+    """Return the nearest centroid of every vector."""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_SIZE):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_SIZE])
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def build_semantic_index(config=None):
+    """
+    Embed the skills and candidates of the current tenant and publish a new
+    version of its index. Returns the version directory.
+    """
+    config = config or get_semantic_settings()
+    dimensions = config['DIMENSIONS']
+    scope = tenant_filter(current_tenant())
+
+    candidates = SkillProfiles()
+    for candidate_id, skills in Candidate.objects.filter(**scope).order_by('id').values_list(
+            'id', 'skills').iterator(chunk_size=LOAD_CHUNK_SIZE):
+        candidates.add(candidate_id, skills)
+    # Job requirements only contribute co-occurrence statistics
+    jobs = SkillProfiles()
+    jobs.skills = candidates.skills
+    for job_id, requirements, nice_to_have in Job.objects.filter(**scope).values_list(
+            'id', 'requirements', 'nice_to_have').iterator(chunk_size=LOAD_CHUNK_SIZE):
+        jobs.add(job_id, list(requirements) + list(nice_to_have))
+
+    names = list(candidates.skills)
+    candidate_ids, flat, offsets = candidates.arrays()
+    skill_vectors = embed_vocabulary(
+        names, [(candidate_ids, flat, offsets), jobs.arrays()], dimensions, config['CO_OCCURRENCE_WEIGHT'])
+
+    def write(directory):
+        # Candidate vectors go straight to disk, they can exceed memory
+        candidate_vectors = np.lib.format.open_memmap(
+            directory / 'candidate_vectors.npy', mode='w+', dtype=np.float32,
+            shape=(len(candidate_ids), dimensions))
+        skill_vectors_t = np.ascontiguousarray(skill_vectors.T)
+        for start, stop, sums_t in profile_sums(skill_vectors_t, flat, offsets):
+            candidate_vectors[start:stop] = _normalize_rows(sums_t.T)
+        candidate_vectors.flush()
+
+        lists = max(1, min(config['LISTS'] or int(np.sqrt(len(candidate_ids))), len(candidate_ids)))
+        if len(candidate_ids):
+            centroids = train_ivf(candidate_vectors, lists)
+            assignment = assign_lists(candidate_vectors, centroids)
+        else:
+            centroids = np.zeros((0, dimensions), dtype=np.float32)
+            assignment = np.zeros(0, dtype=np.int32)
+        list_rows = np.argsort(assignment, kind='stable').astype(np.int64)
+        list_offsets = np.searchsorted(assignment[list_rows], np.arange(len(centroids) + 1)).astype(np.int64)
+        del candidate_vectors
+
+        np.save(directory / 'skill_vectors.npy', skill_vectors)
+        np.save(directory / 'candidate_ids.npy', candidate_ids)
+        np.save(directory / 'centroids.npy', centroids)
+        np.save(directory / 'list_offsets.npy', list_offsets)
+        np.save(directory / 'list_rows.npy', list_rows)
+        (directory / 'skills.json').write_text(json.dumps(names))
+        (directory / 'meta.json').write_text(json.dumps({
+            'dimensions': dimensions,
+            'skills': len(names),
+            'candidates': len(candidate_ids),
+            'lists': len(centroids),
+        }))
+
+    return VersionedDirectory(index_path(config)).publish(write)
+
+
+class SemanticModel:
+    """
+    A published index version, memory-mapped read-only.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = json.loads((directory / 'meta.json').read_text())
+        self.dimensions = self.meta['dimensions']
+        self.skill_rows = {name: row for row, name in enumerate(json.loads((directory / 'skills.json').read_text()))}
+        load = lambda name: np.load(directory / f'{name}.npy', mmap_mode='r')  # noqa: E731
+        self.skill_vectors = load('skill_vectors')
+        self.candidate_ids = load('candidate_ids')
+        self.candidate_vectors = load('candidate_vectors')
+        self.centroids = load('centroids')
+        self.list_offsets = load('list_offsets')
+        self.list_rows = load('list_rows')
+
+    def embed_skills(self, names):
+        """Vectors of ``names``; skills unknown to the model are hashed on the fly."""
+        matrix = hash_skills(names, self.dimensions)
+        for row, name in enumerate(names):
+            known = self.skill_rows.get(name)
+            if known is not None:
+                matrix[row] = self.skill_vectors[known]
+        return matrix
+
+    def search(self, vector, k, nprobe):
+        """
+        Approximate top ``k`` candidates by cosine similarity, scanning the
+        ``nprobe`` lists whose centroids are closest to ``vector``.
+        Returns ``(candidate_ids, similarities)``, best first.
+        """
+        if not len(self.centroids):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        nprobe = min(nprobe, len(self.centroids))
+        probed = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+        rows = np.concatenate([
+            self.list_rows[self.list_offsets[centroid]:self.list_offsets[centroid + 1]] for centroid in probed
+        ])
+        rows.sort()
+        similarities = self.candidate_vectors[rows] @ vector
+        if len(rows) > k:
+            best = np.argpartition(-similarities, k - 1)[:k]
+            rows, similarities = rows[best], similarities[best]
+        order = np.argsort(-similarities, kind='stable')
+        return self.candidate_ids[rows[order]], similarities[order]
+
+    def restrict(self, batch, k, nprobe, cache=None):
+        """
+        Narrow a ``ScoringBatch`` to the candidates retrieved for its job.
+        Candidates added after the index was built are kept, so they are
+        not silently skipped until the next build.
+
+        ``cache`` (a dict) keeps retrievals across batches of the same job.
+        """
+        terms = batch.terms
+        names = [batch.vocabulary.names[position] for position in terms.required + terms.nice_to_have]
+        if not names:
+            return batch
+        key = tuple(names)
+        retrieved = cache.get(key) if cache is not None else None
+        if retrieved is None:
+            vector = _normalize_rows(self.embed_skills(names).sum(axis=0, keepdims=True))[0]
+            retrieved, _ = self.search(vector, k, nprobe)
+            if cache is not None:
+                cache[key] = retrieved
+
+        ids = batch.candidate_ids
+        found = np.searchsorted(self.candidate_ids, ids)
+        indexed = self.candidate_ids[np.minimum(found, len(self.candidate_ids) - 1)] == ids \
+            if len(self.candidate_ids) else np.zeros(len(ids), dtype=bool)
+        return batch.subset(np.flatnonzero(~indexed | np.isin(ids, retrieved)))
+
+
+# Loaded models by index path
+_models = {}
+_model_lock = threading.Lock()
+
+
+def get_semantic_model():
+    """
+    Return the current tenant's current ``SemanticModel``, or None when
+    semantic mode is off or no index has been built for it. Picks up newly
+    published versions.
+    """
+    config = get_semantic_settings()
+    if not config['ENABLED']:
+        return None
+    path = index_path(config)
+    directory = VersionedDirectory(path).current()
+    if directory is None:
+        return None
+    with _model_lock:
+        model = _models.get(path)
+        if model is None or model.directory != directory:
+            model = _models[path] = SemanticModel(directory)
+        return model
+
+
+def vocabulary_vectors(vocabulary, model=None, dimensions=None):
+    """
+    Vectors for every skill of a ``SkillVocabulary``, cached on it and
+    extended as it grows.
+    """
+    key = ('semantic', model.directory if model is not None else None)
+    size, matrix = vocabulary.embeddings.get(key, (0, None))
+    if size < len(vocabulary):
+        new_names = vocabulary.names[size:]
+        if model is not None:
+            new = model.embed_skills(new_names)
+        else:
+            new = hash_skills(new_names, dimensions or get_semantic_settings()['DIMENSIONS'])
+        matrix = new if matrix is None else np.vstack([matrix, new])
+        vocabulary.embeddings[key] = (len(vocabulary), matrix)
+    return matrix
+
+
+def equivalent_positions(vocabulary, positions, threshold, model=None):
+    """
+    For each skill position, the positions of all vocabulary skills with a
+    cosine similarity of at least ``threshold`` (itself included).
+    """
+    matrix = vocabulary_vectors(vocabulary, model)
+    similarities = matrix[positions] @ matrix.T
+    return [np.flatnonzero(row >= threshold).tolist() for row in similarities]
+
+
+class SemanticSkillScorer(Scorer):
+    """
+    Share of the required skills the candidate has, counting near-synonyms
+    ("Postgres" for "PostgreSQL", "ML" for "Machine Learning") as matches.
+
+    Uses the built semantic index when available and falls back to the
+    hashed features otherwise.
+    """
+
+    def __init__(self, threshold=None):
+        self.threshold = threshold
+
+    def _matched(self, batch):
+        if 'semantic_matched' not in batch.cache:
+            threshold = self.threshold or get_semantic_settings()['THRESHOLD']
+            equivalents = equivalent_positions(
+                batch.vocabulary, batch.terms.required, threshold, get_semantic_model())
+            words = batch.candidate_bits.shape[1]
+            matched = np.zeros(len(batch), dtype=np.int32)
+            for positions in equivalents:
+                matched += popcount(batch.candidate_bits & pack(positions, words)).sum(axis=1) > 0
+            batch.cache['semantic_matched'] = matched
+        return batch.cache['semantic_matched']
+
+    def score_batch(self, batch):
+        required = len(batch.terms.required)
+        if not required:
+            return np.zeros(len(batch), dtype=np.float64)
+        return self._matched(batch) / required
+
+    def rationales(self, batch, rows):
+        required = len(batch.terms.required)
+        if not required:
+            return None
+        return render_counts(self._matched(batch)[rows], lambda matched: (
+            f'Candidate has {matched} of {required} required skills or close equivalents'))
@@ -0,0 +1,225 @@
+"""
+On-disk snapshots of match scores.
+
+``match_candidates`` can publish the scores of a run as a CSR structure:
+per job (rows of ``job_ids``) the best ``TOP_K`` candidates ordered by score,
+in ``indptr`` / ``candidate_ids`` / ``scores`` arrays. A per-job permutation
+sorted by candidate id (``by_candidate``) makes pair lookups a binary
+search. Snapshots are versioned directories of ``.npy`` files; readers
+memory-map them, so all worker processes share one copy through the page
+cache and never query Postgres for these lookups.
+
+A snapshot holds the scores of the run that published it: matches written
+since (``create_match``, ``create_many``, a job's ``rematch``) are not in
+it until the next run publishes a new version.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from ..core.storage import VersionedDirectory
+from ..core.tenancy import current_tenant
+from ..models import Match
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'PATH': None,  # settings.BASE_DIR / 'var' / 'snapshots'
+    'TOP_K': 100,  # None keeps every scored pair
+    'KEEP': 3,
+    'CHECK_INTERVAL': 1.0,  # Seconds between checks for a newer version
+}
+
+
+def get_snapshot_settings():
+    """Return ``settings.SKILLMATCH_SNAPSHOT`` merged over the defaults."""
+    config = {**DEFAULTS, **getattr(settings, 'SKILLMATCH_SNAPSHOT', {})}
+    if config['PATH'] is None:
+        config['PATH'] = settings.BASE_DIR / 'var' / 'snapshots'
+    return config
+
+
+def snapshot_path(config):
+    """Directory of the current tenant's snapshot versions."""
+    tenant = current_tenant()
+    if tenant is None:
+        return config['PATH']
+    return Path(config['PATH']) / 'tenants' / tenant.slug
+
+
+class SnapshotWriter:
+    """
+    Collects the scores of a matching run, one job at a time, and
+    publishes them as a new snapshot version.
+    """
+
+    def __init__(self, top_k=None):
+        self.top_k = top_k
+        self.jobs = {}
+
+    def add(self, job_id, candidate_ids, scores):
+        """
+        Keep the best ``top_k`` of ``scores`` for ``job_id``; may be called
+        repeatedly for the same job (e.g. once per candidate shard).
+        """
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float32)
+        if int(job_id) in self.jobs:
+            previous_ids, previous_scores = self.jobs[int(job_id)]
+            candidate_ids = np.concatenate([previous_ids, candidate_ids])
+            scores = np.concatenate([previous_scores, scores])
+        if self.top_k is not None and len(scores) > self.top_k:
+            best = np.argpartition(-scores, self.top_k - 1)[:self.top_k]
+            candidate_ids, scores = candidate_ids[best], scores[best]
+        # Best first, ties by candidate id
+        order = np.lexsort((candidate_ids, -scores))
+        self.jobs[int(job_id)] = (candidate_ids[order], scores[order])
+
+    def add_from_database(self, job_ids):
+        """Load the stored best matches of ``job_ids`` (e.g. for a resumed run)."""
+        limit = self.top_k
+        ranked = Match.objects.filter(job_id__in=job_ids).annotate(
+            rank=Window(RowNumber(), partition_by=F('job_id'), order_by=[F('score').desc(), F('candidate_id')])
+        )
+        if limit is not None:
+            ranked = ranked.filter(rank__lte=limit)
+        rows = {}
+        for job_id, candidate_id, score in ranked.values_list('job_id', 'candidate_id', 'score').iterator():
+            rows.setdefault(job_id, ([], []))
+            rows[job_id][0].append(candidate_id)
+            rows[job_id][1].append(score)
+        for job_id, (candidate_ids, scores) in rows.items():
+            self.add(job_id, candidate_ids, scores)
+
+    def publish(self, path, keep=3):
+        """Write all collected jobs as a new version; returns its directory."""
+        job_ids = np.array(sorted(self.jobs), dtype=np.int64)
+        lengths = [len(self.jobs[job_id][0]) for job_id in job_ids]
+        indptr = np.zeros(len(job_ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        def write(directory):
+            candidate_ids = np.lib.format.open_memmap(
+                directory / 'candidate_ids.npy', mode='w+', dtype=np.int64, shape=(int(indptr[-1]),))
+            scores = np.lib.format.open_memmap(
+                directory / 'scores.npy', mode='w+', dtype=np.float32, shape=(int(indptr[-1]),))
+            by_candidate = np.lib.format.open_memmap(
+                directory / 'by_candidate.npy', mode='w+', dtype=np.int32, shape=(int(indptr[-1]),))
+            for row, job_id in enumerate(job_ids.tolist()):
+                start, stop = indptr[row], indptr[row + 1]
+                job_candidates, job_scores = self.jobs[job_id]
+                candidate_ids[start:stop] = job_candidates
+                scores[start:stop] = job_scores
+                by_candidate[start:stop] = np.argsort(job_candidates, kind='stable')
+            for array in (candidate_ids, scores, by_candidate):
+                array.flush()
+
+            np.save(directory / 'job_ids.npy', job_ids)
+            np.save(directory / 'indptr.npy', indptr)
+            (directory / 'meta.json').write_text(json.dumps({
+                'created_at': timezone.now().isoformat(),
+                'jobs': len(job_ids),
+                'pairs': int(indptr[-1]),
+                'top_k': self.top_k,
+            }))
+
+        return VersionedDirectory(path, keep=keep).publish(write)
+
+
+class MatchSnapshot:
+    """
+    Read-only, memory-mapped view of one snapshot version.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.version = directory.name
+        self.meta = json.loads((directory / 'meta.json').read_text())
+        load = lambda name: np.load(directory / f'{name}.npy', mmap_mode='r')  # noqa: E731
+        self.job_ids = load('job_ids')
+        self.indptr = load('indptr')
+        self.candidate_ids = load('candidate_ids')
+        self.scores = load('scores')
+        self.by_candidate = load('by_candidate')
+
+    def _segment(self, job_id):
+        row = int(np.searchsorted(self.job_ids, job_id))
+        if row >= len(self.job_ids) or self.job_ids[row] != job_id:
+            return None
+        return int(self.indptr[row]), int(self.indptr[row + 1])
+
+    def has_job(self, job_id):
+        return self._segment(job_id) is not None
+
+    def top(self, job_id, limit=None):
+        """
+        Return ``[(candidate_id, score), ...]`` best first for ``job_id``,
+        or None when the job is not in the snapshot.
+        """
+        segment = self._segment(job_id)
+        if segment is None:
+            return None
+        start, stop = segment
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return list(zip(self.candidate_ids[start:stop].tolist(), self.scores[start:stop].tolist()))
+
+    def score(self, candidate_id, job_id):
+        """
+        Return ``(found, score)``. ``found`` is False when the job is not in
+        the snapshot; a job without this candidate gives ``(True, None)``.
+        """
+        segment = self._segment(job_id)
+        if segment is None:
+            return False, None
+        start, stop = segment
+        order = self.by_candidate[start:stop]
+        candidates = self.candidate_ids[start:stop]
+        # Binary search over the candidates of the job in id order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if candidates[order[middle]] < candidate_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and candidates[order[low]] == candidate_id:
+            return True, float(self.scores[start + order[low]])
+        return True, None
+
+
+# Snapshot path: (MatchSnapshot or None, time checked)
+_snapshots = {}
+_snapshot_lock = threading.Lock()
+
+
+def get_match_snapshot():
+    """
+    Return the current tenant's current ``MatchSnapshot``, or None when
+    snapshots are disabled or none was published. The ``CURRENT`` pointer
+    is re-read at most every ``CHECK_INTERVAL`` seconds, so a newly
+    published snapshot is picked up without a restart.
+    """
+    config = get_snapshot_settings()
+    if not config['ENABLED']:
+        return None
+    path = snapshot_path(config)
+    with _snapshot_lock:
+        now = time.monotonic()
+        snapshot, checked_at = _snapshots.get(path, (None, 0.0))
+        if snapshot is not None and now - checked_at < config['CHECK_INTERVAL']:
+            return snapshot
+        directory = VersionedDirectory(path).current()
+        if directory is None:
+            snapshot = None
+        elif snapshot is None or snapshot.directory != directory:
+            snapshot = MatchSnapshot(directory)
+        _snapshots[path] = (snapshot, now)
+        return snapshot
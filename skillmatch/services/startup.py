@@ -0,0 +1,103 @@
+"""
+Startup-time profiling.
+
+Every new worker imports the ASGI application and, on its first request,
+the URLconf with all the views. ``profile_startup`` does the same in a
+fresh interpreter run with ``python -X importtime`` and reports where the
+time goes, per module and per top-level package, so new eager imports of
+heavy libraries show up before they reach production.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+# Run in the child interpreter; prints the phase timings as JSON
+PROFILE_SCRIPT = """
+import importlib
+import json
+import sys
+import time
+
+module_name, _, attr = sys.argv[1].partition(':')
+started = time.perf_counter()
+app = getattr(importlib.import_module(module_name), attr or 'application')
+loaded = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+resolved = time.perf_counter()
+print(json.dumps({
+    'app_ms': (loaded - started) * 1000,
+    'urls_ms': (resolved - loaded) * 1000,
+    'modules_loaded': len(sys.modules),
+}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse ``-X importtime`` output into dicts with ``module``,
+    ``self_us``, ``cumulative_us`` and ``depth`` (0 for top-level imports).
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # The header line
+        entries.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return entries
+
+
+def by_package(entries):
+    """Sum the self time of ``entries`` per top-level package, slowest first."""
+    totals = {}
+    for entry in entries:
+        package = entry['module'].split('.')[0]
+        count, self_us = totals.get(package, (0, 0))
+        totals[package] = (count + 1, self_us + entry['self_us'])
+    return [
+        {'package': package, 'modules': count, 'self_ms': round(self_us / 1000, 1)}
+        for package, (count, self_us) in sorted(totals.items(), key=lambda item: -item[1][1])
+    ]
+
+
+def profile_startup(app_path='skillbridge.asgi:application', limit=20):
+    """
+    Import ``app_path`` and load the URLconf in a new interpreter; returns
+    the phase timings, the ``limit`` slowest imports (by cumulative time)
+    and the import time per package.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+        'DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT, app_path],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    slowest = sorted(entries, key=lambda entry: -entry['cumulative_us'])[:limit]
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report.update({
+        'app_ms': round(report['app_ms'], 1),
+        'urls_ms': round(report['urls_ms'], 1),
+        'import_ms': round(sum(entry['self_us'] for entry in entries) / 1000, 1),
+        'slowest': [
+            {'module': entry['module'], 'self_ms': round(entry['self_us'] / 1000, 1),
+             'cumulative_ms': round(entry['cumulative_us'] / 1000, 1)}
+            for entry in slowest
+        ],
+        'packages': by_package(entries),
+    })
+    return report
@@ -0,0 +1,91 @@
+"""
+Denormalized match read table.
+
+``MatchSummary`` keeps one row per match with the candidate name and job
+title copied in, so the match list is a single index scan of
+``match_summary_tenant_score_idx`` instead of a three-table join sorted across all
+matches. Rows are upserted in place (no table-wide refresh or lock):
+
+* matching runs refresh the matches of each shard in the shard's
+  transaction, and single match saves refresh that match;
+* candidate and job renames, including bulk imports, update the copied
+  names;
+* deleting a match deletes its row (the one-to-one cascades).
+
+``manage.py refresh_match_summary`` fills the table after enabling it.
+"""
+from django.conf import settings
+from django.db import connections
+
+from ..core.tenancy import current_database
+from ..models import Candidate, Job, Match, MatchSummary
+
+
+DEFAULTS = {
+    'ENABLED': False,
+}
+
+
+def get_summary_settings():
+    """Return ``settings.SKILLMATCH_SUMMARY`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_SUMMARY', {})}
+
+
+def summary_enabled():
+    return get_summary_settings()['ENABLED']
+
+
+def refresh_summary(match_ids=None, candidate_ids=None, job_ids=None):
+    """
+    Upsert the summary rows of the given matches, or of all matches of
+    ``candidate_ids`` or ``job_ids``, or of every match when all are None.
+    Rows whose values did not change are not rewritten. Returns the rows
+    written.
+    """
+    conditions, params = [], []
+    if match_ids is not None:
+        conditions.append("m.id = ANY(%s)")
+        params.append(list(match_ids))
+    if candidate_ids is not None:
+        conditions.append("m.candidate_id = ANY(%s)")
+        params.append(list(candidate_ids))
+    if job_ids is not None:
+        conditions.append("m.job_id = ANY(%s)")
+        params.append(list(job_ids))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    columns = ['tenant_id', 'candidate_id', 'job_id', 'candidate_name', 'job_title', 'score', 'matched_at']
+    with connections[current_database()].cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {MatchSummary._meta.db_table} AS s (match_id, {', '.join(columns)})
+            SELECT m.id, m.tenant_id, m.candidate_id, m.job_id, c.name, j.title, m.score, m.matched_at
+            FROM {Match._meta.db_table} m
+            JOIN {Candidate._meta.db_table} c ON c.id = m.candidate_id
+            JOIN {Job._meta.db_table} j ON j.id = m.job_id
+            {where}
+            ON CONFLICT (match_id) DO UPDATE
+            SET {', '.join(f'{column} = EXCLUDED.{column}' for column in columns)}
+            WHERE ({', '.join(f's.{column}' for column in columns)})
+                IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in columns)})
+        """, params)
+        return cursor.rowcount
+
+
+def sync_names(model, ids):
+    """
+    Copy the current name of candidates (or title of jobs) with ``ids`` into
+    their summary rows. Returns the rows updated.
+    """
+    if model is Candidate:
+        key, column, source = 'candidate_id', 'candidate_name', 'name'
+    elif model is Job:
+        key, column, source = 'job_id', 'job_title', 'title'
+    else:
+        raise ValueError(f"No summary column for {model.__name__}")
+    with connections[current_database()].cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {MatchSummary._meta.db_table} s
+            SET {column} = t.{source}
+            FROM {model._meta.db_table} t
+            WHERE t.id = ANY(%s) AND s.{key} = t.id AND s.{column} IS DISTINCT FROM t.{source}
+        """, [list(ids)])
+        return cursor.rowcount
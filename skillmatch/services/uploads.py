@@ -0,0 +1,212 @@
+"""
+Chunked, resumable CV uploads.
+
+A tus-like protocol over ``UploadSession``:
+
+1. create a session with the file's name and total ``length``;
+2. send the file in chunks, each starting at the session's current
+   ``offset`` (a client that lost its connection asks for the offset and
+   carries on from there);
+3. finalize, which checks the length and optional SHA-256 and turns the
+   file into a ``CVUpload``.
+
+Chunks are streamed straight into the final file, at their offset, and
+into a running SHA-256. The digest state lives in the process that
+received the previous chunk, tagged with the offset and ``updated_at`` it
+was stored with; another process continuing the upload, or any process
+after a rejected concurrent chunk (which touches ``updated_at``), rehashes
+the bytes on disk once. ``reap_uploads`` deletes sessions
+idle for longer than ``EXPIRE_AFTER`` along with their partial files.
+
+Configured through ``settings.SKILLMATCH_UPLOADS``.
+"""
+import hashlib
+import os
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from ..core.tenancy import current_database, current_tenant
+from ..models import CVUpload, UploadSession
+
+
+DEFAULTS = {
+    'MAX_SIZE': 50 * 1024 * 1024,  # Bytes per file
+    'MAX_CHUNK_SIZE': 8 * 1024 * 1024,  # Bytes per chunk request
+    'EXPIRE_AFTER': 24 * 3600,  # Seconds without a chunk before a session is reaped
+}
+
+# Bytes copied from the request to the file at a time
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+def get_upload_settings():
+    """Return ``settings.SKILLMATCH_UPLOADS`` merged over the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'SKILLMATCH_UPLOADS', {})}
+
+
+class UploadError(Exception):
+    """The request does not fit the upload session (a 400)."""
+
+
+class OffsetMismatch(UploadError):
+    """A chunk does not start at the session's offset (a 409)."""
+
+
+# Running digests by session id, as ((offset, updated_at), hasher)
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+def _hasher_at(session):
+    """SHA-256 of the first ``session.offset`` bytes of the session's file."""
+    with _hashers_lock:
+        token, hasher = _hashers.pop(session.pk, (None, None))
+    if token == (session.offset, session.updated_at):
+        return hasher
+    hasher = hashlib.sha256()
+    remaining = session.offset
+    with open(session.file.path, 'rb') as f:
+        while remaining:
+            block = f.read(min(COPY_BUFFER_SIZE, remaining))
+            if not block:
+                raise UploadError("The partial file is shorter than the upload offset.")
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def create_session(filename, length, expected_sha256=''):
+    """Start an upload of ``length`` bytes; reserves the file it is written to."""
+    config = get_upload_settings()
+    if length <= 0 or length > config['MAX_SIZE']:
+        raise UploadError(f"length must be between 1 and {config['MAX_SIZE']} bytes.")
+    name = os.path.basename(filename) or 'cv'
+    field = UploadSession._meta.get_field('file')
+    while True:
+        stored_name = default_storage.get_available_name(field.generate_filename(None, name))
+        path = default_storage.path(stored_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Exclusive creation: a concurrent session cannot take the same name
+            with open(path, 'xb'):
+                break
+        except FileExistsError:
+            continue
+    return UploadSession.objects.create(
+        tenant=current_tenant(), filename=name, file=stored_name, length=length, expected_sha256=expected_sha256.lower()
+    )
+
+
+def write_chunk(session_id, offset, stream, size):
+    """
+    Copy ``size`` bytes from ``stream`` into the session's file at
+    ``offset``, which must be the session's current offset. Bytes received
+    before the stream ends count, so a broken connection loses nothing.
+    Returns the updated session.
+
+    The copy runs outside any transaction or row lock; the offset is then
+    advanced only if no other chunk changed the session meanwhile. Of two
+    chunks sent at the same offset, one is rejected, as a retry of the
+    other; the rejected one may have overwritten the bytes of the other, so
+    it touches ``updated_at``, which makes every process rehash the file.
+    """
+    config = get_upload_settings()
+    session = UploadSession.objects.get(pk=session_id)
+    if session.sha256:
+        raise OffsetMismatch("The upload is already finalized.")
+    if offset != session.offset:
+        raise OffsetMismatch(f"Expected a chunk at offset {session.offset}.")
+    if size > config['MAX_CHUNK_SIZE']:
+        raise UploadError(f"Chunks are limited to {config['MAX_CHUNK_SIZE']} bytes.")
+    if offset + size > session.length:
+        raise UploadError("The chunk extends past the upload length.")
+
+    hasher = _hasher_at(session)
+    received = 0
+    with open(session.file.path, 'r+b') as f:
+        f.seek(offset)
+        while received < size:
+            block = stream.read(min(COPY_BUFFER_SIZE, size - received))
+            if not block:
+                break
+            f.write(block)
+            hasher.update(block)
+            received += len(block)
+
+    # Compare and set: a concurrent chunk or finalize leaves no row to update
+    updated_at = timezone.now()
+    advanced = UploadSession.objects.filter(
+        pk=session.pk, offset=offset, updated_at=session.updated_at, sha256=''
+    ).update(offset=offset + received, updated_at=updated_at)
+    if not advanced:
+        # Our bytes may have overwritten the other chunk's, so its digest is
+        # stale wherever it is kept
+        UploadSession.objects.filter(pk=session.pk, sha256='').update(updated_at=timezone.now())
+        with _hashers_lock:
+            _hashers.pop(session.pk, None)
+        session.refresh_from_db(fields=['offset', 'sha256'])
+        if session.sha256:
+            raise OffsetMismatch("The upload is already finalized.")
+        raise OffsetMismatch(f"Expected a chunk at offset {session.offset}.")
+
+    session.offset, session.updated_at = offset + received, updated_at
+    with _hashers_lock:
+        _hashers[session.pk] = ((session.offset, session.updated_at), hasher)
+    return session
+
+
+def finalize(session_id):
+    """
+    Complete an upload: checks that every byte arrived and the checksum, if
+    one was announced, then creates the ``CVUpload`` for the file. Finalizing
+    again returns the same upload (None if it was deleted since). Returns
+    ``(session, cv_upload, created)``.
+    """
+    with transaction.atomic(using=current_database()):
+        session = UploadSession.objects.select_for_update(of=('self',)).select_related('cv_upload').get(pk=session_id)
+        if session.sha256:
+            return session, session.cv_upload, False
+        if session.offset != session.length:
+            raise UploadError(f"Only {session.offset} of {session.length} bytes were received.")
+
+        digest = _hasher_at(session).hexdigest()
+        if session.expected_sha256 and digest != session.expected_sha256:
+            raise UploadError("The file does not match the announced SHA-256; upload it again.")
+        cv_upload = CVUpload.objects.create(tenant_id=session.tenant_id, file=session.file.name)
+        session.sha256 = digest
+        session.cv_upload = cv_upload
+        session.save(update_fields=['sha256', 'cv_upload', 'updated_at'])
+    with _hashers_lock:
+        _hashers.pop(session.pk, None)
+    return session, cv_upload, True
+
+
+def delete_session(session):
+    """Abort an upload: deletes the session and, unless finalized, its file."""
+    session_id = session.pk
+    if not session.sha256:
+        session.file.delete(save=False)
+    session.delete()
+    with _hashers_lock:
+        _hashers.pop(session_id, None)
+
+
+def reap_uploads(expire_after=None):
+    """
+    Delete sessions without activity for ``expire_after`` seconds (default
+    ``EXPIRE_AFTER``); unfinished ones take their partial file along.
+    Returns the numbers of abandoned and completed sessions deleted.
+    """
+    if expire_after is None:
+        expire_after = get_upload_settings()['EXPIRE_AFTER']
+    cutoff = timezone.now() - timedelta(seconds=expire_after)
+    counts = {'abandoned': 0, 'completed': 0}
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        counts['completed' if session.sha256 else 'abandoned'] += 1
+        delete_session(session)
+    return counts
@@ -0,0 +1,45 @@
+"""
+Signal handlers for the skillmatch app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .core.cache import invalidate_models
+from .models import CVUpload, Candidate, Job, Match
+from .services.match_events import publish_matches
+from .services.summary import refresh_summary, summary_enabled, sync_names
+
+
+@receiver(post_save, sender=CVUpload)
+@receiver(post_delete, sender=CVUpload)
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def invalidate_cached_responses(sender, **kwargs):
+    """Bump the response cache version of the written model."""
+    invalidate_models(sender)
+
+
+@receiver(post_save, sender=Match)
+def refresh_match_summary(sender, instance, **kwargs):
+    """Copy a saved match into the match summary table."""
+    if summary_enabled():
+        refresh_summary(match_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Match)
+def publish_match_event(sender, instance, created, using, **kwargs):
+    """Notify change feed listeners of a saved match."""
+    publish_matches([instance], [instance.pk] if created else (), using)
+
+
+@receiver(post_save, sender=Candidate)
+@receiver(post_save, sender=Job)
+def sync_summary_names(sender, instance, created, **kwargs):
+    """Propagate candidate and job renames to the match summary table."""
+    if not created and summary_enabled():
+        sync_names(sender, [instance.pk])
+
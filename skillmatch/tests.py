@@ -2,14 +2,50 @@
 Tests for the SkillMatch application.
 """
 
-from django.test import TransactionTestCase
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
+from unittest import skipUnless
 from unittest.mock import patch
-from django.db import connections
+from asgiref.sync import async_to_sync, sync_to_async
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import pstats
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 
-from .models import CVUpload, Candidate, Job, Match
+from .models import CVUpload, Candidate, Job, Match, MatchRun, MatchSummary, ParsedCV, Tenant, UploadSession
+from .core import coalescing, get_response_cache, profiling, throttling
+from .core.storage import VersionedDirectory
+from .core.tenancy import TenantRouter, database_tenants, use_tenant
+from .services import ai, loadtest, rank_candidate, startup
+from .services import extraction, match_events, match_runs, parsed_cvs, partitions, retention, semantic, uploads
+from .services import snapshot as match_snapshot
+from .services.profiles import MatchIndex, get_match_index
+from .services.scoring import (
+    ExperienceFitScorer, ScoringBatch, ScoringEngine, WeightedSkillScorer, score_pair
+)
+from .serializers import CandidateSerializer, JobSerializer
+from .services import export as match_export
 
 
 class SkillMatchIntegrationTestCase(TransactionTestCase):
@@ -18,6 +54,7 @@ class SkillMatchIntegrationTestCase(TransactionTestCase):
     def setUp(self):
         """Set up the test environment."""
         self.client = APIClient()
+        get_response_cache().clear()
 
     def test_cv_upload_and_parsing(self):
         """Test uploading a CV and parsing it into a candidate using the /parse endpoint."""
@@ -187,6 +224,1582 @@ class SkillMatchIntegrationTestCase(TransactionTestCase):
         self.assertGreaterEqual(len(matches_response.data['results']), 1)
 
 
+class LoadTestScenarioTestCase(SimpleTestCase):
+    """Tests for the load-testing scenario helpers."""
+
+    def test_parse_scenario_needs_cv_upload_id(self):
+        """Scenarios with unresolved placeholders are skipped."""
+        names = [scenario.name for scenario in loadtest.load_scenarios()]
+        self.assertNotIn('cv-parse', names)
+
+        scenarios = loadtest.load_scenarios(cv_upload_id=7)
+        parse = next(s for s in scenarios if s.name == 'cv-parse')
+        self.assertEqual(parse.path, '/api/cv-uploads/7/parse/')
+        self.assertEqual(parse.method, 'POST')
+
+    def test_percentile(self):
+        """Nearest-rank percentiles over unsorted samples."""
+        values = [0.5, 0.1, 0.4, 0.2, 0.3]
+        self.assertEqual(loadtest.percentile(values, 50), 0.3)
+        self.assertEqual(loadtest.percentile(values, 99), 0.5)
+        # Ranks falling exactly on a sample take that sample
+        values = list(range(10, 0, -1))
+        self.assertEqual([loadtest.percentile(values, pct) for pct in (10, 50, 90, 95, 100)], [1, 5, 9, 10, 10])
+        self.assertIsNone(loadtest.percentile([], 50))
+
+
+class ResponseCacheTestCase(TransactionTestCase):
+    """Tests for cached list responses and ETag revalidation."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+
+    def test_etag_revalidation_and_invalidation(self):
+        """A matching If-None-Match gets a 304 until the model is written."""
+        Job.objects.create(title="Backend Engineer", requirements=["Python"])
+
+        first = self.client.get(reverse('job-list'))
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse('job-list'))
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.data['count'], 1)
+
+        not_modified = self.client.get(reverse('job-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        Job.objects.create(title="Data Engineer", requirements=["SQL"])
+        refreshed = self.client.get(reverse('job-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(refreshed.data['count'], 2)
+        self.assertNotEqual(refreshed['ETag'], etag)
+
+    def test_match_list_depends_on_candidate_writes(self):
+        """Renaming a candidate invalidates cached match listings."""
+        cv_upload = CVUpload.objects.create(file="cvs/cache_test.pdf")
+        candidate = Candidate.objects.create(
+            name="Before", skills=["Python"], experience_years=2, source_cv=cv_upload
+        )
+        job = Job.objects.create(title="Engineer", requirements=["Python"])
+        Match.objects.create(candidate=candidate, job=job, score=100.0, rationale="test")
+
+        response = self.client.get(reverse('match-list'))
+        self.assertEqual(response.data['results'][0]['candidate_name'], "Before")
+
+        candidate.name = "After"
+        candidate.save()
+        response = self.client.get(reverse('match-list'))
+        self.assertEqual(response.data['results'][0]['candidate_name'], "After")
+
+
+class MatchExportTestCase(TransactionTestCase):
+    """Tests for the streaming match export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        cv_upload = CVUpload.objects.create(file="cvs/export_test.pdf")
+        self.candidate = Candidate.objects.create(
+            name="Export Candidate", skills=["Python"], experience_years=4, source_cv=cv_upload
+        )
+        self.job = Job.objects.create(title="Exporter", requirements=["Python"])
+        self.other_job = Job.objects.create(title="Other", requirements=["Go"])
+        Match.objects.create(candidate=self.candidate, job=self.job, score=100.0, rationale="1 of 1")
+        Match.objects.create(candidate=self.candidate, job=self.other_job, score=0.0, rationale="0 of 1")
+
+    def test_csv_export_for_job(self):
+        """CSV export streams a header and the job's matches only."""
+        response = self.client.get(reverse('match-export'), {'job_id': self.job.id, 'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'candidate_id', 'candidate_name'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], "Export Candidate")
+        self.assertEqual(rows[1][4], "Exporter")
+
+    def test_ndjson_export(self):
+        """NDJSON export emits one JSON object per match, best score first."""
+        response = self.client.get(reverse('match-export'), {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([record['job_title'] for record in records], ["Exporter", "Other"])
+
+    def test_async_stream_matches(self):
+        """The ASGI generator yields the same rows as the WSGI one."""
+        from asgiref.sync import async_to_sync, sync_to_async
+
+        async def collect():
+            queryset = match_export.export_queryset(job_id=self.job.id)
+            return [chunk async for chunk in match_export.astream_matches(queryset, 'csv', chunk_size=1)]
+
+        queryset = match_export.export_queryset(job_id=self.job.id)
+        self.assertEqual(async_to_sync(collect)(), list(match_export.stream_matches(queryset, 'csv', chunk_size=1)))
+
+    def test_export_streams_asynchronously_over_asgi(self):
+        """Over ASGI the view picks the async generator, which Django does not buffer."""
+        self.assertFalse(self.client.get(reverse('match-export')).is_async)
+        response = async_to_sync(self.async_client.get)(reverse('match-export'), {'format': 'ndjson'})
+        self.assertTrue(response.is_async)
+
+    def test_invalid_job_id(self):
+        """A non-numeric job_id is rejected."""
+        response = self.client.get(reverse('match-export'), {'job_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkImportTestCase(TransactionTestCase):
+    """Tests for bulk importing jobs and candidates."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_job_csv_import_upserts_on_external_id(self):
+        """Re-importing updates existing jobs; invalid rows are reported."""
+        content = (
+            b'external_id,title,requirements\n'
+            b'ats-1,Django Developer,Python;Django\n'
+            b'ats-2,,Python\n'
+            b'ats-3,Data Engineer,"[""SQL"", ""Airflow""]"\n'
+        )
+        response = self.client.post(
+            reverse('job-import'),
+            {'file': SimpleUploadedFile("jobs.csv", content, content_type="text/csv")},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['inserted'], 2)
+        self.assertEqual(response.data['errors'], [{'row': 2, 'error': "'title' is required"}])
+        self.assertEqual(Job.objects.get(external_id='ats-3').requirements, ['SQL', 'Airflow'])
+
+        update = b'external_id,title,requirements,status\nats-1,Senior Django Developer,Python,inactive\n'
+        response = self.client.post(
+            reverse('job-import'),
+            {'file': SimpleUploadedFile("jobs.csv", update, content_type="text/csv")},
+            format='multipart'
+        )
+        self.assertEqual(response.data['updated'], 1)
+        job = Job.objects.get(external_id='ats-1')
+        self.assertEqual((job.title, job.requirements, job.status), ('Senior Django Developer', ['Python'], 'inactive'))
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_candidate_ndjson_import(self):
+        """Candidates can be imported without a source CV."""
+        lines = [
+            json.dumps({'external_id': 'c-1', 'name': 'Ada', 'skills': ['Python'], 'experience_years': 7}),
+            'not json',
+            json.dumps({'external_id': 'c-2', 'name': 'Bob', 'experience_years': 'many'}),
+            '',
+            json.dumps({'external_id': 'c-1', 'name': 'Ada Lovelace', 'skills': ['Python', 'Math'],
+                        'experience_years': 8, 'email': 'ada@example.com'}),
+        ]
+        response = self.client.post(
+            reverse('candidate-import'),
+            {'file': SimpleUploadedFile("candidates.ndjson", "\n".join(lines).encode())},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['rows_read'], 4)
+        self.assertEqual(response.data['inserted'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+
+        candidate = Candidate.objects.get(external_id='c-1')
+        self.assertEqual(candidate.name, 'Ada Lovelace')
+        self.assertEqual(candidate.skills, ['Python', 'Math'])
+        self.assertIsNone(candidate.source_cv)
+
+
+class FullTextSearchTestCase(TransactionTestCase):
+    """Tests for the ``?q=`` full-text search."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+
+    def test_candidate_search_ranks_and_follows_writes(self):
+        """Prefix terms match name and skills; name hits rank first."""
+        skilled = Candidate.objects.create(name="Ana Pop", skills=["Python", "Node.js"], experience_years=2)
+        named = Candidate.objects.create(name="Nodine Python", skills=["Go"], experience_years=2)
+        Candidate.objects.create(name="Ion Ionescu", skills=["Java"], experience_years=2)
+
+        response = self.client.get(reverse('candidate-list'), {'q': 'pyth'})
+        self.assertEqual([row['id'] for row in response.data['results']], [named.id, skilled.id])
+        response = self.client.get(reverse('candidate-list'), {'q': 'node.js ana'})
+        self.assertEqual([row['id'] for row in response.data['results']], [skilled.id])
+        # Operators and quotes are not passed through to the tsquery
+        response = self.client.get(reverse('candidate-list'), {'q': "!('&|"})
+        self.assertEqual(response.data['count'], 3)
+
+        skilled.skills = ["Rust"]
+        skilled.save()
+        response = self.client.get(reverse('candidate-list'), {'q': 'rust'})
+        self.assertEqual([row['id'] for row in response.data['results']], [skilled.id])
+
+    def test_job_search(self):
+        job = Job.objects.create(title="Data Engineer", requirements=["SQL", "Airflow"])
+        Job.objects.create(title="Backend Engineer", requirements=["Python"])
+
+        response = self.client.get(reverse('job-list'), {'q': 'engineer airf'})
+        self.assertEqual([row['id'] for row in response.data['results']], [job.id])
+
+
+class MatchIndexTestCase(TransactionTestCase):
+    """Tests for the in-memory bitset match index."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+
+    def test_overlap_scores_match_rank_candidate(self):
+        """Batch scores equal the per-pair ``rank_candidate`` result."""
+        job = Job.objects.create(title="Backend", requirements=["Python", "Django", "SQL"])
+        candidates = [
+            Candidate.objects.create(name="A", skills=["Python", "Django", "SQL", "Go"], experience_years=3),
+            Candidate.objects.create(name="B", skills=["Python"], experience_years=1),
+            Candidate.objects.create(name="C", skills=[], experience_years=0),
+            Candidate.objects.create(name="D", skills=["SQL"], experience_years=2, status='inactive'),
+        ]
+        # Enough extra skills to need more than one 64-bit word
+        Job.objects.create(title="Wide", requirements=[f"skill-{i}" for i in range(100)])
+
+        index = MatchIndex.load()
+        candidate_ids, counts, scores = index.overlap_scores(job.id)
+        scored = dict(zip(candidate_ids.tolist(), scores.tolist()))
+        self.assertNotIn(candidates[3].id, scored)
+
+        job_data = {'requirements': job.requirements}
+        for candidate in candidates[:3]:
+            expected = async_to_sync(rank_candidate)({'skills': candidate.skills}, job_data)
+            self.assertEqual(scored[candidate.id], expected['score'])
+
+    def test_refresh_picks_up_changes(self):
+        """Updates, soft deletes and (with prune) hard deletes reach the index."""
+        job = Job.objects.create(title="Backend", requirements=["Python", "Rust"])
+        ada = Candidate.objects.create(name="Ada", skills=["Python"], experience_years=3)
+        bob = Candidate.objects.create(name="Bob", skills=["Rust"], experience_years=3)
+        index = MatchIndex.load()
+
+        ada.skills = ["Python", "Rust"]
+        ada.save()
+        bob.status = 'inactive'
+        bob.save()
+        index.refresh()
+        candidate_ids, counts, _ = index.overlap_scores(job.id)
+        self.assertEqual(dict(zip(candidate_ids.tolist(), counts.tolist())), {ada.id: 2})
+
+        bob.delete()
+        index.refresh(prune=True)
+        self.assertIsNone(index.candidates.row_of(bob.id))
+        self.assertEqual(index.candidates.row_of(ada.id), 0)
+
+    def test_match_candidates_endpoint(self):
+        """The matching endpoint creates one match per active pair."""
+        job = Job.objects.create(title="Backend", requirements=["Python", "Django"])
+        candidate = Candidate.objects.create(name="Ada", skills=["Python"], experience_years=3)
+
+        response = self.client.post(reverse('match-match-candidates'))
+        self.assertEqual(response.status_code, 201, response.data)
+        match = Match.objects.get(candidate=candidate, job=job)
+        self.assertEqual(match.score, 50.0)
+        self.assertEqual(match.rationale, "Candidate has 1 of 2 required skills")
+
+        response = self.client.post(reverse('match-match-candidates'))
+        self.assertEqual(response.data['matches_updated'], 1)
+
+
+class ScoringEngineTestCase(TransactionTestCase):
+    """Tests for the pluggable scorers."""
+
+    SCORERS = [
+        {'class': 'skillmatch.services.scoring.WeightedSkillScorer', 'weight': 2,
+         'options': {'missing_must_have_factor': 0.5}},
+        {'class': 'skillmatch.services.scoring.ExperienceFitScorer', 'options': {'exponent': 2}},
+        {'class': 'skillmatch.services.scoring.RarityScorer'},
+    ]
+
+    def test_scorers_on_a_pair(self):
+        """Each scorer applies weights, nice-to-haves and the experience curve."""
+        candidate = {'skills': ['Python', 'Kubernetes'], 'experience_years': 2}
+        job = {'requirements': ['Python', 'Django'], 'nice_to_have': ['Kubernetes'],
+               'skill_weights': {'Python': 3}, 'min_experience_years': 4}
+
+        weighted = ScoringEngine([(WeightedSkillScorer(missing_must_have_factor=0.5), 1)])
+        # (3 + 0.5) / (3 + 1 + 0.5), halved for the missing must-have
+        self.assertAlmostEqual(score_pair(candidate, job, weighted)['score'], 3.5 / 4.5 * 50)
+        experience = ScoringEngine([(ExperienceFitScorer(exponent=2), 1)])
+        result = score_pair(candidate, job, experience)
+        self.assertAlmostEqual(result['score'], 25.0)
+        self.assertEqual(result['rationale'], '2 of 4 years of experience')
+        self.assertEqual(score_pair({'experience_years': 9}, job, experience)['score'], 100.0)
+
+        with override_settings(SKILLMATCH_SCORING={}):
+            self.assertEqual(score_pair(candidate, job), {
+                'score': 50.0, 'rationale': 'Candidate has 1 of 2 required skills'})
+
+    def test_batch_scores_match_pair_scores(self):
+        """Scoring all candidates at once equals scoring each pair."""
+        job = Job.objects.create(title="Backend", requirements=["Python", "Django", "Rust"],
+                                 nice_to_have=["SQL"], skill_weights={"Django": 2}, min_experience_years=3)
+        candidates = [
+            Candidate.objects.create(name="A", skills=["Python", "Django", "Rust"], experience_years=5),
+            Candidate.objects.create(name="B", skills=["Python", "SQL"], experience_years=1),
+            Candidate.objects.create(name="C", skills=["Python", "Django"], experience_years=3),
+        ]
+        engine = ScoringEngine.from_config(self.SCORERS)
+        index = MatchIndex.load()
+        batch = ScoringBatch.for_job(index, job.id)
+        scores = dict(zip(batch.candidate_ids.tolist(), engine.score_batch(batch).tolist()))
+
+        frequency = index.document_frequency(job.requirements + job.nice_to_have)
+        job_data = JobSerializer(job).data
+        for candidate in candidates:
+            expected = score_pair(CandidateSerializer(candidate).data, job_data, engine, frequency)
+            self.assertAlmostEqual(scores[candidate.id], expected['score'])
+        # Rust is the rarest skill, so A (who has it) beats C
+        self.assertGreater(scores[candidates[0].id], scores[candidates[2].id])
+
+        rationales = dict(zip(batch.candidate_ids.tolist(), engine.rationales(batch, range(len(batch)))))
+        self.assertEqual([rationales[candidate.id] for candidate in candidates], [
+            '3 of 3 must-have skills, 0 of 1 nice-to-have skills; 5 of 3 years of experience',
+            '1 of 3 must-have skills, 1 of 1 nice-to-have skills; 1 of 3 years of experience',
+            '2 of 3 must-have skills, 0 of 1 nice-to-have skills; 3 of 3 years of experience',
+        ])
+
+
+class SemanticMatchingTestCase(TransactionTestCase):
+    """Tests for semantic skill similarity and the IVF candidate index."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings = {'ENABLED': True, 'PATH': Path(self.directory.name), 'LISTS': 2, 'NPROBE': 2}
+
+    def test_skill_embeddings(self):
+        """Spelling variants and acronyms are similar, unrelated skills are not."""
+        vectors = semantic.hash_skills(['PostgreSQL', 'Postgres', 'ML', 'Machine Learning', 'React.js', 'React'], 256)
+        similarity = vectors @ vectors.T
+        threshold = semantic.DEFAULTS['THRESHOLD']
+        self.assertGreaterEqual(similarity[0, 1], threshold)
+        self.assertGreaterEqual(similarity[2, 3], threshold)
+        self.assertGreaterEqual(similarity[4, 5], threshold)
+        self.assertLess(similarity[0, 2], threshold)
+
+    def test_semantic_scorer_counts_near_synonyms(self):
+        """A "Postgres" candidate meets a "PostgreSQL" requirement."""
+        engine = ScoringEngine([(semantic.SemanticSkillScorer(), 1)])
+        result = score_pair({'skills': ['Postgres', 'Python']}, {'requirements': ['PostgreSQL', 'Go']}, engine)
+        self.assertEqual(result['score'], 50.0)
+        self.assertEqual(result['rationale'], 'Candidate has 1 of 2 required skills or close equivalents')
+
+    def test_build_and_restrict(self):
+        """The published index retrieves similar candidates and keeps unindexed ones."""
+        job = Job.objects.create(title="Data", requirements=["Machine Learning", "Python"])
+        near = Candidate.objects.create(name="Near", skills=["ML", "Python"], experience_years=3)
+        for i in range(20):
+            Candidate.objects.create(name=f"Far {i}", skills=[f"Welding {i}", "Forklift"], experience_years=3)
+
+        with override_settings(SKILLMATCH_SEMANTIC=self.settings):
+            directory = semantic.build_semantic_index()
+            model = semantic.get_semantic_model()
+            self.assertEqual(model.directory, directory)
+            self.assertEqual(model.meta['candidates'], 21)
+
+            late = Candidate.objects.create(name="Late", skills=["Forklift"], experience_years=1)
+            index = MatchIndex.load()
+            batch = model.restrict(ScoringBatch.for_job(index, job.id), k=1, nprobe=2)
+            self.assertEqual(sorted(batch.candidate_ids.tolist()), [near.id, late.id])
+
+    def test_index_per_tenant(self):
+        """A small tenant's candidates are retrieved from its own index, whatever the other tenants hold."""
+        acme = Tenant.objects.create(slug='acme', name="Acme")
+        for i in range(20):
+            Candidate.objects.create(name=f"Own {i}", skills=["Machine Learning", "Python"], experience_years=3)
+        job = Job.objects.create(title="Data", requirements=["Machine Learning", "Python"], tenant=acme)
+        ada = Candidate.objects.create(name="Ada", skills=["ML", "Python"], experience_years=3, tenant=acme)
+
+        with override_settings(SKILLMATCH_SEMANTIC=self.settings):
+            out = io.StringIO()
+            call_command('build_semantic_index', stdout=out)
+            self.assertEqual([json.loads(line)['candidates'] for line in out.getvalue().splitlines()[:3:2]], [20, 1])
+            with use_tenant(acme):
+                model = semantic.get_semantic_model()
+                self.assertEqual(model.candidate_ids.tolist(), [ada.id])
+                batch = model.restrict(ScoringBatch.for_job(MatchIndex.load(acme.pk), job.id), k=1, nprobe=2)
+            self.assertEqual(batch.candidate_ids.tolist(), [ada.id])
+            self.assertEqual(semantic.get_semantic_model().meta['candidates'], 20)
+
+
+class MatchSnapshotTestCase(TransactionTestCase):
+    """Tests for the memory-mapped match snapshot."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings = {'ENABLED': True, 'PATH': Path(directory.name), 'TOP_K': 2, 'CHECK_INTERVAL': 0}
+
+    def test_writer_keeps_top_k_and_answers_pairs(self):
+        """Only the best TOP_K candidates per job are kept, best first."""
+        writer = match_snapshot.SnapshotWriter(top_k=2)
+        writer.add(7, [10, 11, 12], [20.0, 90.0, 50.0])
+        writer.add(3, [10], [40.0])
+        snapshot = match_snapshot.MatchSnapshot(writer.publish(self.settings['PATH']))
+
+        self.assertEqual(snapshot.top(7), [(11, 90.0), (12, 50.0)])
+        self.assertEqual(snapshot.top(3, limit=5), [(10, 40.0)])
+        self.assertIsNone(snapshot.top(99))
+        self.assertEqual(snapshot.score(12, 7), (True, 50.0))
+        self.assertEqual(snapshot.score(10, 7), (True, None))
+        self.assertEqual(snapshot.score(10, 99), (False, None))
+
+    def test_prune_keeps_versions_next_to_tenant_trees(self):
+        path = self.settings['PATH']
+        VersionedDirectory(path / 'tenants' / 'acme').publish(lambda directory: None)
+        versions = [VersionedDirectory(path, keep=2).publish(lambda directory: None) for _ in range(3)]
+        self.assertEqual(sorted(entry.name for entry in path.iterdir() if entry.is_dir()),
+                         sorted([versions[1].name, versions[2].name, 'tenants']))
+        self.assertIsNotNone(VersionedDirectory(path / 'tenants' / 'acme').current())
+
+    def test_match_run_publishes_snapshot(self):
+        """Reads use the snapshot after a run and the database before."""
+        job = Job.objects.create(title="Backend", requirements=["Python", "Django"])
+        ada = Candidate.objects.create(name="Ada", skills=["Python", "Django"], experience_years=3)
+        bob = Candidate.objects.create(name="Bob", skills=["Python"], experience_years=3)
+        cy = Candidate.objects.create(name="Cy", skills=[], experience_years=3)
+
+        with override_settings(SKILLMATCH_SNAPSHOT=self.settings):
+            response = self.client.get(reverse('match-top'), {'job_id': job.id})
+            self.assertEqual((response.data['source'], response.data['results']), ('database', []))
+
+            response = self.client.post(reverse('match-match-candidates'))
+            self.assertEqual(response.status_code, 201, response.data)
+            version = response.data['snapshot']
+
+            response = self.client.get(reverse('match-top'), {'job_id': job.id})
+            self.assertEqual(response.data['snapshot'], version)
+            self.assertEqual(response.data['results'], [
+                {'candidate_id': ada.id, 'score': 100.0}, {'candidate_id': bob.id, 'score': 50.0}])
+
+            response = self.client.get(reverse('match-pair-score'), {'candidate_id': bob.id, 'job_id': job.id})
+            self.assertEqual((response.data['source'], response.data['score']), ('snapshot', 50.0))
+            # Candidates past the snapshot's TOP_K are read from the database
+            response = self.client.get(reverse('match-pair-score'), {'candidate_id': cy.id, 'job_id': job.id})
+            self.assertEqual((response.data['source'], response.data['score']), ('database', 0.0))
+            response = self.client.get(reverse('match-pair-score'), {'candidate_id': 0, 'job_id': job.id})
+            self.assertEqual(response.status_code, 404)
+
+        with override_settings(SKILLMATCH_SNAPSHOT={**self.settings, 'ENABLED': False}):
+            response = self.client.get(reverse('match-top'), {'job_id': job.id})
+            self.assertEqual(response.data['source'], 'database')
+
+
+class MatchRunTestCase(TransactionTestCase):
+    """Tests for checkpointed, resumable matching runs."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+        self.job = Job.objects.create(title="Backend", requirements=["Python", "Django"])
+        self.candidates = [
+            Candidate.objects.create(name=f"C{i}", skills=["Python"], experience_years=1)
+            for i in range(5)
+        ]
+
+    def test_run_records_progress(self):
+        """A run commits one checkpoint per shard and records its counts."""
+        response = self.client.post(reverse('match-match-candidates'), {'shard_size': 2})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertFalse(response.data['resumed'])
+
+        run = MatchRun.objects.get(pk=response.data['run']['id'])
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual((run.shards_completed, run.pairs_scored, run.matches_created), (3, 5, 5))
+        self.assertEqual(run.last_candidate_id, self.candidates[-1].id)
+        self.assertGreater(run.duration_seconds, 0)
+
+        response = self.client.get(reverse('matchrun-detail', args=[run.pk]))
+        self.assertEqual(response.data['matches_created'], 5)
+
+    def test_concurrent_claims_start_one_run(self):
+        """While another process is claiming a run, no second run is started."""
+        held, release = threading.Event(), threading.Event()
+
+        def claim_elsewhere():
+            # Its own thread, so its own connection and session
+            with connections['default'].cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_lock(%s, 0)", [match_runs.CLAIM_LOCK_CLASS])
+                held.set()
+                release.wait(5)
+                cursor.execute("SELECT pg_advisory_unlock(%s, 0)", [match_runs.CLAIM_LOCK_CLASS])
+            connections['default'].close()
+
+        thread = threading.Thread(target=claim_elsewhere)
+        thread.start()
+        held.wait(5)
+        try:
+            with self.assertRaises(match_runs.RunInProgress) as caught:
+                match_runs.run_matching()
+            self.assertIsNone(caught.exception.run)
+            self.assertFalse(MatchRun.objects.exists())
+        finally:
+            release.set()
+            thread.join()
+        self.assertFalse(match_runs.run_matching()[1])
+
+    def test_failed_run_resumes_from_checkpoint(self):
+        """After a failure only the shards past the checkpoint are scored again."""
+        upsert = match_runs._upsert
+        calls = []
+
+        def failing_upsert(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return upsert(*args)
+
+        with patch.object(match_runs, '_upsert', failing_upsert):
+            with self.assertRaises(RuntimeError):
+                match_runs.run_matching(shard_size=2)
+        run = MatchRun.objects.get()
+        self.assertEqual((run.status, run.shards_completed), ('failed', 1))
+        self.assertEqual(run.last_candidate_id, self.candidates[1].id)
+        self.assertEqual(Match.objects.count(), 2)
+
+        resumed_run, resumed = match_runs.run_matching()
+        self.assertTrue(resumed)
+        self.assertEqual(resumed_run.pk, run.pk)
+        self.assertEqual((resumed_run.status, resumed_run.attempts), ('completed', 2))
+        self.assertEqual((resumed_run.pairs_scored, resumed_run.matches_updated), (5, 0))
+        self.assertEqual(Match.objects.count(), 5)
+
+
+@override_settings(SKILLMATCH_SUMMARY={'ENABLED': True})
+class MatchSummaryTestCase(TransactionTestCase):
+    """Tests for the denormalized match list table."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+        self.job = Job.objects.create(title="Backend", requirements=["Python", "Django"])
+        self.ada = Candidate.objects.create(name="Ada", skills=["Python", "Django"], experience_years=3)
+        self.bob = Candidate.objects.create(name="Bob", skills=["Python"], experience_years=3)
+
+    def list_matches(self):
+        response = self.client.get(reverse('match-list'))
+        self.assertEqual(response.status_code, 200)
+        return [(row['candidate_name'], row['job_title'], row['score']) for row in response.data['results']]
+
+    def test_list_follows_runs_and_renames(self):
+        """Runs, renames and deletes reach the list without a full refresh."""
+        match_runs.run_matching()
+        self.assertEqual(self.list_matches(), [("Ada", "Backend", 100.0), ("Bob", "Backend", 50.0)])
+
+        self.bob.name = "Robert"
+        self.bob.save()
+        self.job.title = "Platform"
+        self.job.save()
+        self.assertEqual(self.list_matches(), [("Ada", "Platform", 100.0), ("Robert", "Platform", 50.0)])
+
+        self.ada.delete()
+        self.assertEqual(self.list_matches(), [("Robert", "Platform", 50.0)])
+
+    def test_list_matches_joined_list(self):
+        """The summary list returns what the joined list returns."""
+        match_runs.run_matching()
+        Match.objects.filter(candidate=self.bob).update(score=75.0)
+        MatchSummary.objects.all().delete()
+        call_command('refresh_match_summary', stdout=io.StringIO())
+        summary = self.client.get(reverse('match-list')).data
+
+        get_response_cache().clear()
+        with override_settings(SKILLMATCH_SUMMARY={'ENABLED': False}):
+            joined = self.client.get(reverse('match-list')).data
+        self.assertEqual(summary, joined)
+        self.assertEqual(summary['count'], 2)
+
+
+class PartitionedMatchTestCase(TransactionTestCase):
+    """Tests for the hash partitions of the match table."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+        self.job = Job.objects.create(title="Backend", requirements=["Python", "Django"])
+        self.ada = Candidate.objects.create(name="Ada", skills=["Python", "Django"], experience_years=3)
+        self.bob = Candidate.objects.create(name="Bob", skills=["Python"], experience_years=3)
+
+    def partition_of_matches(self):
+        with connections['default'].cursor() as cursor:
+            cursor.execute("SELECT DISTINCT tableoid::regclass::text FROM skillmatch_match WHERE job_id = %s",
+                           [self.job.id])
+            return [name for name, in cursor.fetchall()]
+
+    def test_rematch_reloads_job_matches(self):
+        """Rematching a job replaces its matches, which stay in one partition."""
+        other = Job.objects.create(title="Data", requirements=["SQL"])
+        match_runs.run_matching()
+        partition, = self.partition_of_matches()
+
+        self.bob.status = 'inactive'
+        self.bob.save()
+        response = self.client.post(reverse('job-rematch', args=[self.job.id]))
+        self.assertEqual(response.data['matches'], 1)
+        self.assertEqual(list(Match.objects.filter(job=self.job).values_list('candidate_id', 'score')),
+                         [(self.ada.id, 100.0)])
+        self.assertEqual(Match.objects.filter(job=other).count(), 2)
+        self.assertEqual(self.partition_of_matches(), [partition])
+
+        response = self.client.get(reverse('match-list'), {'job_id': other.id})
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get(reverse('match-list'), {'job_id': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_partitions_are_fixed(self):
+        """Jobs come and go without DDL, and reads by job are pruned to one partition."""
+        names = partitions.partition_names()
+        self.assertEqual(len(names), partitions.PARTITIONS)
+        jobs = [Job.objects.create(title=f"Job {i}", requirements=["Python"]) for i in range(20)]
+        Job.objects.filter(pk__in=[job.pk for job in jobs[:10]]).delete()
+        self.assertEqual(partitions.partition_names(), names)
+
+        plan = Match.objects.filter(job_id=self.job.id).explain()
+        self.assertEqual(len(set(re.findall(r'\bskillmatch_match_p\d+\b', plan))), 1)
+
+
+class MatchRetentionTestCase(TransactionTestCase):
+    """Tests for score thresholds, per-job caps and match pruning."""
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.job = Job.objects.create(title="Backend", requirements=["Python", "Django", "SQL", "Go"])
+        self.candidates = [
+            Candidate.objects.create(name=f"C{len(skills)}", skills=skills, experience_years=1)
+            for skills in [[], ["Python"], ["Python", "SQL"], ["Python", "SQL", "Go"], ["Python", "Django"]]
+        ]
+
+    def stored(self):
+        return sorted(Match.objects.filter(job=self.job).values_list('candidate_id', 'score'))
+
+    @override_settings(SKILLMATCH_RETENTION={'MIN_SCORE': 1.0, 'TOP_N_PER_JOB': 2})
+    def test_run_stores_only_retained_pairs(self):
+        """Runs skip low scores, cap matches per job and drop ones that fell out."""
+        c0, c1, c2, c3, c4 = self.candidates
+        run, _ = match_runs.run_matching(shard_size=2)
+        # Ties at the cut are broken by candidate id
+        self.assertEqual(self.stored(), [(c2.id, 50.0), (c3.id, 75.0)])
+        self.assertEqual(run.pairs_scored, 5)
+
+        c3.skills = ["Rust"]
+        c3.save()
+        run, _ = match_runs.run_matching(shard_size=2)
+        self.assertEqual(self.stored(), [(c2.id, 50.0), (c4.id, 50.0)])
+        # C3 fell out; C1 made the top 2 of its shard and was trimmed at the end
+        self.assertEqual(run.matches_deleted, 2)
+
+        self.assertEqual(match_runs.rematch_job(self.job.id), 2)
+        self.assertEqual(self.stored(), [(c2.id, 50.0), (c4.id, 50.0)])
+
+    def test_prune_matches(self):
+        """Pruning removes matches of inactive records and outside the policy."""
+        other = Job.objects.create(title="Data", requirements=["SQL"])
+        match_runs.run_matching()
+        self.assertEqual(Match.objects.count(), 10)
+
+        self.candidates[4].status = 'inactive'
+        self.candidates[4].save()
+        other.status = 'inactive'
+        other.save()
+        counts = retention.prune_matches(batch_size=1, min_score=1.0)
+        self.assertEqual(counts, {
+            'inactive_jobs': 5, 'inactive_candidates': 1, 'below_min_score': 1, 'over_top_n': 0})
+        self.assertEqual(
+            [candidate_id for candidate_id, _ in self.stored()], [c.id for c in self.candidates[1:4]])
+        self.assertFalse(Match.objects.filter(job=other).exists())
+
+    def test_trim_in_batches(self):
+        """Trimming ranks once and deletes past the N-th match, ties broken by candidate id."""
+        c0, c1, c2, c3, c4 = self.candidates
+        match_runs.run_matching()
+        self.assertEqual(retention.trim(self.job.id, 2, batch_size=1), 3)
+        self.assertEqual(self.stored(), [(c2.id, 50.0), (c3.id, 75.0)])
+        self.assertEqual(retention.trim(self.job.id, 2), 0)
+
+
+class BatchMatchTestCase(TransactionTestCase):
+    """Tests for single and batch match creation."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+        self.job = Job.objects.create(title="Backend", requirements=["Python", "Django"])
+        self.ada = Candidate.objects.create(name="Ada", skills=["Python", "Django"], experience_years=3)
+        self.bob = Candidate.objects.create(name="Bob", skills=["Python"], experience_years=3)
+
+    def test_create_match_upserts(self):
+        """A repeated create_match updates the pair instead of failing."""
+        url = reverse('match-create-match')
+        response = self.client.post(url, {'candidate_id': self.bob.id, 'job_id': self.job.id}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['candidate']['name'], "Bob")
+
+        Match.objects.filter(pk=response.data['id']).update(score=10.0)
+        response = self.client.post(
+            url, {'candidate_id': self.bob.id, 'job_id': self.job.id, 'recalculate': False}, format='json')
+        self.assertEqual((response.status_code, response.data['score']), (200, 10.0))
+        response = self.client.post(url, {'candidate_id': self.bob.id, 'job_id': self.job.id}, format='json')
+        self.assertEqual((response.status_code, response.data['score']), (200, 50.0))
+        self.assertEqual(Match.objects.count(), 1)
+
+        response = self.client.post(url, {'candidate_id': 0, 'job_id': self.job.id}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_many(self):
+        """Pairs are scored and upserted together; unknown ids are reported per pair."""
+        Match.objects.create(candidate=self.ada, job=self.job, score=1.0, rationale="old")
+        response = self.client.post(reverse('match-create-many'), {'pairs': [
+            [self.ada.id, self.job.id],
+            {'candidate_id': self.bob.id, 'job_id': self.job.id},
+            [self.bob.id, self.job.id],
+            [0, self.job.id],
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            (response.data['matches_created'], response.data['matches_updated'], response.data['errors']),
+            (1, 1, 1))
+        results = response.data['results']
+        self.assertEqual([(r['score'], r['created']) for r in results[:2]], [(100.0, False), (50.0, True)])
+        self.assertEqual(results[2], {'candidate_id': 0, 'job_id': self.job.id, 'error': "Candidate not found."})
+        self.assertEqual(sorted(Match.objects.values_list('score', flat=True)), [50.0, 100.0])
+
+        response = self.client.post(reverse('match-create-many'), {'pairs': [["x", 1]]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class RequestCoalescingTestCase(TransactionTestCase):
+    """Tests for single-flight coalescing of duplicate requests."""
+
+    def test_concurrent_parses_share_one_computation(self):
+        """Simultaneous parses of one CV parse once and get the same candidate."""
+        upload = CVUpload.objects.create(file=SimpleUploadedFile("cv.pdf", b"cv"))
+        calls = []
+
+        async def slow_parse(file_obj):
+            calls.append(file_obj)
+            await asyncio.sleep(0.3)
+            return {'name': 'Jane Doe', 'skills': ['Python'], 'experience_years': 2}
+
+        responses = []
+
+        def post():
+            responses.append(APIClient().post(reverse('cvupload-parse', kwargs={'pk': upload.id})))
+
+        with patch('skillmatch.views.parse_cv_file', slow_parse):
+            threads = [threading.Thread(target=post) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response.status_code for response in responses], [201] * 3)
+        self.assertEqual(len({response.data['id'] for response in responses}), 1)
+        self.assertEqual(Candidate.objects.count(), 1)
+
+    def test_errors_are_shared_and_not_cached(self):
+        """A failed computation fails its waiters, and the next call runs again."""
+        flights = coalescing.SingleFlight()
+        started = threading.Event()
+
+        async def fail():
+            started.set()
+            await asyncio.sleep(0.1)
+            raise RuntimeError("boom")
+
+        async def wait_for_leader():
+            await asyncio.to_thread(started.wait)
+            return await flights.run('key', fail)
+
+        async def both():
+            return await asyncio.gather(flights.run('key', fail), wait_for_leader(), return_exceptions=True)
+
+        results = asyncio.run(both())
+        self.assertEqual([type(result) for result in results], [RuntimeError, RuntimeError])
+
+        async def succeed():
+            return 42
+        self.assertEqual(asyncio.run(flights.run('key', succeed)), 42)
+
+
+THROTTLING = {
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'test-throttle',
+    'BUCKETS': {'compute': {'BURST': 10, 'RATE': 1.0}},
+    'COSTS': {'match-create-many': ('compute', 1)},
+    'MAX_IN_FLIGHT': {'cvupload-parse': 1},
+}
+
+
+@override_settings(SKILLMATCH_THROTTLING=THROTTLING)
+class ThrottlingTestCase(TransactionTestCase):
+    """Tests for per-client rate limits and admission control."""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_token_bucket_refills(self):
+        buckets = throttling.TokenBuckets(caches['default'], 'test-throttle')
+        self.assertEqual(buckets.take('k', 8, burst=10, rate=2.0, now=100.0), 0)
+        self.assertEqual(buckets.take('k', 5, burst=10, rate=2.0, now=100.0), 1.5)
+        self.assertEqual(buckets.take('k', 5, burst=10, rate=2.0, now=101.5), 0)
+        # A cost above the burst size waits for a full bucket
+        self.assertEqual(buckets.take('k', 50, burst=10, rate=2.0, now=101.5), 5.0)
+
+    def test_batch_cost_per_item_and_client(self):
+        url = reverse('match-create-many')
+        pairs = lambda n: {'pairs': [[1, job_id] for job_id in range(n)]}  # noqa: E731
+        client = APIClient()
+        self.assertEqual(client.post(url, pairs(8), format='json').status_code, 200)
+
+        response = client.post(url, pairs(5), format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3')
+
+        # Another client has its own bucket
+        other = APIClient(REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.post(url, pairs(5), format='json').status_code, 200)
+
+    def test_overload_is_shed_with_503(self):
+        uploads_ = [CVUpload.objects.create(file=f"cvs/busy_{i}.pdf") for i in range(2)]
+        parsing = threading.Event()
+
+        async def slow_parse(file_obj):
+            parsing.set()
+            await asyncio.sleep(0.3)
+            return {'name': 'Jane Doe', 'skills': ['Python'], 'experience_years': 2}
+
+        responses = []
+
+        def post(upload):
+            responses.append(APIClient().post(reverse('cvupload-parse', kwargs={'pk': upload.id})))
+
+        with patch('skillmatch.views.parse_cv_file', slow_parse):
+            first = threading.Thread(target=post, args=(uploads_[0],))
+            first.start()
+            parsing.wait(5)
+            post(uploads_[1])
+            first.join()
+            self.assertEqual([response.status_code for response in responses], [503, 201])
+            self.assertEqual(responses[0]['Retry-After'], '1')
+            self.assertEqual(throttling.admission.running('cvupload-parse'), 0)
+
+            # Admitted again once the first request finished
+            post(uploads_[1])
+        self.assertEqual(responses[-1].status_code, 201)
+
+
+@override_settings(SKILLMATCH_EVENTS={'HEARTBEAT': 0.2})
+class MatchEventsTestCase(TransactionTestCase):
+    """Tests for the match change feed."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.job = Job.objects.create(title="Backend", requirements=["Python"])
+        self.other_job = Job.objects.create(title="Frontend", requirements=["React"])
+        self.candidates = [
+            Candidate.objects.create(name=f"C{i}", skills=["Python"], experience_years=1) for i in range(3)
+        ]
+
+    def subscribe(self, **filters):
+        subscription = match_events.Subscription(**filters)
+        listener = match_events.get_listener()
+        listener.subscribe(subscription)
+        self.addCleanup(listener.unsubscribe, subscription)
+        self.assertTrue(listener.wait_listening(5))
+        return subscription
+
+    def drain(self, subscription):
+        events = []
+        while (event := subscription.get(timeout=0.5)) is not None:
+            events.append(event)
+        return events
+
+    def test_runs_publish_committed_changes(self):
+        subscription = self.subscribe(job_ids=[self.job.id])
+        self.client.post(reverse('match-match-candidates'), {'shard_size': 2})
+        events = self.drain(subscription)
+        self.assertEqual(sorted((event['type'], event['candidate_id']) for event in events),
+                         [('created', candidate.id) for candidate in self.candidates])
+        self.assertEqual({event['job_id'] for event in events}, {self.job.id})
+
+        self.client.post(reverse('match-match-candidates'), {'restart': True})
+        self.assertEqual([event['type'] for event in self.drain(subscription)], ['updated'] * 3)
+
+        # Rolled back writes are never announced
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            candidate = Candidate.objects.create(name="C3", skills=[], experience_years=0)
+            Match.objects.create(candidate=candidate, job=self.job, score=1.0)
+            match_events.publish([{'type': 'replaced', 'job_id': self.job.id}])
+            raise RuntimeError
+        self.assertEqual(self.drain(subscription), [])
+
+    def test_filters_and_overflow(self):
+        subscription = match_events.Subscription(candidate_ids=[1], maxsize=2)
+        subscription.deliver([match_events.match_event(i, i % 2, 7, 50.0, True) for i in range(10)])
+        subscription.deliver([{'type': 'replaced', 'job_id': 7}])
+        self.assertEqual([event['id'] for event in (subscription.get(0), subscription.get(0))], [1, 3])
+        self.assertEqual(subscription.get(0), {'type': 'reset'})
+        self.assertIsNone(subscription.get(0))
+
+        payloads = match_events.encode([match_events.match_event(i, i, i, 1.0, False) for i in range(500)])
+        self.assertGreater(len(payloads), 1)
+        self.assertTrue(all(len(payload) <= match_events.MAX_PAYLOAD_BYTES for payload in payloads))
+        self.assertEqual(sum(len(json.loads(payload)) for payload in payloads), 500)
+
+    def test_event_stream(self):
+        response = self.client.get(reverse('match-events'), {'candidate_id': self.candidates[1].id},
+                                   HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertIn(b'retry:', next(chunks))
+
+        self.client.post(reverse('match-create-many'), {
+            'pairs': [[candidate.id, self.job.id] for candidate in self.candidates]}, format='json')
+        chunk = next(chunks)
+        while chunk.startswith(b':'):
+            chunk = next(chunks)
+        event, data = chunk.decode().split('\n')[:2]
+        self.assertEqual(event, 'event: created')
+        self.assertEqual(json.loads(data[len('data: '):])['candidate_id'], self.candidates[1].id)
+
+        response.close()
+        self.assertEqual(match_events.get_listener().subscribers, 0)
+        response = self.client.get(reverse('match-events'), {'job_id': 'x'}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 400)
+
+
+class AdminTestCase(TransactionTestCase):
+    """Tests for the admin changelists of the large tables."""
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.job = Job.objects.create(title="Python Developer", requirements=["Python"])
+
+    def add_matches(self, count):
+        for _ in range(count):
+            candidate = Candidate.objects.create(name="Ada Lovelace", skills=["Python"], experience_years=1)
+            Match.objects.create(candidate=candidate, job=self.job, score=50.0, rationale="")
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        url = reverse('admin:skillmatch_match_changelist')
+        self.add_matches(2)
+        few = self.changelist_queries(url)
+        self.add_matches(10)
+        self.assertEqual(self.changelist_queries(url), few)
+        response = self.client.get(url, {'job__id__exact': self.job.id})
+        self.assertEqual(response.context['cl'].result_count, 12)
+
+        response = self.client.get(reverse('admin:skillmatch_candidate_changelist'), {'q': 'lovel'})
+        self.assertEqual(response.context['cl'].result_count, 12)
+        response = self.client.get(reverse('admin:skillmatch_candidate_changelist'), {'q': 'babbage'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_rematch_action(self):
+        Candidate.objects.create(name="Ada", skills=["Python"], experience_years=1)
+        inactive = Job.objects.create(title="Old", requirements=["Python"], status='inactive')
+        response = self.client.post(reverse('admin:skillmatch_job_changelist'), {
+            'action': 'rematch', '_selected_action': [self.job.id, inactive.id]}, follow=True)
+        self.assertContains(response, "Rematched 1 jobs, storing 1 matches.")
+        self.assertEqual(list(Match.objects.values_list('job_id', flat=True)), [self.job.id])
+
+    @patch.dict('skillmatch.services.profiles._match_indexes', clear=True)
+    def test_status_actions_reach_matching(self):
+        ada = Candidate.objects.create(name="Ada", skills=["Python"], experience_years=1)
+        # Older than the match index's refresh overlap
+        Candidate.objects.filter(pk=ada.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(match_runs.rematch_job(self.job.pk), 1)
+
+        self.client.post(reverse('admin:skillmatch_candidate_changelist'), {
+            'action': 'deactivate', '_selected_action': [ada.id]})
+        self.assertEqual(match_runs.rematch_job(self.job.pk), 0)
+        self.client.post(reverse('admin:skillmatch_candidate_changelist'), {
+            'action': 'activate', '_selected_action': [ada.id]})
+        self.assertEqual(match_runs.rematch_job(self.job.pk), 1)
+
+    def test_tenant_filter_picks_the_database(self):
+        acme = Tenant.objects.create(slug='acme', name="Acme")
+        job = Job.objects.create(title="Acme Developer", requirements=["Python"], tenant=acme)
+        urls = [
+            (reverse('admin:skillmatch_job_changelist'), {'tenant__id__exact': acme.pk}),
+            (reverse('admin:skillmatch_job_change', args=[job.pk]),
+             {'_changelist_filters': f'tenant__id__exact={acme.pk}'}),
+        ]
+        for url, params in urls:
+            with patch('skillmatch.core.tenancy.tenant_database', return_value='default') as routed:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(acme, [call.args[0] for call in routed.call_args_list])
+
+
+@override_settings(SKILLMATCH_CACHE={'ENABLED': False})
+class QueryBudgetTestCase(TransactionTestCase):
+    """
+    Query-count budgets: list endpoints take the same number of queries
+    whatever the number of rows on the page, and match runs a fixed number
+    per shard whatever the number of pairs in it.
+    """
+
+    # Queries per request, with at most a page of rows
+    BUDGETS = {
+        'candidate-list': 2,
+        'job-list': 2,
+        'match-list': 3,  # Count estimate, count of a small table, page
+        'cvupload-list': 2,
+        'matchrun-list': 2,
+    }
+
+    def seed(self, candidates, jobs, matches=True):
+        """Add ``candidates`` x ``jobs`` with a match for every pair."""
+        new_jobs = [Job.objects.create(title=f"Job {i}", requirements=["Python", "SQL"]) for i in range(jobs)]
+        new_candidates = Candidate.objects.bulk_create([
+            Candidate(name=f"Candidate {i}", skills=["Python"], experience_years=i % 10) for i in range(candidates)
+        ])
+        if matches:
+            Match.objects.bulk_create([
+                Match(candidate=candidate, job=job, score=50.0, rationale="")
+                for candidate in new_candidates for job in new_jobs
+            ])
+        CVUpload.objects.bulk_create([CVUpload(file=f"cvs/seed_{i}.pdf") for i in range(candidates)])
+        MatchRun.objects.bulk_create([MatchRun(job_ids=[job.pk for job in new_jobs]) for _ in range(candidates)])
+
+    def count_queries(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connections['default']) as queries:
+            func(*args, **kwargs)
+        return len(queries)
+
+    def test_list_endpoints_are_constant_in_rows(self):
+        client = APIClient()
+        self.seed(2, 1)
+        few = {name: self.count_queries(client.get, reverse(name)) for name in self.BUDGETS}
+        self.seed(15, 2)
+        many = {name: self.count_queries(client.get, reverse(name)) for name in self.BUDGETS}
+        self.assertEqual(many, few)
+        for name, budget in self.BUDGETS.items():
+            self.assertLessEqual(many[name], budget, name)
+
+        # Filtered and summary-backed match lists
+        job = Job.objects.order_by('pk').first()
+        self.assertLessEqual(self.count_queries(client.get, reverse('match-list'), {'job_id': job.pk}), 2)
+        with override_settings(SKILLMATCH_SUMMARY={'ENABLED': True}):
+            call_command('refresh_match_summary', stdout=io.StringIO())
+            self.assertLessEqual(self.count_queries(client.get, reverse('match-list')), 3)
+        self.assertLessEqual(self.count_queries(client.get, reverse('candidate-list'), {'q': 'candid'}), 2)
+
+    def test_match_runs_scale_with_shards_not_pairs(self):
+        self.seed(4, 1, matches=False)
+
+        def run(shard_size):
+            get_match_index(prune=True)  # Loading the index is not part of the budget
+            return self.count_queries(match_runs.run_matching, shard_size=shard_size, restart=True)
+
+        two_shards = run(2)
+        four_shards = run(1)
+        per_shard = (four_shards - two_shards) // 2
+        self.assertEqual(four_shards - two_shards, 2 * per_shard)
+        # Upsert and notify per chunk, then the checkpoint and reloading the run
+        self.assertLessEqual(per_shard, 6)
+
+        # Four times the pairs in as many shards
+        for i in range(3):
+            Job.objects.create(title=f"More {i}", requirements=["Python"])
+        self.assertEqual(run(2), two_shards)
+
+        # More statements only when a shard outgrows an upsert chunk
+        with patch.object(match_runs, 'UPSERT_CHUNK_SIZE', 4):
+            self.assertEqual(run(2), two_shards + 2 * 2)
+
+
+class LatencyBudgetTestCase(TransactionTestCase):
+    """
+    Wall-clock smoke budgets on a seeded dataset, against the local
+    Postgres. Generous, to catch order-of-magnitude regressions rather
+    than noise; scale them with SKILLMATCH_LATENCY_FACTOR on slow machines.
+    """
+
+    CANDIDATES = 3000
+    JOBS = 10
+    FACTOR = float(os.environ.get('SKILLMATCH_LATENCY_FACTOR', 1))
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.client = APIClient()
+        skills = ["Python", "Django", "SQL", "Go", "React", "AWS", "Docker", "Rust"]
+        for i in range(self.JOBS):
+            Job.objects.create(title=f"Job {i}", requirements=skills[i % 4:i % 4 + 4])
+        Candidate.objects.bulk_create([
+            Candidate(name=f"Candidate {i}", skills=skills[i % 8:] + skills[:i % 3], experience_years=i % 15)
+            for i in range(self.CANDIDATES)
+        ])
+
+    def assertFasterThan(self, seconds, func, *args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, seconds * self.FACTOR, f"took {elapsed:.2f}s, budget {seconds}s")
+        return result
+
+    def test_smoke_budgets(self):
+        response = self.assertFasterThan(20, self.client.post, reverse('match-match-candidates'))
+        self.assertEqual(response.data['matches_created'], self.CANDIDATES * self.JOBS)
+        job = Job.objects.order_by('pk').first()
+
+        for name, params in [('match-list', {}), ('match-list', {'job_id': job.pk}),
+                             ('candidate-list', {'q': 'candidate 12'}), ('job-list', {}),
+                             ('match-top', {'job_id': job.pk})]:
+            response = self.assertFasterThan(1, self.client.get, reverse(name), params)
+            self.assertEqual(response.status_code, 200, name)
+
+        response = self.client.get(reverse('match-export'), {'job_id': job.pk, 'format': 'ndjson'})
+        lines = self.assertFasterThan(5, lambda: b''.join(response.streaming_content).splitlines())
+        self.assertEqual(len(lines), self.CANDIDATES)
+
+
+class ExtractionPoolTestCase(TransactionTestCase):
+    """Tests for CV text extraction in the worker pool."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.pool = extraction._pool = extraction.ExtractionPool(workers=1, queue_size=0, timeout=2)
+
+    def tearDown(self):
+        self.pool.close()
+        extraction._pool = None
+
+    def test_extracts_pdf_docx_and_text(self):
+        pdf = Path(__file__).resolve().parent.parent / 'data' / 'cv.pdf'
+        text = asyncio.run(self.pool.extract(str(pdf)))
+        self.assertIn("Software Engineering Lead", text)
+
+        docx = io.BytesIO()
+        with zipfile.ZipFile(docx, 'w') as archive:
+            archive.writestr('word/document.xml', (
+                '<w:document><w:body><w:p><w:r><w:t>Jane Doe</w:t></w:r></w:p>'
+                '<w:p><w:r><w:t xml:space="preserve">Python &amp; Django</w:t></w:r></w:p></w:body></w:document>'
+            ))
+        self.assertEqual(asyncio.run(self.pool.extract(docx.getvalue())), "Jane Doe\nPython & Django")
+        with self.assertRaises(extraction.ExtractionError):
+            asyncio.run(self.pool.extract(b"\x00\xff\x00binary"))
+
+    def test_timeouts_and_crashes_only_fail_their_file(self):
+        with self.assertRaises(extraction.ExtractionTimeout):
+            self.pool.run(time.sleep, 10)
+        with self.assertRaises(extraction.ExtractionError):
+            self.pool.run(os._exit, 1)
+        self.assertEqual(self.pool.run(len, "still works"), 11)
+        stats = self.pool.stats()
+        self.assertEqual((stats['timed_out'], stats['crashed'], stats['completed'], stats['alive']), (1, 1, 1, 1))
+
+    def test_parse_sheds_load_when_saturated(self):
+        upload = CVUpload.objects.create(file=SimpleUploadedFile("cv.txt", b"Jane Doe\nPython"))
+        busy = threading.Thread(target=self.pool.run, args=(time.sleep, 1))
+        busy.start()
+        time.sleep(0.2)
+        response = self.client.post(reverse('cvupload-parse', kwargs={'pk': upload.id}))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        busy.join()
+
+        # Bulk parses wait for the pool instead
+        other = CVUpload.objects.create(file=SimpleUploadedFile("other.txt", b"John Doe"))
+        response = self.client.post(reverse('cvupload-parse-many'), {'ids': [upload.id, other.id, 0]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(result['cv_id'] for result in response.data['results']), [upload.id, other.id])
+        self.assertEqual(response.data['errors'], [{'cv_id': 0, 'error': "CVUpload not found."}])
+        self.assertEqual(Candidate.objects.filter(source_cv__in=[upload, other]).count(), 2)
+
+
+class ParsedCVTestCase(TransactionTestCase):
+    """Tests for stored CV text and reparsing."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.pool = extraction._pool = extraction.ExtractionPool(workers=1, queue_size=0)
+
+    def tearDown(self):
+        self.pool.close()
+        extraction._pool = None
+
+    def test_parse_stores_text_and_reuses_it(self):
+        content = "Jane Doe\nPython developer " * 50
+        upload = CVUpload.objects.create(file=SimpleUploadedFile("cv.txt", content.encode()))
+        parse_url = reverse('cvupload-parse', kwargs={'pk': upload.id})
+        self.assertEqual(self.client.post(parse_url).status_code, 201)
+
+        parsed = ParsedCV.objects.get(cv_upload=upload)
+        self.assertEqual(parsed_cvs.decompress_text(parsed.text), content)
+        self.assertLess(len(parsed.text), len(content) // 4)
+        self.assertEqual((parsed.extractor_version, parsed.parser_version),
+                         (extraction.EXTRACTOR_VERSION, ai.PARSER_VERSION))
+
+        # Parsing again reads the stored text instead of the file
+        with patch('skillmatch.services.ai.extract_cv_text', side_effect=AssertionError("extracted")):
+            self.assertEqual(self.client.post(parse_url).status_code, 200)
+
+    def test_reparse_outdated_versions(self):
+        uploads_ = [CVUpload.objects.create(file=f"cvs/reparse_{i}.txt") for i in range(3)]
+        for upload in uploads_:
+            parsed_cvs.store(upload.id, f"CV {upload.id}", {}, ai.PARSER_VERSION - 1)
+        ParsedCV.objects.filter(cv_upload=uploads_[2]).update(parser_version=ai.PARSER_VERSION)
+        candidate = Candidate.objects.create(name="Old", skills=[], experience_years=1, source_cv=uploads_[0])
+
+        def new_parser(text):
+            return {'name': text, 'skills': ['Go'], 'experience_years': 4}
+
+        with patch('skillmatch.services.ai.extract_cv_fields', new_parser):
+            self.assertEqual(parsed_cvs.reparse(batch_size=1), {'reparsed': 2, 'candidates_updated': 1})
+            self.assertEqual(parsed_cvs.reparse(), {'reparsed': 0, 'candidates_updated': 0})
+        candidate.refresh_from_db()
+        self.assertEqual((candidate.name, candidate.skills), (f"CV {uploads_[0].id}", ['Go']))
+        self.assertEqual(ParsedCV.objects.get(cv_upload=uploads_[1]).fields['experience_years'], 4)
+
+
+class ResumableUploadTestCase(TransactionTestCase):
+    """Tests for chunked, resumable CV uploads."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.content = b"%PDF-1.4 " + bytes(range(256)) * 40
+
+    def patch_chunk(self, session_id, offset, chunk):
+        return self.client.patch(
+            reverse('uploadsession-detail', kwargs={'pk': session_id}), data=chunk,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunked_upload_resumes_and_finalizes(self):
+        response = self.client.post(reverse('uploadsession-list'), {
+            'filename': '../resume.pdf', 'length': len(self.content),
+            'expected_sha256': hashlib.sha256(self.content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        session_id = response.data['id']
+        self.assertEqual(response['Upload-Offset'], '0')
+
+        self.assertEqual(self.patch_chunk(session_id, 0, self.content[:4000]).status_code, 204)
+        # A retried chunk at a stale offset is rejected with the offset to resume from
+        conflict = self.patch_chunk(session_id, 0, self.content[:4000])
+        self.assertEqual((conflict.status_code, conflict['Upload-Offset']), (409, '4000'))
+
+        # Another worker process continues the upload without the running digest
+        uploads._hashers.clear()
+        head = self.client.head(reverse('uploadsession-detail', kwargs={'pk': session_id}))
+        offset = int(head['Upload-Offset'])
+        self.assertEqual(self.patch_chunk(session_id, offset, self.content[offset:]).status_code, 204)
+
+        finalize_url = reverse('uploadsession-finalize', kwargs={'pk': session_id})
+        response = self.client.post(finalize_url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['upload']['sha256'], hashlib.sha256(self.content).hexdigest())
+        cv_upload = CVUpload.objects.get(pk=response.data['cv_upload']['id'])
+        self.assertTrue(cv_upload.file.name.startswith('cvs/resume'))
+        with cv_upload.file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+        # Finalizing again returns the same upload
+        self.assertEqual(self.client.post(finalize_url).data['cv_upload']['id'], cv_upload.id)
+
+    def test_concurrent_chunk_at_same_offset_is_rejected(self):
+        session = uploads.create_session('cv.pdf', 6)
+
+        class RacingStream(io.BytesIO):
+            def read(self, size=-1):
+                # Another request stores its chunk while this one is copied
+                UploadSession.objects.filter(pk=session.pk).update(offset=3)
+                return super().read(size)
+
+        with self.assertRaisesMessage(uploads.OffsetMismatch, "offset 3"):
+            uploads.write_chunk(session.pk, 0, RacingStream(b"abc"), 3)
+        self.assertEqual(UploadSession.objects.get(pk=session.pk).offset, 3)
+
+    def test_rejected_chunk_invalidates_the_running_digest(self):
+        session = uploads.create_session('cv.pdf', 6)
+        kept = {}
+
+        class LosingStream(io.BytesIO):
+            def read(self, size=-1):
+                if not kept:
+                    # The winning chunk at the same offset is stored meanwhile
+                    uploads.write_chunk(session.pk, 0, io.BytesIO(b"abc"), 3)
+                    kept.update(uploads._hashers)
+                return super().read(size)
+
+        with self.assertRaises(uploads.OffsetMismatch):
+            uploads.write_chunk(session.pk, 0, LosingStream(b"xyz"), 3)
+        # The winner's digest is kept after the loser dropped it
+        uploads._hashers.update(kept)
+        uploads.write_chunk(session.pk, 3, io.BytesIO(b"def"), 3)
+
+        session, _, _ = uploads.finalize(session.pk)
+        self.assertEqual(session.sha256, hashlib.sha256(Path(session.file.path).read_bytes()).hexdigest())
+
+    def test_checksum_mismatch_and_reaper(self):
+        session = uploads.create_session('cv.pdf', 3, expected_sha256='0' * 64)
+        self.patch_chunk(session.id, 0, b"abc")
+        response = self.client.post(reverse('uploadsession-finalize', kwargs={'pk': session.id}))
+        self.assertEqual(response.status_code, 400)
+
+        path = Path(session.file.path)
+        self.assertTrue(path.exists())
+        UploadSession.objects.filter(pk=session.pk).update(
+            updated_at=session.updated_at - timedelta(days=2))
+        self.assertEqual(uploads.reap_uploads(), {'abandoned': 1, 'completed': 0})
+        self.assertFalse(path.exists())
+
+
+class ProfilingTestCase(TransactionTestCase):
+    """Tests for request and match run profile captures."""
+
+    def setUp(self):
+        get_response_cache().clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings = {'PATH': directory.name, 'INTERVAL': 0.001}
+        override = override_settings(SKILLMATCH_PROFILING=self.settings)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.staff = get_user_model().objects.create_user('staff', password='pw', is_staff=True)
+        self.user = get_user_model().objects.create_user('user', password='pw')
+        Job.objects.create(title="Python Developer", requirements=["Python"])
+
+    def test_staff_request_is_profiled(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/jobs/', {'profile': 1})
+        self.assertNotIn('X-Profile-Id', response)
+        self.client.force_login(self.staff)
+        response = self.client.get('/api/jobs/', headers={'X-Profile': '1'})
+        profile_id = response['X-Profile-Id']
+
+        detail = self.client.get(f'/api/profiles/{profile_id}/').json()
+        self.assertEqual((detail['label'], detail['mode'], detail['status']), ("GET /api/jobs/", 'sample', 200))
+        self.assertTrue(any('skillmatch_job' in query['sql'] for query in detail['sql']))
+        self.assertEqual(detail['queries'], len(detail['sql']))
+        self.assertEqual([summary['id'] for summary in self.client.get('/api/profiles/').json()], [profile_id])
+
+        download = self.client.get(f'/api/profiles/{profile_id}/download/')
+        speedscope = json.loads(b''.join(download.streaming_content))
+        self.assertTrue(speedscope['profiles'])
+        profile = speedscope['profiles'][0]
+        self.assertEqual(len(profile['samples']), len(profile['weights']))
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(f'/api/profiles/{profile_id}/').status_code, 403)
+
+    @skipUnless(settings.SKILLMATCH_OPTIONAL_APPS['JWT'], "JWT authentication is switched off")
+    def test_jwt_staff_request_is_profiled(self):
+        # An optional app
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        def profiled(user):
+            response = self.client.get('/api/jobs/', {'profile': 1},
+                                       HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+            self.assertEqual(response.status_code, 200)
+            return 'X-Profile-Id' in response
+
+        self.assertTrue(profiled(self.staff))
+        self.assertFalse(profiled(self.user))
+
+    def test_async_request_is_profiled(self):
+        async def get():
+            await self.async_client.aforce_login(self.staff)
+            return await self.async_client.get('/api/jobs/', {'profile': 1})
+
+        profile_id = async_to_sync(get)()['X-Profile-Id']
+        # The view's queries ran in a sync_to_async thread
+        self.assertGreater(profiling.load_summary(profile_id)['queries'], 0)
+
+    def test_sample_rate(self):
+        self.settings['SAMPLE_RATE'] = 1.0
+        self.assertIn('X-Profile-Id', self.client.get('/api/jobs/'))
+        self.settings['ENABLED'] = False
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/jobs/'))
+
+    def test_cprofile_capture_and_keep(self):
+        self.settings['KEEP'] = 2
+        for _ in range(3):
+            with profiling.capture('jobs', mode='cprofile') as session:
+                list(Job.objects.all())
+        summaries = profiling.list_summaries()
+        self.assertEqual([summary['id'] for summary in summaries][0], session.id)
+        self.assertEqual(len(summaries), 2)
+        self.assertEqual(summaries[0]['queries'], 1)
+        # Only queries run inside a capture are recorded
+        list(Job.objects.all())
+        self.assertEqual(len(session.queries), 1)
+
+        stats = pstats.Stats(str(profiling.profiles_path() / session.id / 'profile.pstats'))
+        self.assertTrue(any(name == '__iter__' for _, _, name in stats.stats))
+
+    def test_run_matching_profile(self):
+        Candidate.objects.create(name="Ada", skills=["Python"], experience_years=1)
+        out = io.StringIO()
+        call_command('run_matching', '--profile', stdout=out)
+        self.assertIn("Profile ", out.getvalue())
+        self.assertEqual(profiling.list_summaries()[0]['label'], 'run_matching')
+
+
+class TenantTestCase(TransactionTestCase):
+    """Tests for tenant-scoped querysets, matching and routing."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_response_cache().clear()
+        self.acme = Tenant.objects.create(slug='acme', name="Acme")
+        self.globex = Tenant.objects.create(slug='globex', name="Globex")
+        self.user = get_user_model().objects.create_user('member', password='pw')
+        self.acme.members.add(self.user)
+        self.staff = get_user_model().objects.create_user('staff', password='pw', is_staff=True)
+
+    def test_lists_are_scoped_to_the_tenant(self):
+        Job.objects.create(title="Acme Backend", requirements=["Python"], tenant=self.acme)
+        Job.objects.create(title="Globex Backend", requirements=["Python"], tenant=self.globex)
+        Job.objects.create(title="Own Backend", requirements=["Python"])
+
+        def titles(**headers):
+            response = self.client.get(reverse('job-list'), headers=headers)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertIn('X-Tenant', response['Vary'])
+            return [job['title'] for job in response.data['results']]
+
+        self.assertEqual(titles(), ["Own Backend"])
+        # Naming a tenant takes a logged in user, whether the tenant exists or not
+        self.assertEqual(self.client.get(reverse('job-list'), headers={'X-Tenant': 'globex'}).status_code, 401)
+        self.assertEqual(self.client.get(reverse('job-list'), headers={'X-Tenant': 'initech'}).status_code, 401)
+        with override_settings(SKILLMATCH_TENANTS={'ALLOW_ANONYMOUS': True}):
+            self.assertEqual(titles(X_Tenant='globex'), ["Globex Backend"])
+
+        self.client.force_login(self.staff)
+        self.assertEqual(titles(X_Tenant='globex'), ["Globex Backend"])
+        self.assertEqual(self.client.get(reverse('job-list'), headers={'X-Tenant': 'initech'}).status_code, 404)
+
+        self.client.force_login(self.user)
+        # A member's only tenant is the default one
+        self.assertEqual(titles(), ["Acme Backend"])
+        self.assertEqual(self.client.get(reverse('job-list'), headers={'X-Tenant': 'globex'}).status_code, 403)
+
+        response = self.client.post(reverse('job-list'), {'title': "Acme Frontend", 'requirements': ["React"]},
+                                    format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Job.objects.get(pk=response.data['id']).tenant, self.acme)
+
+    def test_matching_runs_per_tenant(self):
+        acme_job = Job.objects.create(title="Backend", requirements=["Python"], tenant=self.acme)
+        acme_candidate = Candidate.objects.create(name="Ada", skills=["Python"], experience_years=3,
+                                                  tenant=self.acme)
+        Job.objects.create(title="Backend", requirements=["Python"], tenant=self.globex)
+        globex_candidate = Candidate.objects.create(name="Bob", skills=["Python"], experience_years=3,
+                                                    tenant=self.globex)
+
+        self.client.force_login(self.staff)
+        response = self.client.post(reverse('match-match-candidates'), headers={'X-Tenant': 'acme'})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['matches_created'], 1)
+        match = Match.objects.get()
+        self.assertEqual((match.candidate, match.job, match.tenant), (acme_candidate, acme_job, self.acme))
+        self.assertEqual(MatchRun.objects.get().tenant, self.acme)
+
+        # Each tenant has runs of its own, and no match crosses tenants
+        call_command('run_matching', tenant='globex', stdout=io.StringIO())
+        self.assertEqual(set(Match.objects.values_list('tenant', 'candidate')),
+                         {(self.acme.pk, acme_candidate.pk), (self.globex.pk, globex_candidate.pk)})
+        response = self.client.get(reverse('match-list'), headers={'X-Tenant': 'globex'})
+        self.assertEqual([row['candidate_name'] for row in response.data['results']], ["Bob"])
+        response = self.client.post(reverse('match-create-match'),
+                                    {'candidate_id': globex_candidate.pk, 'job_id': acme_job.pk},
+                                    headers={'X-Tenant': 'acme'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_import_keeps_external_ids_per_tenant(self):
+        content = b'external_id,title\nats-1,Django Developer\n'
+        self.client.force_login(self.staff)
+        for slug in ('acme', 'globex', 'acme'):
+            response = self.client.post(
+                reverse('job-import'),
+                {'file': SimpleUploadedFile("jobs.csv", content, content_type="text/csv")},
+                format='multipart', headers={'X-Tenant': slug})
+            self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(sorted(Job.objects.values_list('tenant__slug', flat=True)), ['acme', 'globex'])
+
+    @override_settings(SKILLMATCH_TENANTS={'DATABASES': {'globex': 'globex_db'}})
+    def test_router_places_tenants_on_their_database(self):
+        router = TenantRouter()
+        self.assertEqual(router.db_for_read(Job), 'default')
+        with use_tenant(self.globex):
+            self.assertEqual(router.db_for_read(Job), 'globex_db')
+            self.assertEqual(router.db_for_write(MatchRun), 'globex_db')
+            # Tenants and users stay in the default database
+            self.assertIsNone(router.db_for_read(Tenant))
+        self.assertEqual(router.db_for_write(Job, instance=self.globex), 'globex_db')
+        self.assertTrue(router.allow_relation(Job(), self.globex))
+
+    def test_maintenance_covers_every_database(self):
+        databases = {'acme': 'default', 'globex': 'globex_db', 'initech': 'initech_db'}
+        with override_settings(SKILLMATCH_TENANTS={'DATABASES': databases}):
+            # One tenant routes to each database; unknown slugs are skipped
+            self.assertEqual(database_tenants(), [('default', None), ('globex_db', self.globex)])
+        out = io.StringIO()
+        call_command('prune_matches', stdout=out)
+        self.assertTrue(out.getvalue().startswith('default: {"inactive_jobs": 0'))
+
+    def test_events_are_delivered_per_tenant(self):
+        subscription = match_events.Subscription(tenant_id=self.acme.pk)
+        subscription.deliver([match_events.match_event(1, 1, 1, 50.0, True, self.globex.pk),
+                              match_events.match_event(2, 1, 1, 50.0, True),
+                              match_events.match_event(3, 1, 1, 50.0, True, self.acme.pk)])
+        self.assertEqual(subscription.get(0)['id'], 3)
+        self.assertIsNone(subscription.get(0))
+
+
+class StartupTestCase(SimpleTestCase):
+    """Tests for cold-start import costs."""
+
+    def test_urlconf_does_not_load_numpy(self):
+        """Loading the views and signals leaves numpy to the first match scoring."""
+        script = (
+            "import sys, django; django.setup(); "
+            "from django.urls import get_resolver; get_resolver().url_patterns; "
+            "print('numpy' in sys.modules, 'ninja' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ['False', 'False'])
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     numpy._utils\n"
+            "import time:       300 |        420 |   numpy\n"
+            "import time:        80 |        500 | skillmatch.services.scoring\n"
+        )
+        entries = startup.parse_importtime(output)
+        self.assertEqual([(e['module'], e['depth']) for e in entries],
+                         [('numpy._utils', 2), ('numpy', 1), ('skillmatch.services.scoring', 0)])
+        self.assertEqual(startup.by_package(entries), [
+            {'package': 'numpy', 'modules': 2, 'self_ms': 0.4},
+            {'package': 'skillmatch', 'modules': 1, 'self_ms': 0.1},
+        ])
+
+
 def tearDownModule():
     for conn in connections.all():
         conn.close()
+    # Async views run their ORM calls on asgiref's shared worker thread,
+    # which holds its own connection
+    asyncio.run(sync_to_async(connections.close_all)())
@@ -4,9 +4,12 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'cv-uploads', views.CVUploadViewSet)
+router.register(r'uploads', views.UploadSessionViewSet)
 router.register(r'candidates', views.CandidateViewSet)
 router.register(r'jobs', views.JobViewSet)
 router.register(r'matches', views.MatchViewSet)
+router.register(r'match-runs', views.MatchRunViewSet)
+router.register(r'profiles', views.ProfileViewSet, basename='profile')
 
 urlpatterns = [
     path('api/', include(router.urls)),
@@ -1,23 +1,113 @@
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from rest_framework import viewsets, filters, status
-from rest_framework.parsers import MultiPartParser
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 import asyncio
+import io
+import json
 
-from .models import CVUpload, Candidate, Job, Match
+from .models import CVUpload, Candidate, Job, Match, MatchRun, MatchSummary, UploadSession
 from .serializers import (
     CVUploadSerializer, CandidateSerializer,
-    JobSerializer, MatchSerializer, MatchListSerializer
+    JobSerializer, MatchSerializer, MatchListSerializer,
+    MatchSummaryListSerializer, MatchRunSerializer, UploadSessionSerializer
 )
 from .core import (
     safe_serialize, async_to_sync_view,
-    fetch_objects, check_exists,
-    SafeSerializationMixin, fetch_object_or_none, run_in_transaction
+    EstimatedCountPagination, coalesce_requests,
+    SafeSerializationMixin, CachedResponseMixin, AdmissionControlMixin,
+    fetch_object_or_none, run_in_transaction, invalidate_models,
+    fetch_many, exists_many, upsert_many, get_or_upsert, served_over_asgi
 )
-from .services import parse_cv_file, rank_candidate
+from .core import profiling
+from .core.tenancy import TenantScopedMixin, current_database, tenant_filter
+from .core.filters import FullTextSearchFilter
+from .core.renderers import CSVRenderer, EventStreamRenderer, NDJSONRenderer
+# Services needing numpy are looked up at call time (services.<name>), so
+# loading the URLconf stays cheap
+from . import services
+from .services import (
+    parse_cv_file, rank_candidate, rank_pairs,
+    refresh_summary, summary_enabled,
+    ExtractionError, PoolBusy, get_extraction_pool
+)
+from .services import export as match_export
+from .services import bulk_import
+from .services import match_events, uploads
+
+# Pairs accepted by one matches/create-many request
+MAX_BATCH_PAIRS = 1000
+# Uploads accepted by one cv-uploads/parse-many request
+MAX_BATCH_UPLOADS = 100
+# Seconds clients are asked to wait when the extraction pool is saturated
+EXTRACTION_RETRY_AFTER = 5
+
+
+def bulk_import_response(request, kind):
+    """
+    Shared implementation of the ``import`` actions.
+
+    Expects a multipart ``file`` and an optional ``format`` (csv|ndjson)
+    form field, defaulting to the file extension.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "A 'file' upload is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    fmt = request.data.get('format') or bulk_import.guess_format(upload.name)
+    if fmt not in ('csv', 'ndjson'):
+        return Response({"error": "format must be 'csv' or 'ndjson'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    stream = io.TextIOWrapper(upload, encoding='utf-8', newline='')
+    try:
+        result = bulk_import.import_records(kind, stream, fmt=fmt)
+    except (ValueError, DatabaseError) as e:
+        # Missing columns, malformed CSV rows or bad encoding abort the import
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if result.rows_read and not result.rows_valid:
+        return Response(result.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+    return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+
+def store_parsed_cv(upload, data):
+    """
+    Creates the candidate parsed from ``upload``, or updates the existing
+    one; returns ``(candidate, created)``. Run inside a transaction.
+    """
+    candidate = Candidate.objects.select_related('source_cv').filter(source_cv=upload).first()
+    if candidate is not None:
+        candidate.name = data['name']
+        candidate.skills = data['skills']
+        candidate.experience_years = data['experience_years']
+        candidate.save()
+        return candidate, False
+
+    serializer = CandidateSerializer(data={'name': data['name'],
+                                           'skills': data['skills'],
+                                           'experience_years': data['experience_years'],
+                                           'cv_id': upload.id})
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(), True
+
+
+def matches_written(matches, created_ids=()):
+    """
+    Side effects of model signals for matches written in bulk: cached
+    responses, summary rows and change feed events.
+    """
+    invalidate_models(Match)
+    if summary_enabled():
+        refresh_summary(match_ids=[match.pk for match in matches])
+    match_events.publish_matches(matches, created_ids)
 
 
-class CVUploadViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
+class CVUploadViewSet(TenantScopedMixin, AdmissionControlMixin, SafeSerializationMixin, viewsets.ModelViewSet):
     """
     API endpoint for CV uploads.
     """
@@ -25,18 +115,27 @@ class CVUploadViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
     serializer_class = CVUploadSerializer
     parser_classes = [MultiPartParser]  # handles multipart file uploads
 
+    def get_throttle_units(self, request):
+        """Uploads parsed by the request, for its rate limit cost."""
+        if self.action == 'parse_many':
+            ids = request.data.get('ids')
+            return len(ids) if isinstance(ids, list) else 1
+        return 1
+
     @action(detail=True, methods=['post'], url_name='parse')
     @async_to_sync_view
+    @coalesce_requests(lambda request, pk=None: ('parse', str(request.tenant and request.tenant.pk), str(pk)))
     async def parse(self, request, pk=None):
         """
         Parses the uploaded CV into a Candidate.
         If a Candidate already exists for this CV, it updates the existing record.
+        Returns 503 when the extraction pool is saturated.
         """
         print(f"Parse method called with pk={pk}")
 
         try:
             # Get the CV upload object using safer fetch_object_or_none
-            upload = await fetch_object_or_none(CVUpload, pk=pk)
+            upload = await fetch_object_or_none(CVUpload, pk=pk, **tenant_filter(request.tenant))
 
             if not upload:
                 return Response(
@@ -46,55 +145,25 @@ class CVUploadViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
 
             print(f"Found upload object: {upload.id}")
 
-            # Get the mock data
             data = await parse_cv_file(upload.file)
             print(f"Parsed data: {data}")
 
-            # Check if a Candidate already exists for this CV
-            candidate_exists = await check_exists(Candidate, source_cv=upload)
-            print(f"Candidate exists: {candidate_exists}")
-
-            if candidate_exists:
-                # Define a function to update the candidate within a transaction
-                def update_candidate():
-                    candidate = Candidate.objects.get(source_cv=upload)
-                    candidate.name = data['name']
-                    candidate.skills = data['skills']
-                    candidate.experience_years = data['experience_years']
-                    candidate.save()
-                    return candidate
-
-                # Run the update in a transaction
-                candidate = await run_in_transaction(update_candidate)
-                print(f"Updated candidate: {candidate.id}")
-
-                # Create response serializer and use safe serialization
-                response_serializer = CandidateSerializer(candidate)
-                return Response(
-                    safe_serialize(response_serializer),
-                    status=status.HTTP_200_OK
-                )
-            else:
-                # Define a function to create a new candidate within a transaction
-                def create_candidate():
-                    serializer = CandidateSerializer(data={'name': data['name'],
-                                                         'skills': data['skills'],
-                                                         'experience_years': data['experience_years'],
-                                                         'cv_id': upload.id})
-                    serializer.is_valid(raise_exception=True)
-                    return serializer.save()
-
-                # Create new candidate in a transaction
-                print("Creating new candidate")
-                candidate = await run_in_transaction(create_candidate)
-                print(f"Created candidate: {candidate.id}")
-
-                # Create response serializer and use safe serialization
-                response_serializer = CandidateSerializer(candidate)
-                return Response(
-                    safe_serialize(response_serializer),
-                    status=status.HTTP_201_CREATED
-                )
+            # Create or update the candidate within a transaction
+            candidate, created = await run_in_transaction(store_parsed_cv, upload, data)
+            print(f"{'Created' if created else 'Updated'} candidate: {candidate.id}")
+
+            # Create response serializer and use safe serialization
+            response_serializer = CandidateSerializer(candidate)
+            return Response(
+                safe_serialize(response_serializer),
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+            )
+        except PoolBusy as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': str(EXTRACTION_RETRY_AFTER)})
+        except ExtractionError as e:
+            return Response({"error": f"Could not extract text from the CV: {e}"},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
         except Exception as e:
             # Log the detailed error
             print(f"Error in parse method: {e}")
@@ -107,53 +176,248 @@ class CVUploadViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path='parse-many', url_name='parse-many',
+            parser_classes=[JSONParser])
+    @async_to_sync_view
+    async def parse_many(self, request):
+        """
+        Parses many uploaded CVs into candidates, like ``parse``.
+
+        Body: {"ids": [cv_upload_id, ...]}, at most MAX_BATCH_UPLOADS. Files
+        are submitted to the extraction pool at most as many at a time as it
+        has workers, waiting for room in its queue rather than failing.
+        """
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in request.data.get('ids') or []))
+        except (TypeError, ValueError):
+            return Response({"error": "ids must be a list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({"error": "ids must not be empty."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_BATCH_UPLOADS:
+            return Response({"error": f"At most {MAX_BATCH_UPLOADS} ids per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        uploads = await fetch_many(CVUpload, ids, **tenant_filter(request.tenant))
+        limit = asyncio.Semaphore(get_extraction_pool().workers)
+
+        async def parse_one(upload):
+            async with limit:
+                try:
+                    data = await parse_cv_file(upload.file, block=True)
+                except ExtractionError as e:
+                    return {'cv_id': upload.pk, 'error': str(e)}
+            candidate, created = await run_in_transaction(store_parsed_cv, upload, data)
+            return {'cv_id': upload.pk, 'candidate_id': candidate.pk, 'created': created}
+
+        results = await asyncio.gather(*(parse_one(uploads[pk]) for pk in ids if pk in uploads))
+        errors = [{'cv_id': pk, 'error': "CVUpload not found."} for pk in ids if pk not in uploads]
+        errors += [result for result in results if 'error' in result]
+        return Response({
+            'results': [result for result in results if 'error' not in result],
+            'errors': errors,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='extraction-stats', url_name='extraction-stats')
+    def extraction_stats(self, request):
+        """
+        Load and outcome counters of this worker's extraction pool.
+        """
+        return Response(get_extraction_pool().stats())
 
-class CandidateViewSet(SafeSerializationMixin, viewsets.ReadOnlyModelViewSet):
+
+class UploadSessionViewSet(TenantScopedMixin, viewsets.GenericViewSet):
+    """
+    API endpoint for chunked, resumable CV uploads (a tus-like protocol).
+
+    POST creates a session from {"filename", "length", "expected_sha256"};
+    PATCH on a session appends the raw request body at the ``Upload-Offset``
+    header; HEAD or GET returns the offset to resume from; ``finalize``
+    turns the complete file into a CVUpload; DELETE aborts the upload.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    parser_classes = [JSONParser]
+
+    @staticmethod
+    def offset_headers(session):
+        return {
+            'Upload-Offset': str(session.offset),
+            'Upload-Length': str(session.length),
+            'Cache-Control': 'no-store',
+        }
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = uploads.create_session(**serializer.validated_data)
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        location = request.build_absolute_uri(reverse('uploadsession-detail', kwargs={'pk': session.pk}))
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED,
+                        headers={'Location': location, **self.offset_headers(session)})
+
+    def retrieve(self, request, pk=None):
+        session = self.get_object()
+        return Response(self.get_serializer(session).data, headers=self.offset_headers(session))
+
+    def partial_update(self, request, pk=None):
+        """
+        Appends a chunk: the raw body (``application/offset+octet-stream``),
+        streamed to the file at the ``Upload-Offset`` header.
+        """
+        session = self.get_object()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return Response({"error": "An integer Upload-Offset header is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        size = int(request.META.get('CONTENT_LENGTH') or 0)
+        try:
+            session = uploads.write_chunk(session.pk, offset, request.stream or io.BytesIO(), size)
+        except uploads.OffsetMismatch as e:
+            session.refresh_from_db()
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT,
+                            headers=self.offset_headers(session))
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self.offset_headers(session))
+
+    def destroy(self, request, pk=None):
+        uploads.delete_session(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'], url_name='finalize')
+    def finalize(self, request, pk=None):
+        """
+        Completes the upload and returns the CVUpload, ready to be parsed.
+        Idempotent, so a client which lost the response can retry.
+        """
+        session = self.get_object()
+        try:
+            session, cv_upload, created = uploads.finalize(session.pk)
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if cv_upload is None:
+            return Response({"error": "The CV upload of this session was deleted."}, status=status.HTTP_410_GONE)
+        return Response({
+            'upload': self.get_serializer(session).data,
+            'cv_upload': CVUploadSerializer(cv_upload, context=self.get_serializer_context()).data,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class CandidateViewSet(TenantScopedMixin, CachedResponseMixin, SafeSerializationMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for candidates (read-only).
+
+    ``?q=`` is a ranked full-text search over name and skills (matching
+    word prefixes); ``?search=`` is the older substring search.
     """
+    cache_models = (Candidate, CVUpload)
     queryset = Candidate.objects.all().order_by('-parsed_at')
     serializer_class = CandidateSerializer
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [filters.SearchFilter, FullTextSearchFilter]
     search_fields = ['name', 'skills']
 
+    @action(detail=False, methods=['post'], url_path='import', url_name='import',
+            parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Bulk imports candidates from a CSV/NDJSON file, upserting on external_id.
+        """
+        return bulk_import_response(request, 'candidates')
+
 
-class JobViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
+class JobViewSet(TenantScopedMixin, CachedResponseMixin, SafeSerializationMixin, viewsets.ModelViewSet):
     """
     API endpoint for job postings.
+
+    ``?q=`` is a ranked full-text search over title and requirements.
     """
+    cache_models = (Job,)
     queryset = Job.objects.all().order_by('-created_at')
     serializer_class = JobSerializer
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [filters.SearchFilter, FullTextSearchFilter]
     search_fields = ['title', 'requirements']
 
+    @action(detail=False, methods=['post'], url_path='import', url_name='import',
+            parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Bulk imports jobs from a CSV/NDJSON file, upserting on external_id.
+        """
+        return bulk_import_response(request, 'jobs')
 
-class MatchViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'], url_name='rematch')
+    def rematch(self, request, pk=None):
+        """
+        Rescores all active candidates against this job, replacing its
+        matches by deleting and reloading the job's rows.
+        """
+        job = self.get_object()
+        if job.status != 'active':
+            return Response({"error": "Only active jobs can be rematched."}, status=status.HTTP_400_BAD_REQUEST)
+        stored = services.match_runs.rematch_job(job.pk)
+        return Response({"job_id": job.pk, "matches": stored, "message": f"Stored {stored} matches"})
+
+
+class MatchViewSet(TenantScopedMixin, AdmissionControlMixin, CachedResponseMixin, SafeSerializationMixin, viewsets.ModelViewSet):
     """
     API endpoint for candidate-job matches.
     """
+    cache_models = (Match, Candidate, Job, CVUpload)
     queryset = Match.objects.all().order_by('-score')
+    pagination_class = EstimatedCountPagination
+
+    def get_throttle_units(self, request):
+        """Pairs scored by the request, for its rate limit cost."""
+        if self.action == 'create_many':
+            pairs = request.data.get('pairs')
+            return len(pairs) if isinstance(pairs, list) else 1
+        return 1
+
+    def get_queryset(self):
+        if self.action == 'list':
+            if summary_enabled():
+                # Denormalized rows, read in index order without joins
+                queryset = self.scoped(MatchSummary.objects.order_by('-score', 'match_id'))
+            else:
+                queryset = super().get_queryset().select_related('candidate', 'job')
+            job_id = self.request.query_params.get('job_id')
+            if job_id is not None:
+                try:
+                    # Reads a single partition of the match table
+                    queryset = queryset.filter(job_id=int(job_id))
+                except ValueError:
+                    raise ValidationError({"error": "job_id must be an integer."})
+            return queryset
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.action == 'list':
-            return MatchListSerializer
+            return MatchSummaryListSerializer if summary_enabled() else MatchListSerializer
         return MatchSerializer
 
     @action(detail=False, methods=['post'], url_name='create-match')
     @async_to_sync_view
+    @coalesce_requests(lambda request: (
+        'create-match', str(request.tenant and request.tenant.pk), str(request.data.get('candidate_id')), str(request.data.get('job_id')),
+        bool(request.data.get('recalculate', True))))
     async def create_match(self, request):
         """
         Given candidate_id and job_id, computes and stores a Match.
         If a match already exists, it updates it instead of creating a duplicate.
         """
         try:
-            # Get the candidate and job
-            candidate_id = request.data.get('candidate_id')
-            job_id = request.data.get('job_id')
+            try:
+                candidate_id = int(request.data.get('candidate_id'))
+                job_id = int(request.data.get('job_id'))
+            except (TypeError, ValueError):
+                return Response({"error": "candidate_id and job_id must be integers."},
+                                status=status.HTTP_400_BAD_REQUEST)
 
-            # Use fetch_object_or_none for safer queries
-            candidate = await fetch_object_or_none(Candidate, pk=candidate_id)
-            job = await fetch_object_or_none(Job, pk=job_id)
+            candidate = (await fetch_many(Candidate, [candidate_id], **tenant_filter(request.tenant))).get(candidate_id)
+            job = (await fetch_many(Job, [job_id], **tenant_filter(request.tenant))).get(job_id)
 
             if not candidate:
                 return Response(
@@ -167,37 +431,24 @@ class MatchViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Check if a match already exists
-            match_exists = await check_exists(Match, candidate=candidate, job=job)
+            async def score():
+                # Calculate match score and rationale
+                result = await rank_candidate(
+                    safe_serialize(CandidateSerializer(candidate)), safe_serialize(JobSerializer(job)))
+                return {'score': result['score'], 'rationale': result['rationale'], 'tenant_id': job.tenant_id}
 
-            if match_exists:
-                # Define function to update match in transaction
-                def update_match():
-                    match = Match.objects.get(candidate=candidate, job=job)
-
-                    # Only recalculate if requested
-                    if request.data.get('recalculate', True):
-                        # Get serialized data for the ranking
-                        candidate_data = safe_serialize(CandidateSerializer(candidate))
-                        job_data = safe_serialize(JobSerializer(job))
-
-                        # This is async so need to get result synchronously in this function
-                        loop = asyncio.new_event_loop()
-                        result = loop.run_until_complete(rank_candidate(candidate_data, job_data))
-                        loop.close()
-
-                        # Update the match
-                        match.score = result['score']
-                        match.rationale = result['rationale']
-
-                    match.save()
-                    return match
-
-                # Run update in transaction
-                match = await run_in_transaction(update_match)
+            # Only recalculate an existing match if requested
+            recalculate = bool(request.data.get('recalculate', True))
+            match, created = await get_or_upsert(
+                Match, {'candidate': candidate, 'job': job}, score, update=recalculate
+            )
+            match.candidate, match.job = candidate, job
+            if created or recalculate:
+                await sync_to_async(matches_written)([match], [match.pk] if created else ())
 
-                # Return the existing match
-                match_serializer = MatchSerializer(match)
+            # Return the serialized match
+            match_serializer = MatchSerializer(match)
+            if not created:
                 return Response(
                     {
                         **safe_serialize(match_serializer),
@@ -205,30 +456,6 @@ class MatchViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
                     },
                     status=status.HTTP_200_OK
                 )
-
-            # Get serialized data
-            candidate_data = safe_serialize(CandidateSerializer(candidate))
-            job_data = safe_serialize(JobSerializer(job))
-
-            # Calculate match score and rationale
-            result = await rank_candidate(candidate_data, job_data)
-
-            # Define function to create match in transaction
-            def create_match():
-                match = Match(
-                    candidate=candidate,
-                    job=job,
-                    score=result['score'],
-                    rationale=result['rationale']
-                )
-                match.save()
-                return match
-
-            # Create and save the match in a transaction
-            match = await run_in_transaction(create_match)
-
-            # Return the serialized match
-            match_serializer = MatchSerializer(match)
             return Response(
                 safe_serialize(match_serializer),
                 status=status.HTTP_201_CREATED
@@ -242,77 +469,292 @@ class MatchViewSet(SafeSerializationMixin, viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path='create-many', url_name='create-many')
+    @async_to_sync_view
+    async def create_many(self, request):
+        """
+        Computes and stores matches for many candidate-job pairs at once,
+        updating existing ones, in a fixed number of queries.
+
+        Body: {"pairs": [[candidate_id, job_id], ...]} (or a list of
+        {"candidate_id", "job_id"} objects), at most MAX_BATCH_PAIRS pairs.
+        """
+        try:
+            pairs = []
+            for pair in request.data.get('pairs') or []:
+                if isinstance(pair, dict):
+                    pair = (pair.get('candidate_id'), pair.get('job_id'))
+                candidate_id, job_id = pair
+                pairs.append((int(candidate_id), int(job_id)))
+        except (TypeError, ValueError):
+            return Response({"error": "pairs must be a list of [candidate_id, job_id] integer pairs."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not pairs:
+            return Response({"error": "pairs must not be empty."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(pairs) > MAX_BATCH_PAIRS:
+            return Response({"error": f"At most {MAX_BATCH_PAIRS} pairs per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        pairs = list(dict.fromkeys(pairs))
+
+        candidates = await fetch_many(Candidate, {candidate_id for candidate_id, _ in pairs},
+                                      **tenant_filter(request.tenant))
+        jobs = await fetch_many(Job, {job_id for _, job_id in pairs}, **tenant_filter(request.tenant))
+        resolved = [(candidate_id, job_id) for candidate_id, job_id in pairs
+                    if candidate_id in candidates and job_id in jobs]
+        existing = await exists_many(Match, ['candidate_id', 'job_id'], resolved)
+
+        candidate_data = {pk: safe_serialize(CandidateSerializer(candidate)) for pk, candidate in candidates.items()}
+        job_data = {pk: safe_serialize(JobSerializer(job)) for pk, job in jobs.items()}
+        ranked = await rank_pairs([(candidate_data[candidate_id], job_data[job_id])
+                                   for candidate_id, job_id in resolved])
+        matches = await upsert_many(
+            Match,
+            [Match(candidate=candidates[candidate_id], job=jobs[job_id], tenant=request.tenant, **result)
+             for (candidate_id, job_id), result in zip(resolved, ranked)],
+            unique_fields=['candidate', 'job'], update_fields=['score', 'rationale'],
+        )
+        await sync_to_async(matches_written)(
+            matches, [match.pk for match in matches if (match.candidate_id, match.job_id) not in existing])
+
+        stored = {(match.candidate_id, match.job_id): match for match in matches}
+        results = []
+        for candidate_id, job_id in pairs:
+            result = {"candidate_id": candidate_id, "job_id": job_id}
+            match = stored.get((candidate_id, job_id))
+            if match is None:
+                missing = "Candidate" if candidate_id not in candidates else "Job"
+                result["error"] = f"{missing} not found."
+            else:
+                result.update(id=match.pk, score=match.score, rationale=match.rationale,
+                              created=(candidate_id, job_id) not in existing)
+            results.append(result)
+
+        created = sum(1 for result in results if result.get("created"))
+        return Response(
+            {
+                "results": results,
+                "matches_created": created,
+                "matches_updated": len(matches) - created,
+                "errors": len(pairs) - len(matches),
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
     @action(detail=False, methods=['post'], url_name='match-candidates')
     @async_to_sync_view
     async def match_candidates(self, request):
         """
-        Match all active candidates to all active jobs.
-        Updates existing matches with new scores.
+        Match all active candidates to all active jobs of the request's
+        tenant. Updates existing matches with new scores.
+
+        Runs as a checkpointed ``MatchRun``: when the previous run did not
+        finish, it is resumed after its last committed candidate shard.
+        Optional body fields: shard_size, restart (start over instead of
+        resuming).
         """
         try:
-            # Get active candidates and jobs
-            candidates = await fetch_objects(Candidate, status='active')
-            jobs = await fetch_objects(Job, status='active')
-
-            # Track created and updated matches
-            created_matches = []
-            updated_matches = []
-
-            # Process each candidate-job pair
-            for candidate in candidates:
-                for job in jobs:
-                    # Get serialized data for ranking
-                    candidate_data = safe_serialize(CandidateSerializer(candidate))
-                    job_data = safe_serialize(JobSerializer(job))
-
-                    # Calculate match score and rationale
-                    result = await rank_candidate(candidate_data, job_data)
-
-                    # Check if match already exists
-                    match_exists = await check_exists(Match, candidate=candidate, job=job)
-
-                    if match_exists:
-                        # Define function to update match in transaction
-                        def update_match():
-                            match = Match.objects.get(candidate=candidate, job=job)
-                            match.score = result['score']
-                            match.rationale = result['rationale']
-                            match.save()
-                            return match
-
-                        # Update existing match in transaction
-                        match = await run_in_transaction(update_match)
-                        updated_matches.append(match)
-                    else:
-                        # Define function to create match in transaction
-                        def create_match():
-                            match = Match(
-                                candidate=candidate,
-                                job=job,
-                                score=result['score'],
-                                rationale=result['rationale']
-                            )
-                            match.save()
-                            return match
-
-                        # Create new match in transaction
-                        match = await run_in_transaction(create_match)
-                        created_matches.append(match)
-
-            # Return summary information
-            return Response(
-                {
-                    "message": f"Created {len(created_matches)} new matches, updated {len(updated_matches)} existing matches",
-                    "matches_created": len(created_matches),
-                    "matches_updated": len(updated_matches)
-                },
-                status=status.HTTP_201_CREATED if created_matches else status.HTTP_200_OK
-            )
+            shard_size = int(request.data.get('shard_size') or services.match_runs.DEFAULT_SHARD_SIZE)
+        except (TypeError, ValueError):
+            return Response({"error": "shard_size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        restart = str(request.data.get('restart', '')).lower() in ('1', 'true', 'yes')
+
+        try:
+            run, resumed = await sync_to_async(services.match_runs.run_matching)(
+                shard_size=shard_size, restart=restart, tenant=request.tenant)
+        except services.match_runs.RunInProgress as e:
+            return Response({"error": str(e), "run": e.run.pk if e.run is not None else None},
+                            status=status.HTTP_409_CONFLICT)
         except Exception as e:
             print(f"Error in match_candidates: {e}")
             import traceback
             traceback.print_exc()
+            # The run keeps its checkpoint; calling again resumes it
+            run = await sync_to_async(self.scoped(MatchRun.objects.order_by('-pk')).first)()
             return Response(
-                {"error": str(e)},
+                {
+                    "error": str(e),
+                    "run": MatchRunSerializer(run).data if run is not None else None,
+                },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+        summary = {
+            "message": f"Created {run.matches_created} new matches, updated {run.matches_updated} existing matches",
+            "matches_created": run.matches_created,
+            "matches_updated": run.matches_updated,
+            "run": MatchRunSerializer(run).data,
+            "resumed": resumed,
+        }
+        if run.snapshot:
+            summary["snapshot"] = run.snapshot
+
+        # Return summary information
+        return Response(
+            summary,
+            status=status.HTTP_201_CREATED if run.matches_created else status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'], url_path='top', url_name='top')
+    def top(self, request):
+        """
+        Best matches for one job, from the latest match snapshot when it
+        covers the job, otherwise from the database. Snapshot results are
+        as of the run that published it, so they miss matches written since.
+
+        Query params: job_id (required), limit (default 10).
+        """
+        try:
+            job_id = int(request.query_params['job_id'])
+            limit = int(request.query_params.get('limit', 10))
+        except (KeyError, ValueError):
+            return Response({"error": "job_id and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = services.get_match_snapshot()
+        results = snapshot.top(job_id, limit) if snapshot is not None else None
+        if results is not None:
+            source = {"source": "snapshot", "snapshot": snapshot.version}
+        else:
+            results = self.scoped(Match.objects.filter(job_id=job_id)).order_by('-score', 'candidate_id') \
+                .values_list('candidate_id', 'score')[:limit]
+            source = {"source": "database"}
+
+        return Response({
+            "job_id": job_id,
+            **source,
+            "results": [{"candidate_id": candidate_id, "score": score} for candidate_id, score in results],
+        })
+
+    @action(detail=False, methods=['get'], url_path='pair-score', url_name='pair-score')
+    def pair_score(self, request):
+        """
+        Score of one candidate-job pair, from the latest match snapshot when
+        it holds the pair, otherwise from the database (the snapshot keeps
+        only the best ``TOP_K`` candidates of each job). Snapshot scores are
+        as of the run that published it.
+
+        Query params: candidate_id, job_id.
+        """
+        try:
+            candidate_id = int(request.query_params['candidate_id'])
+            job_id = int(request.query_params['job_id'])
+        except (KeyError, ValueError):
+            return Response({"error": "candidate_id and job_id must be integers."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = services.get_match_snapshot()
+        score = snapshot.score(candidate_id, job_id)[1] if snapshot is not None else None
+        if score is not None:
+            source = {"source": "snapshot", "snapshot": snapshot.version}
+        else:
+            score = self.scoped(Match.objects.filter(candidate_id=candidate_id, job_id=job_id)) \
+                .values_list('score', flat=True).first()
+            source = {"source": "database"}
+
+        if score is None:
+            return Response({"error": "No score for this pair."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"candidate_id": candidate_id, "job_id": job_id, "score": score, **source})
+
+    @action(detail=False, methods=['get'], url_path='export', url_name='export',
+            renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Streams matches as CSV or NDJSON, optionally for a single job.
+
+        Query params: job_id (optional), format=csv|ndjson (default csv).
+        """
+        fmt = request.accepted_renderer.format
+        job_id = request.query_params.get('job_id')
+        if job_id is not None:
+            try:
+                job_id = int(job_id)
+            except ValueError:
+                return JsonResponse({"error": "job_id must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = match_export.export_queryset(job_id=job_id, tenant=request.tenant)
+        if served_over_asgi(request):
+            content = match_export.astream_matches(queryset, fmt)
+        else:
+            content = match_export.stream_matches(queryset, fmt)
+
+        response = StreamingHttpResponse(content, content_type=match_export.CONTENT_TYPES[fmt])
+        filename = f"matches-job-{job_id}.{fmt}" if job_id is not None else f"matches.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='events', url_name='events',
+            renderer_classes=[EventStreamRenderer])
+    def events(self, request):
+        """
+        Streams match changes as server-sent events (see
+        ``services.match_events``), for an ``EventSource``.
+
+        Query params: job_id, candidate_id (optional, comma-separated ids).
+        Only changes of the request's tenant are streamed.
+        """
+        filters = {}
+        for name in ('job_id', 'candidate_id'):
+            try:
+                filters[name] = [int(pk) for pk in request.query_params.get(name, '').split(',') if pk.strip()]
+            except ValueError:
+                return JsonResponse({"error": f"{name} must be a comma-separated list of integers."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+        config = match_events.get_events_settings()
+        if not config['ENABLED']:
+            return JsonResponse({"error": "The match change feed is disabled."},
+                                status=status.HTTP_404_NOT_FOUND)
+        # Streaming runs after the view, without a current tenant
+        using = current_database()
+        if match_events.get_listener(using).subscribers >= config['MAX_SUBSCRIBERS']:
+            response = JsonResponse({"error": "Too many open event streams; retry later."},
+                                    status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = str(int(config['HEARTBEAT']))
+            return response
+
+        stream = match_events.astream_events if served_over_asgi(request) else match_events.stream_events
+        content = stream(filters['job_id'], filters['candidate_id'], config['HEARTBEAT'], config['QUEUE_SIZE'],
+                         tenant_id=request.tenant and request.tenant.pk, using=using)
+
+        response = StreamingHttpResponse(content, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keeps proxies such as nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class MatchRunViewSet(TenantScopedMixin, SafeSerializationMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for batch matching runs (progress, checkpoints, timings).
+    """
+    queryset = MatchRun.objects.all().order_by('-started_at')
+    serializer_class = MatchRunSerializer
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Staff-only API endpoint for profile captures (see ``core.profiling``):
+    summaries, the SQL statements with their timings, and the profile
+    itself at ``download/``.
+    """
+    permission_classes = [IsAdminUser]
+    lookup_value_regex = r'[0-9T]+-[0-9a-f]+'
+
+    def list(self, request):
+        return Response(profiling.list_summaries())
+
+    def retrieve(self, request, pk=None):
+        summary = profiling.load_summary(pk)
+        if summary is None:
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        queries = (profiling.profiles_path() / pk / 'sql.json').read_text()
+        return Response({**summary, 'sql': json.loads(queries)})
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """The speedscope JSON or pstats file of the capture."""
+        summary = profiling.load_summary(pk)
+        if summary is None:
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        filename, content_type = profiling.PROFILE_FILES[summary['mode']]
+        return FileResponse(open(profiling.profiles_path() / pk / filename, 'rb'), as_attachment=True,
+                            filename=f"{pk}.{filename.split('.', 1)[1]}", content_type=content_type)